@@ -0,0 +1,327 @@
+"""Benchmarks every pipeline stage on synthetic documents and compares the results against a stored baseline.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output baseline.json
+    python -m benchmarks.run_benchmarks --compare baseline.json --output current.json
+    python -m benchmarks.run_benchmarks --compare baseline.json --current current.json
+
+The anonymizer and redactor are fed the known PII spans of the synthetic documents instead
+of the analyzer output, so their inputs are the same in every environment. Stages that
+cannot run here (no Tesseract for scanned documents, no spaCy model for the analyzer) are
+reported as skipped. The exit status is 1 when the comparison finds a regression.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pytesseract
+from presidio_analyzer import RecognizerResult
+
+from benchmarks.synthetic_documents import generate_document
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer import DynamicDataMaskingAnonimyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import DynamicDataMaskingPipelineDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor import DynamicDataMaskingFileProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor import DynamicDataMaskingFileRedactor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.comparison import ComparisonStrategyFactory
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import configure_logging, peak_rss_bytes
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import LANG_MAP, ANALYZER, CONF_LEVEL_MAP
+
+logger = logging.getLogger(__name__)
+
+SUITES = {
+    "quick": [
+        ("digital_1p_low", "digital", 1, 0.05),
+        ("digital_10p_low", "digital", 10, 0.05),
+        ("digital_10p_high", "digital", 10, 0.5),
+        ("scanned_2p_low", "scanned", 2, 0.05),
+    ],
+    "full": [
+        ("digital_1p_low", "digital", 1, 0.05),
+        ("digital_10p_low", "digital", 10, 0.05),
+        ("digital_10p_high", "digital", 10, 0.5),
+        ("digital_100p_low", "digital", 100, 0.05),
+        ("digital_100p_high", "digital", 100, 0.5),
+        ("scanned_2p_low", "scanned", 2, 0.05),
+        ("scanned_10p_high", "scanned", 10, 0.5),
+    ],
+}
+
+STAGES = ["file_processor", "analyzer", "anonymizer", "redactor", "end_to_end"]
+
+
+class StageSkipped(Exception):
+    """A stage that cannot run in this environment."""
+
+
+def latency_stats(latencies, pages, peak_traced_bytes):
+    latencies = np.asarray(latencies)
+    p50 = float(np.percentile(latencies, 50))
+    return {
+        "runs": len(latencies),
+        "mean_seconds": float(latencies.mean()),
+        "min_seconds": float(latencies.min()),
+        "max_seconds": float(latencies.max()),
+        "p50_seconds": p50,
+        "p90_seconds": float(np.percentile(latencies, 90)),
+        "p95_seconds": float(np.percentile(latencies, 95)),
+        "p99_seconds": float(np.percentile(latencies, 99)),
+        "pages_per_second": pages / p50 if p50 else None,
+        "peak_traced_bytes": peak_traced_bytes,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def measure(function, pages, repeat, warmup, trace_memory):
+    """Times repeat calls of function after warmup calls, returns its stats and the last result.
+
+    Memory is measured in one extra call under tracemalloc, which would distort the timings.
+    """
+    for _ in range(warmup):
+        result = function()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+
+    peak_traced_bytes = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return latency_stats(latencies, pages, peak_traced_bytes), result
+
+
+def known_results(text, pii):
+    """Analyzer results for every occurrence of the document's known PII values in the extracted text."""
+    results = []
+    for entity in {(item["entity_type"], item["value"]) for item in pii}:
+        entity_type, value = entity
+        start = text.find(value)
+        while start != -1:
+            results.append(RecognizerResult(entity_type, start, start + len(value), 1.0))
+            start = text.find(value, start + len(value))
+    return sorted(results, key=lambda result: result.start)
+
+
+class BenchmarkRunner:
+    """Runs every stage of the masking pipeline separately, and the pipeline end to end, on each document."""
+
+    def __init__(self, output_directory, repeat=5, warmup=1, trace_memory=True, lang="en", conf_level="c4",
+                 analyzer_engine="from_config_file", extraction_mode="hybrid", resolution=300, ocr_config="--oem 3 --psm 6",
+                 tiered_analysis=False):
+        self.output_directory = Path(output_directory)
+        self.repeat = repeat
+        self.warmup = warmup
+        self.trace_memory = trace_memory
+        self.lang = lang
+        self.conf_level = conf_level
+        self.analyzer_engine = analyzer_engine
+        self.extraction_mode = extraction_mode
+        self.resolution = resolution
+        self.ocr_config = ocr_config
+        self.tiered_analysis = tiered_analysis
+        self.tesseract_error = self._check_tesseract()
+        self.analyzer, self.analyzer_error = self._build_analyzer()
+
+    @staticmethod
+    def _check_tesseract():
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception as error:
+            return f"tesseract unavailable: {type(error).__name__}"
+        return None
+
+    def _build_analyzer(self):
+        try:
+            return DynamicDataMaskingAnalyzer(from_config_file=ANALYZER[self.analyzer_engine], language=self.lang,
+                                              use_predefined=CONF_LEVEL_MAP[self.conf_level], tiered=self.tiered_analysis), None
+        except Exception as error:
+            return None, f"analyzer unavailable: {type(error).__name__}"
+
+    def settings(self):
+        return {
+            "repeat": self.repeat, "warmup": self.warmup, "trace_memory": self.trace_memory, "lang": self.lang,
+            "conf_level": self.conf_level, "analyzer_engine": self.analyzer_engine, "extraction_mode": self.extraction_mode,
+            "resolution": self.resolution, "ocr_config": self.ocr_config, "tiered_analysis": self.tiered_analysis,
+        }
+
+    def environment(self):
+        return {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "tesseract": self.tesseract_error or str(pytesseract.get_tesseract_version()),
+            "analyzer": self.analyzer_error or "available",
+        }
+
+    def run_document(self, document):
+        """Returns the stats of every stage for one document, stages that cannot run are marked skipped."""
+        stages = {}
+        pages = document["pages"]
+        output_path = self.output_directory / f"{document['name']}.masked.pdf"
+
+        def run_stage(name, function):
+            try:
+                stats, result = self.measure(function, pages)
+            except StageSkipped as skipped:
+                stages[name] = {"skipped": str(skipped)}
+                return None
+            stages[name] = stats
+            logger.info("%s %s: p50 %.4fs, %.1f pages/s", document["name"], name, stats["p50_seconds"], stats["pages_per_second"] or 0,
+                        extra={"document": document["name"], "stage": name, "stats": stats})
+            return result
+
+        extracted = run_stage("file_processor", lambda: self.extract(document))
+        if extracted is None:
+            for name in STAGES[1:]:
+                stages[name] = {"skipped": "no extracted text"}
+            return stages
+        text, words = extracted
+        # The same spans in every environment, whatever the analyzer finds
+        results = known_results(text, document["pii"])
+
+        run_stage("analyzer", lambda: self.analyze(text))
+        masked_text = run_stage("anonymizer", lambda: DynamicDataMaskingAnonimyzer().anonimyze(text, results, use_default_operators=True))
+        run_stage("redactor", lambda: DynamicDataMaskingFileRedactor(
+            comparison_strategy=ComparisonStrategyFactory.get_comparison_strategy("span"), redaction_strategy="blackout"
+        ).redact_file(document["path"], text, masked_text, words, str(output_path), analyzer_results=results))
+        run_stage("end_to_end", lambda: self.mask(document, output_path))
+        return stages
+
+    def measure(self, function, pages):
+        return measure(function, pages, self.repeat, self.warmup, self.trace_memory)
+
+    def extract(self, document):
+        if document["kind"] == "scanned" and self.tesseract_error:
+            raise StageSkipped(self.tesseract_error)
+        return DynamicDataMaskingFileProcessor(document["path"], LANG_MAP[self.lang], self.resolution, self.ocr_config,
+                                               extraction_mode=self.extraction_mode).process()
+
+    def analyze(self, text):
+        if self.analyzer is None:
+            raise StageSkipped(self.analyzer_error)
+        return self.analyzer.analyze_text(text)
+
+    def mask(self, document, output_path):
+        if self.analyzer is None:
+            raise StageSkipped(self.analyzer_error)
+        pipeline = DynamicDataMaskingPipelineDirector.construct(
+            input_file_path=document["path"], output_file_path=str(output_path), lang=self.lang, resolution=self.resolution,
+            ocr_config=self.ocr_config, extraction_mode=self.extraction_mode, conf_level=self.conf_level,
+            analyzer_engine=self.analyzer_engine, tiered_analysis=self.tiered_analysis
+        )
+        return pipeline.execute_pipeline()
+
+    def run(self, documents):
+        report = {"environment": self.environment(), "settings": self.settings(), "documents": {}}
+        for document in documents:
+            report["documents"][document["name"]] = {
+                "kind": document["kind"],
+                "pages": document["pages"],
+                "pii_density": document["pii_density"],
+                "pii_values": len(document["pii"]),
+                "stages": self.run_document(document),
+            }
+        return report
+
+
+def compare(baseline, current, threshold=0.2, memory_threshold=0.2, min_seconds=0.005):
+    """Lists the stages whose p50 latency or traced memory grew by more than the thresholds (fractions) over the baseline.
+
+    Latency changes smaller than min_seconds are timer noise on fast stages and never count as regressions.
+    """
+    comparisons = []
+    for name, document in current["documents"].items():
+        baseline_document = baseline["documents"].get(name)
+        if baseline_document is None:
+            continue
+        for stage, stats in document["stages"].items():
+            baseline_stats = baseline_document["stages"].get(stage, {})
+            if "skipped" in stats or "skipped" in baseline_stats or not baseline_stats:
+                continue
+            for metric, limit, min_delta in (("p50_seconds", threshold, min_seconds), ("peak_traced_bytes", memory_threshold, 0)):
+                before, after = baseline_stats.get(metric), stats.get(metric)
+                if not before or after is None:
+                    continue
+                change = after / before - 1
+                comparisons.append({
+                    "document": name, "stage": stage, "metric": metric, "baseline": before, "current": after,
+                    "change": change, "regression": change > limit and after - before > min_delta,
+                })
+    return comparisons
+
+
+def print_comparison(comparisons):
+    print(f"{'document':<20} {'stage':<15} {'metric':<18} {'baseline':>12} {'current':>12} {'change':>8}")
+    for item in comparisons:
+        flag = "  REGRESSION" if item["regression"] else ""
+        print(f"{item['document']:<20} {item['stage']:<15} {item['metric']:<18} {item['baseline']:>12.4g} {item['current']:>12.4g} {item['change']:>+8.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the dynamic data masking pipeline stages on synthetic documents")
+    parser.add_argument("--suite", default="quick", choices=sorted(SUITES), help="documents to generate and benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per stage before the timed ones")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra tracemalloc run of every stage")
+    parser.add_argument("--work-dir", default=None, help="directory for the synthetic documents and masked outputs, a temporary directory by default")
+    parser.add_argument("--output", default=None, help="write the JSON report to this file, stdout by default")
+    parser.add_argument("--compare", default=None, help="baseline JSON report to compare against")
+    parser.add_argument("--current", default=None, help="compare this stored report instead of running the benchmarks")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 latency increase over the baseline, as a fraction")
+    parser.add_argument("--memory-threshold", type=float, default=0.2, help="allowed traced memory increase over the baseline, as a fraction")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="latency increases below this many seconds are never regressions")
+    parser.add_argument("--lang", default="en", choices=["en", "fr", "nl"])
+    parser.add_argument("--conf_level", default="c4")
+    parser.add_argument("--analyzer_engine", default="from_config_file", choices=["from_config_file", "from_code"])
+    parser.add_argument("--extraction-mode", default="hybrid", choices=["hybrid", "ocr"])
+    parser.add_argument("--resolution", type=int, default=300)
+    parser.add_argument("--tiered-analysis", action="store_true", help="screen with the small NLP model and only run the large one on flagged segments")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args()
+    configure_logging(level=args.log_level)
+
+    if args.current:
+        report = json.loads(Path(args.current).read_text())
+    else:
+        with tempfile.TemporaryDirectory(prefix="ddm-bench-") as temp_directory:
+            work_directory = Path(args.work_dir or temp_directory)
+            work_directory.mkdir(parents=True, exist_ok=True)
+            documents = [generate_document(work_directory, name, kind, pages, density, seed=index)
+                         for index, (name, kind, pages, density) in enumerate(SUITES[args.suite])]
+            runner = BenchmarkRunner(work_directory, repeat=args.repeat, warmup=args.warmup, trace_memory=not args.no_memory,
+                                     lang=args.lang, conf_level=args.conf_level, analyzer_engine=args.analyzer_engine,
+                                     extraction_mode=args.extraction_mode, resolution=args.resolution,
+                                     tiered_analysis=args.tiered_analysis)
+            report = runner.run(documents)
+        report["suite"] = args.suite
+
+        if args.output:
+            Path(args.output).write_text(json.dumps(report, indent=2))
+        elif not args.compare:
+            print(json.dumps(report, indent=2))
+
+    if args.compare:
+        comparisons = compare(json.loads(Path(args.compare).read_text()), report, args.threshold, args.memory_threshold, args.min_seconds)
+        print_comparison(comparisons)
+        regressions = [item for item in comparisons if item["regression"]]
+        if regressions:
+            logger.error("%d regressions against %s", len(regressions), args.compare)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
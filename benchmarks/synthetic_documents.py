@@ -0,0 +1,119 @@
+"""Deterministic synthetic PDFs for the benchmarks: digital text PDFs and scanned-like image-only PDFs with known PII."""
+import random
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+FIRST_NAMES = ["John", "Maria", "Pieter", "Sophie", "Ahmed", "Elena", "Lucas", "Emma", "Noah", "Julia", "David", "Sara"]
+LAST_NAMES = ["Smith", "Janssen", "Dubois", "Peeters", "Garcia", "Muller", "de Vries", "Martin", "Bakker", "Lambert"]
+FILLER_WORDS = (
+    "the contract agreement payment invoice period customer service account balance transfer report quarter "
+    "review policy request update meeting schedule delivery order reference department office terms annual "
+    "statement summary record note according following regarding previous current amount total due date"
+).split()
+
+LINES_PER_PAGE = 48
+FONT_SIZE = 10
+
+
+def iban(rng):
+    """A Dutch IBAN with valid check digits."""
+    bban = "ABNA" + "".join(rng.choice("0123456789") for _ in range(10))
+    digits = "".join(str(int(character, 36)) for character in bban + "NL00")
+    return f"NL{98 - int(digits) % 97:02d}{bban}"
+
+
+def credit_card(rng):
+    """A 16 digit card number passing the Luhn check."""
+    digits = [4] + [rng.randrange(10) for _ in range(14)]
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        if index % 2 == 0:
+            digit *= 2
+            digit = digit - 9 if digit > 9 else digit
+        total += digit
+    digits.append((10 - total % 10) % 10)
+    number = "".join(map(str, digits))
+    return " ".join(number[start:start + 4] for start in range(0, 16, 4))
+
+
+def pii_value(rng):
+    """Returns (entity type, value) of a random PII value."""
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    entity = rng.choice(["PERSON", "EMAIL_ADDRESS", "PHONE_NUMBER", "IBAN_CODE", "CREDIT_CARD"])
+    if entity == "PERSON":
+        return entity, f"{first} {last}"
+    if entity == "EMAIL_ADDRESS":
+        return entity, f"{first}.{last.replace(' ', '')}@example.com".lower()
+    if entity == "PHONE_NUMBER":
+        return entity, f"(212) 555-{rng.randrange(10000):04d}"
+    if entity == "IBAN_CODE":
+        return entity, iban(rng)
+    return entity, credit_card(rng)
+
+
+def document_lines(pages, pii_density, seed):
+    """Text lines of every page, with a PII value in roughly pii_density of the lines, and the PII values used."""
+    rng = random.Random(seed)
+    page_lines = []
+    pii = []
+    for _ in range(pages):
+        lines = []
+        for _ in range(LINES_PER_PAGE):
+            words = [rng.choice(FILLER_WORDS) for _ in range(rng.randrange(6, 12))]
+            if rng.random() < pii_density:
+                entity, value = pii_value(rng)
+                words.insert(rng.randrange(len(words) + 1), value)
+                pii.append({"entity_type": entity, "value": value})
+            lines.append(" ".join(words).capitalize() + ".")
+        page_lines.append(lines)
+    return page_lines, pii
+
+
+def write_digital_pdf(path, page_lines):
+    """A PDF with a real text layer, one line of text per row."""
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    for lines in page_lines:
+        pdf.setFont("Helvetica", FONT_SIZE)
+        for index, line in enumerate(lines):
+            pdf.drawString(50, height - 60 - index * FONT_SIZE * 1.5, line)
+        pdf.showPage()
+    pdf.save()
+
+
+def write_scanned_pdf(path, page_lines, seed, resolution=150, skew=0.8, noise=12):
+    """An image-only PDF: every page is a slightly skewed, noisy grayscale scan of its lines, without a text layer."""
+    rng = np.random.default_rng(seed)
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    width, height = A4
+    scale = resolution / 72
+    font = ImageFont.load_default(size=round(FONT_SIZE * scale))
+    for lines in page_lines:
+        image = Image.new("L", (round(width * scale), round(height * scale)), 255)
+        draw = ImageDraw.Draw(image)
+        for index, line in enumerate(lines):
+            draw.text((50 * scale, (60 + index * FONT_SIZE * 1.5) * scale), line, fill=0, font=font)
+        image = image.rotate(float(rng.uniform(-skew, skew)), resample=Image.BILINEAR, fillcolor=255)
+        pixels = np.asarray(image, dtype=np.int16) + rng.normal(0, noise, (image.height, image.width)).astype(np.int16)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        pdf.drawImage(ImageReader(image), 0, 0, width, height)
+        pdf.showPage()
+    pdf.save()
+
+
+def generate_document(directory, name, kind, pages, pii_density, seed=0):
+    """Writes one synthetic document and returns its description, including the PII values it holds."""
+    path = Path(directory) / f"{name}.pdf"
+    page_lines, pii = document_lines(pages, pii_density, seed)
+    if kind == "digital":
+        write_digital_pdf(path, page_lines)
+    elif kind == "scanned":
+        write_scanned_pdf(path, page_lines, seed)
+    else:
+        raise ValueError(f"Unsupported document kind: {kind}")
+    return {"name": name, "kind": kind, "pages": pages, "pii_density": pii_density, "seed": seed, "path": str(path), "pii": pii}
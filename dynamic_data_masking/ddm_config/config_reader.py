@@ -1,7 +1,10 @@
+import logging
 import os
 import sys
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 class ConfigReader:
     _instance = None
 
@@ -29,7 +32,7 @@ class ConfigReader:
     def get(self, key, default=None):
         value = os.getenv(key, default)
         if value is None:
-            print(f"⚠️ Warning: {key} not found in environment variables.")
+            logger.warning("Key not found in environment variables", extra={'key': key})
         return value
 
 # Initialize ConfigReader (Automatically finds .env)
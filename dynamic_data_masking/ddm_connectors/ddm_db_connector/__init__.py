@@ -0,0 +1,4 @@
+from dynamic_data_masking.ddm_connectors.ddm_db_connector.connection_pool import ConnectionPool
+from dynamic_data_masking.ddm_connectors.ddm_db_connector.db_connector import DatabaseMaskingConnector, MaskingCheckpoint
+
+__all__ = ["ConnectionPool", "DatabaseMaskingConnector", "MaskingCheckpoint"]
\ No newline at end of file
@@ -0,0 +1,81 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+class ConnectionPool:
+    """Fixed-size pool of DB-API connections created lazily from a connect callable.
+
+    Works with any DB-API driver, e.g. ConnectionPool(lambda: psycopg2.connect(dsn)) or
+    ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False)), connections
+    move between threads since batches are read ahead. A SQLAlchemy engine already pools its
+    connections, from_sqlalchemy_engine hands out its raw DB-API connections.
+    """
+
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_sqlalchemy_engine(cls, engine, size=4):
+        return cls(engine.raw_connection, size=size)
+
+    def acquire(self, timeout=None):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.connect()
+            except BaseException:
+                with self._lock:
+                    self._created -= 1
+                raise
+        # The pool is exhausted, wait for another caller to release a connection
+        return self._idle.get(timeout=timeout)
+
+    def release(self, connection, broken=False):
+        if broken:
+            with self._lock:
+                self._created -= 1
+            try:
+                connection.close()
+            except Exception:
+                pass
+            return
+        self._idle.put(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Yields a pooled connection, rolled back and discarded if the block raises."""
+        connection = self.acquire(timeout=timeout)
+        try:
+            yield connection
+        except BaseException:
+            try:
+                connection.rollback()
+                self.release(connection)
+            except Exception:
+                self.release(connection, broken=True)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            connection.close()
+            with self._lock:
+                self._created -= 1
@@ -0,0 +1,205 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer import DynamicDataMaskingAnonimyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import CONF_LEVEL_MAP, ANALYZER, ANONYMIZER
+
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$')
+
+logger = logging.getLogger(__name__)
+
+class MaskingCheckpoint:
+    """Last key written for a table, persisted atomically so an interrupted run resumes after it."""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+
+    def load(self, table):
+        if self.path is None or not self.path.exists():
+            return None
+        state = json.loads(self.path.read_text())
+        return state if state.get('table') == table else None
+
+    def save(self, table, last_key, rows):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w') as file:
+            json.dump({'table': table, 'last_key': last_key, 'rows': rows}, file)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+class DatabaseMaskingConnector:
+    """Masks text columns of a SQL table in batches.
+
+    Rows are read in key order with keyset pagination (WHERE key > last key ORDER BY key),
+    so every batch is a short query that needs no long running transaction and the run can
+    resume from the last checkpointed key. The next batch is read while the current one is
+    masked. All values of a batch go through the analyzer as one NLP batch, and the masked
+    values are written back with a single executemany per batch, either as an UPDATE of the
+    source rows that had a hit or as an INSERT of every row into a target table.
+
+    Columns repeat the same values a lot, a MaskingResultCache as result_cache masks every
+    distinct value once.
+
+    placeholder is the driver's parameter marker: '?' for sqlite3, '%s' for psycopg2 / pymysql.
+    """
+
+    def __init__(self, source_pool, table, key_column, text_columns, target_pool=None, target_table=None,
+                 passthrough_columns=(), batch_size=1000, placeholder='?', checkpoint_path=None,
+                 lang='en', conf_level='c4', analyzer_engine='from_config_file', anonimyzer_operator='yes',
+                 analysis_batch_size=64, analysis_processes=1, result_cache=None):
+        self.source_pool = source_pool
+        self.target_pool = target_pool or source_pool
+        self.table = self._identifier(table)
+        self.key_column = self._identifier(key_column)
+        self.text_columns = [self._identifier(column) for column in text_columns]
+        self.target_table = self._identifier(target_table) if target_table else None
+        self.passthrough_columns = [self._identifier(column) for column in passthrough_columns]
+        self.batch_size = batch_size
+        self.placeholder = placeholder
+        self.checkpoint = MaskingCheckpoint(checkpoint_path)
+        self.analysis_batch_size = analysis_batch_size
+        self.analysis_processes = analysis_processes
+        self.use_default_operators = ANONYMIZER[anonimyzer_operator]
+
+        self.result_cache = result_cache
+        self.analyzer = DynamicDataMaskingAnalyzer(from_config_file=ANALYZER[analyzer_engine], language=lang, use_predefined=CONF_LEVEL_MAP[conf_level],
+                                                   result_cache=result_cache)
+        self.anonymizer = DynamicDataMaskingAnonimyzer(result_cache=result_cache)
+
+    @staticmethod
+    def _identifier(name):
+        # Identifiers cannot be bound as parameters, so only plain (optionally schema qualified) names are accepted
+        if not IDENTIFIER_PATTERN.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+        return name
+
+    @property
+    def selected_columns(self):
+        return [self.key_column, *self.text_columns, *self.passthrough_columns]
+
+    def select_query(self, after_key):
+        where = f" WHERE {self.key_column} > {self.placeholder}" if after_key is not None else ""
+        return (f"SELECT {', '.join(self.selected_columns)} FROM {self.table}{where} "
+                f"ORDER BY {self.key_column} LIMIT {self.placeholder}")
+
+    def write_query(self):
+        if self.target_table is None:
+            assignments = ', '.join(f"{column} = {self.placeholder}" for column in self.text_columns)
+            return f"UPDATE {self.table} SET {assignments} WHERE {self.key_column} = {self.placeholder}"
+        columns = self.selected_columns
+        return f"INSERT INTO {self.target_table} ({', '.join(columns)}) VALUES ({', '.join([self.placeholder] * len(columns))})"
+
+    def run(self, max_rows=None, resume=True):
+        """Masks the table batch by batch and returns run statistics."""
+        state = self.checkpoint.load(self.table) if resume else None
+        last_key = state['last_key'] if state else None
+        rows_done = state['rows'] if state else 0
+        started = time.monotonic()
+        rows_this_run = values_masked = 0
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ddm-db-reader') as reader:
+            pending = reader.submit(self.read_batch, last_key)
+            while True:
+                rows = pending.result()
+                if not rows:
+                    break
+                if max_rows is not None and rows_this_run + len(rows) >= max_rows:
+                    rows = rows[:max_rows - rows_this_run]
+                    pending = None
+                    if not rows:
+                        break
+                else:
+                    # Read ahead while this batch is masked
+                    pending = reader.submit(self.read_batch, rows[-1][0])
+
+                masked_rows, hit_positions = self.mask_rows(rows)
+                self.write_batch(masked_rows, hit_positions)
+
+                last_key = rows[-1][0]
+                rows_this_run += len(rows)
+                rows_done += len(rows)
+                values_masked += len(hit_positions)
+                self.checkpoint.save(self.table, last_key, rows_done)
+                elapsed = time.monotonic() - started
+                logger.info("masked batch", extra={'table': self.table, 'rows': rows_done, 'rows_per_second': rows_this_run / elapsed})
+                if pending is None:
+                    break
+
+        elapsed = time.monotonic() - started
+        return {
+            'table': self.table,
+            'rows': rows_this_run,
+            'total_rows': rows_done,
+            'values_masked': values_masked,
+            'last_key': last_key,
+            'seconds': elapsed,
+            'rows_per_second': rows_this_run / elapsed if elapsed else 0.0,
+        }
+
+    def read_batch(self, after_key):
+        parameters = (after_key, self.batch_size) if after_key is not None else (self.batch_size,)
+        with self.source_pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(self.select_query(after_key), parameters)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+    def mask_rows(self, rows):
+        """Masks the text columns of a batch, every non-empty string value is one item of a single analyzer batch.
+
+        Returns the masked rows and the (row index, column index) of every value that changed.
+        """
+        positions = []
+        texts = []
+        for row_index, row in enumerate(rows):
+            for column_index in range(1, len(self.text_columns) + 1):
+                value = row[column_index]
+                if isinstance(value, str) and value.strip():
+                    positions.append((row_index, column_index))
+                    texts.append(value)
+
+        analyzer_results = self.analyzer.analyze_batch(texts, batch_size=self.analysis_batch_size, n_process=self.analysis_processes)
+        hits = [(position, text, results) for position, text, results in zip(positions, texts, analyzer_results) if results]
+
+        masked_rows = [list(row) for row in rows]
+        masked_texts = self.anonymizer.anonymize_many([text for _, text, _ in hits], [results for _, _, results in hits],
+                                                      use_default_operators=self.use_default_operators)
+        for ((row_index, column_index), _, _), masked_text in zip(hits, masked_texts):
+            masked_rows[row_index][column_index] = masked_text
+        return masked_rows, [position for position, _, _ in hits]
+
+    def write_batch(self, masked_rows, hit_positions=None):
+        """Writes a masked batch. An UPDATE only touches the rows of hit_positions, when given; the target table gets every row."""
+        if self.target_table is None:
+            if hit_positions is not None:
+                changed = sorted({row_index for row_index, _ in hit_positions})
+                masked_rows = [masked_rows[row_index] for row_index in changed]
+            if not masked_rows:
+                return
+            parameters = [(*row[1:len(self.text_columns) + 1], row[0]) for row in masked_rows]
+        else:
+            parameters = [tuple(row) for row in masked_rows]
+
+        with self.target_pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(self.write_query(), parameters)
+            finally:
+                cursor.close()
+            connection.commit()
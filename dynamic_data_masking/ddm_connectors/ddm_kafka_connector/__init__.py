@@ -0,0 +1,4 @@
+from dynamic_data_masking.ddm_connectors.ddm_kafka_connector.kafka_connector import KafkaMaskingConnector, KafkaConnectorMetrics
+from dynamic_data_masking.ddm_connectors.ddm_kafka_connector.in_memory_broker import InMemoryBroker, InMemoryConsumer, InMemoryProducer
+
+__all__ = ["KafkaMaskingConnector", "KafkaConnectorMetrics", "InMemoryBroker", "InMemoryConsumer", "InMemoryProducer"]
\ No newline at end of file
@@ -0,0 +1,159 @@
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+TopicPartition = namedtuple('TopicPartition', ['topic', 'partition', 'offset'], defaults=[-1001])
+
+class InMemoryMessage:
+    """Mirrors the accessor methods of a confluent_kafka Message."""
+
+    def __init__(self, topic, partition, offset, key, value):
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return self._partition
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+    def error(self):
+        return None
+
+
+class InMemoryBroker:
+    """In-process stand-in for a Kafka cluster: partitioned append-only logs plus committed group offsets."""
+
+    def __init__(self, partitions=1):
+        self.partitions = partitions
+        self.topics = {}
+        self.committed = {}
+        self._lock = threading.Condition()
+
+    def create_topic(self, topic, partitions=None):
+        with self._lock:
+            self.topics.setdefault(topic, [[] for _ in range(partitions or self.partitions)])
+        return self
+
+    def append(self, topic, value, key=None, partition=None):
+        self.create_topic(topic)
+        with self._lock:
+            logs = self.topics[topic]
+            if partition is None:
+                partition = zlib.crc32(key) % len(logs) if key is not None else min(range(len(logs)), key=lambda p: len(logs[p]))
+            message = InMemoryMessage(topic, partition, len(logs[partition]), key, value)
+            logs[partition].append(message)
+            self._lock.notify_all()
+        return message
+
+    def messages(self, topic):
+        """Every message of a topic, partition by partition."""
+        with self._lock:
+            return [message for log in self.topics.get(topic, []) for message in log]
+
+    def read(self, topic, partition, offset, max_messages):
+        with self._lock:
+            return self.topics[topic][partition][offset:offset + max_messages]
+
+    def high_watermark(self, topic, partition):
+        with self._lock:
+            return len(self.topics[topic][partition])
+
+    def wait_for_messages(self, timeout):
+        with self._lock:
+            self._lock.wait(timeout)
+
+
+class InMemoryProducer:
+    """Producer with the produce / poll / flush subset of the confluent_kafka API."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._pending_callbacks = []
+
+    def produce(self, topic, value=None, key=None, partition=None, on_delivery=None):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        if isinstance(key, str):
+            key = key.encode('utf-8')
+        message = self.broker.append(topic, value, key=key, partition=partition)
+        if on_delivery is not None:
+            # Delivery reports are served from poll / flush, as with a real producer
+            self._pending_callbacks.append((on_delivery, message))
+
+    def poll(self, timeout=0):
+        callbacks, self._pending_callbacks = self._pending_callbacks, []
+        for on_delivery, message in callbacks:
+            on_delivery(None, message)
+        return len(callbacks)
+
+    def flush(self, timeout=None):
+        self.poll(0)
+        return 0
+
+
+class InMemoryConsumer:
+    """Single-member consumer group with the consume / commit / seek subset of the confluent_kafka API.
+
+    The consumer owns every partition of its topics. Its position starts at the group's
+    committed offset, so a new consumer resumes where the last commit left off.
+    """
+
+    def __init__(self, broker, group_id, topics):
+        self.broker = broker
+        self.group_id = group_id
+        self.positions = {}
+        for topic in topics:
+            broker.create_topic(topic)
+            for partition in range(len(broker.topics[topic])):
+                self.positions[(topic, partition)] = broker.committed.get((group_id, topic, partition), 0)
+
+    def assignment(self):
+        return [TopicPartition(topic, partition) for topic, partition in self.positions]
+
+    def consume(self, num_messages=1, timeout=-1):
+        deadline = time.monotonic() + max(timeout, 0)
+        while True:
+            messages = []
+            for (topic, partition), position in self.positions.items():
+                batch = self.broker.read(topic, partition, position, num_messages - len(messages))
+                self.positions[(topic, partition)] = position + len(batch)
+                messages.extend(batch)
+                if len(messages) >= num_messages:
+                    break
+            remaining = deadline - time.monotonic()
+            if messages or remaining <= 0:
+                return messages
+            self.broker.wait_for_messages(remaining)
+
+    def commit(self, offsets=None, asynchronous=True):
+        """offsets holds TopicPartitions with the offset of the next message to read."""
+        for topic_partition in offsets or []:
+            self.broker.committed[(self.group_id, topic_partition.topic, topic_partition.partition)] = topic_partition.offset
+        return offsets
+
+    def committed(self, partitions, timeout=None):
+        return [TopicPartition(tp.topic, tp.partition, self.broker.committed.get((self.group_id, tp.topic, tp.partition), -1001))
+                for tp in partitions]
+
+    def seek(self, partition):
+        self.positions[(partition.topic, partition.partition)] = partition.offset
+
+    def get_watermark_offsets(self, partition, timeout=None, cached=False):
+        return 0, self.broker.high_watermark(partition.topic, partition.partition)
+
+    def close(self):
+        self.positions = {}
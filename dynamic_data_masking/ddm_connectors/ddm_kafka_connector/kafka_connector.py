@@ -0,0 +1,315 @@
+import inspect
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from confluent_kafka import TopicPartition
+except ImportError:
+    # confluent_kafka is only needed against a real cluster
+    from dynamic_data_masking.ddm_connectors.ddm_kafka_connector.in_memory_broker import TopicPartition
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import DynamicDataMaskingPipelineDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import analyzer_engine_registry
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import LANG_MAP, CONF_LEVEL_MAP, ANALYZER
+
+logger = logging.getLogger(__name__)
+
+class KafkaConnectorMetrics:
+    """Counters and throughput of a connector, updated once per consumed batch."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.batches = 0
+        self.consumed = 0
+        self.processed = 0
+        self.failed = 0
+        self.dead_lettered = 0
+        self.skipped = 0
+        self.processing_seconds = 0.0
+        self.lag = {}
+        self._lock = threading.Lock()
+
+    def record_batch(self, consumed, processed, failed, dead_lettered, seconds, skipped=0):
+        with self._lock:
+            self.batches += 1
+            self.consumed += consumed
+            self.processed += processed
+            self.failed += failed
+            self.dead_lettered += dead_lettered
+            self.skipped += skipped
+            self.processing_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                'batches': self.batches,
+                'consumed': self.consumed,
+                'processed': self.processed,
+                'failed': self.failed,
+                'dead_lettered': self.dead_lettered,
+                'skipped': self.skipped,
+                'messages_per_second': self.processed / elapsed,
+                'busy_messages_per_second': self.processed / self.processing_seconds if self.processing_seconds else 0.0,
+                'lag': sum(self.lag.values()),
+                'lag_by_partition': {f"{topic}[{partition}]": lag for (topic, partition), lag in self.lag.items()},
+            }
+
+
+class KafkaMaskingConnector:
+    """Consumes masking requests from a topic and publishes the masked results.
+
+    A message value is a JSON object, either {"type": "text", "text": ...} for a raw text
+    record or {"type": "document", "input_file_path": ..., "output_file_path": ...} with
+    any other DynamicDataMaskingPipelineDirector.construct option for a document reference.
+    Values that are not JSON are masked as plain text.
+
+    Messages are consumed in batches and processed by at most max_in_flight threads
+    against analyzer engines preloaded in the registry. Text records share result_cache,
+    when given, so repeating values skip the NLP work. Offsets are committed only up to
+    the last message of each partition that was processed and delivered, so delivery is
+    at least once: a failed message is sent to the dead letter topic when there is one,
+    otherwise its partition is rewound to it and retried with the next batch, up to
+    max_attempts times before it is logged and skipped. Messages after it that were
+    already delivered are not masked and published again on retry.
+    """
+
+    DOCUMENT_OPTIONS = set(inspect.signature(DynamicDataMaskingPipelineDirector.construct).parameters)
+
+    def __init__(self, consumer, producer, output_topic, dead_letter_topic=None, batch_size=32, poll_timeout=1.0,
+                 max_in_flight=4, lang='en', conf_level='c4', analyzer_engine='from_config_file', anonimyzer_operator='yes',
+                 document_defaults=None, result_cache=None, max_attempts=3):
+        self.consumer = consumer
+        self.producer = producer
+        self.output_topic = output_topic
+        self.dead_letter_topic = dead_letter_topic
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.max_in_flight = max_in_flight
+        self.text_defaults = {'lang': lang, 'conf_level': conf_level, 'analyzer_engine': analyzer_engine, 'anonimyzer_operator': anonimyzer_operator}
+        self.document_defaults = {'analyzer_engine': analyzer_engine, 'conf_level': conf_level, **(document_defaults or {})}
+        self.result_cache = result_cache
+        self.max_attempts = max_attempts
+
+        self.metrics = KafkaConnectorMetrics()
+        self.committed_offsets = {}
+        # Failed attempts of, and delivered results for, messages past the committed offsets
+        self.attempts = {}
+        self.delivered = set()
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='ddm-kafka')
+
+    @classmethod
+    def from_config(cls, consumer_config, producer_config, input_topics, output_topic, **kwargs):
+        """Builds the connector on confluent_kafka clients, auto commit is turned off since the connector commits itself."""
+        from confluent_kafka import Consumer, Producer
+
+        consumer = Consumer({**consumer_config, 'enable.auto.commit': False})
+        consumer.subscribe(list(input_topics))
+        return cls(consumer, Producer(producer_config), output_topic, **kwargs)
+
+    def preload(self, languages=None, conf_levels=None):
+        """Builds the analyzer engines up front, so the first messages do not pay for model loading."""
+        languages = languages or [self.text_defaults['lang']]
+        conf_levels = conf_levels or [self.text_defaults['conf_level']]
+        analyzer_engine_registry.warm_up(
+            (ANALYZER[self.text_defaults['analyzer_engine']], lang, CONF_LEVEL_MAP[level]) for lang in languages for level in conf_levels
+        )
+        return self
+
+    def run(self, max_batches=None, stop_when_idle=False, report_interval=30.0):
+        """Processes batches until stop() is called, max_batches were consumed or, with stop_when_idle, the topic is drained."""
+        batches = 0
+        last_report = time.monotonic()
+        while not self._stop_event.is_set() and (max_batches is None or batches < max_batches):
+            consumed = self.run_once()
+            batches += 1
+            if time.monotonic() - last_report >= report_interval:
+                logger.info("kafka connector metrics", extra={'metrics': self.metrics.snapshot()})
+                last_report = time.monotonic()
+            if stop_when_idle and not consumed:
+                break
+        return self.metrics.snapshot()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def close(self):
+        self.stop()
+        self._executor.shutdown(wait=True)
+        self.producer.flush()
+        self.consumer.close()
+
+    def run_once(self):
+        """Consumes, processes and publishes one batch, then commits what succeeded. Returns the number of messages consumed."""
+        messages = []
+        for message in self.consumer.consume(num_messages=self.batch_size, timeout=self.poll_timeout):
+            if message.error() is not None:
+                # Partition EOF and transient broker errors, the client recovers from these itself
+                logger.warning("kafka consumer error", extra={'error': str(message.error())})
+                continue
+            messages.append(message)
+        if not messages:
+            self.update_lag()
+            return 0
+
+        started = time.monotonic()
+        outcomes = {}
+        pending = []
+        for message in messages:
+            source = (message.topic(), message.partition(), message.offset())
+            if source in self.delivered:
+                # Read again after a rewind to an earlier failure, its result is already published
+                outcomes[source] = True
+                continue
+            pending.append((message, source, self._executor.submit(self.process_message, message)))
+
+        delivery_errors = {}
+        produced = []
+        processed = failed = dead_lettered = skipped = 0
+        for message, source, future in pending:
+            try:
+                result = future.result()
+            except Exception as error:
+                failed += 1
+                error_text = f"{type(error).__name__}: {error}"
+                if self.dead_letter_topic is None:
+                    self.attempts[source] = self.attempts.get(source, 0) + 1
+                    if self.attempts[source] < self.max_attempts:
+                        outcomes[source] = False
+                        logger.error("failed to mask message, retrying", extra={'source': source, 'attempt': self.attempts[source], 'error': error_text})
+                        continue
+                    # Retrying a message that always fails would stall its partition for good
+                    skipped += 1
+                    outcomes[source] = True
+                    logger.error("failed to mask message, skipping it", extra={'source': source, 'attempts': self.attempts[source], 'error': error_text})
+                    continue
+                dead_lettered += 1
+                topic, value = self.dead_letter_topic, self._dead_letter_value(message, error)
+            else:
+                processed += 1
+                topic, value = self.output_topic, json.dumps(result)
+
+            outcomes[source] = True
+            produced.append(source)
+            self.producer.produce(topic, value=value.encode('utf-8'), key=message.key(),
+                                  on_delivery=self._delivery_callback(source, delivery_errors))
+            self.producer.poll(0)
+
+        # Nothing is committed before the results are acknowledged by the broker
+        self.producer.flush()
+        for source, error in delivery_errors.items():
+            logger.error("failed to publish the result", extra={'source': source, 'error': str(error)})
+            outcomes[source] = False
+        self.delivered.update(source for source in produced if source not in delivery_errors)
+
+        self._commit(messages, outcomes)
+        self.metrics.record_batch(len(messages), processed, failed, dead_lettered, time.monotonic() - started, skipped=skipped)
+        self.update_lag()
+        return len(messages)
+
+    def process_message(self, message):
+        """Masks a single message and returns the result record."""
+        request = self._parse_value(message.value())
+        request_id = request.pop('id', None)
+        request_type = request.pop('type', 'text')
+
+        if request_type == 'text':
+            options = {**self.text_defaults, **request.pop('options', {})}
+            if options['lang'] not in LANG_MAP:
+                raise ValueError(f"Unsupported language: {options['lang']}")
+            pipeline = DynamicDataMaskingPipelineDirector.construct_text(**options, result_cache=self.result_cache)
+            data = pipeline.execute_pipeline({'text': request['text']})
+            return {
+                'id': request_id,
+                'type': 'text',
+                'masked_text': data['masked_text'],
+                'entities': [{'entity_type': result.entity_type, 'start': result.start, 'end': result.end, 'score': result.score}
+                             for result in data['analysis_results']],
+            }
+
+        if request_type == 'document':
+            options = {**self.document_defaults, **request}
+            unknown = set(options) - self.DOCUMENT_OPTIONS
+            if unknown:
+                raise ValueError(f"Unknown options: {', '.join(sorted(unknown))}")
+            pipeline = DynamicDataMaskingPipelineDirector.construct(**options)
+            data = pipeline.execute_pipeline()
+            return {
+                'id': request_id,
+                'type': 'document',
+                'input_file_path': options['input_file_path'],
+                'output_file_path': options['output_file_path'],
+                'pages': len(data['page_stats']),
+                'entities': len(data['analysis_results']),
+            }
+
+        raise ValueError(f"Unknown request type: {request_type}")
+
+    def update_lag(self):
+        """Lag is the distance between each partition's high watermark and the group's committed offset."""
+        for partition in self.consumer.assignment():
+            low, high = self.consumer.get_watermark_offsets(TopicPartition(partition.topic, partition.partition), timeout=self.poll_timeout, cached=False)
+            committed = self.committed_offsets.get((partition.topic, partition.partition))
+            if committed is None:
+                committed = self.consumer.committed([TopicPartition(partition.topic, partition.partition)])[0].offset
+            self.metrics.lag[(partition.topic, partition.partition)] = max(0, high - max(committed, low))
+
+    def _commit(self, messages, outcomes):
+        """Commits the contiguous run of handled messages of every partition and rewinds to the first failure."""
+        by_partition = {}
+        for message in messages:
+            by_partition.setdefault((message.topic(), message.partition()), []).append(message.offset())
+
+        commits = []
+        for (topic, partition), offsets in by_partition.items():
+            next_offset = None
+            for offset in sorted(offsets):
+                if not outcomes[(topic, partition, offset)]:
+                    self.consumer.seek(TopicPartition(topic, partition, offset))
+                    break
+                next_offset = offset + 1
+            if next_offset is not None:
+                commits.append(TopicPartition(topic, partition, next_offset))
+                self.committed_offsets[(topic, partition)] = next_offset
+                self._forget(topic, partition, next_offset)
+
+        if commits:
+            self.consumer.commit(offsets=commits, asynchronous=False)
+
+    def _forget(self, topic, partition, committed_offset):
+        # Messages before a committed offset are never read again
+        for source in [source for source in self.attempts if source[:2] == (topic, partition) and source[2] < committed_offset]:
+            del self.attempts[source]
+        self.delivered = {source for source in self.delivered if source[:2] != (topic, partition) or source[2] >= committed_offset}
+
+    @staticmethod
+    def _parse_value(value):
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        try:
+            request = json.loads(value)
+        except ValueError:
+            return {'type': 'text', 'text': value}
+        return request if isinstance(request, dict) else {'type': 'text', 'text': value}
+
+    @staticmethod
+    def _dead_letter_value(message, error):
+        value = message.value()
+        return json.dumps({
+            'topic': message.topic(),
+            'partition': message.partition(),
+            'offset': message.offset(),
+            'error': f"{type(error).__name__}: {error}",
+            'value': value.decode('utf-8', errors='replace') if isinstance(value, bytes) else value,
+        })
+
+    @staticmethod
+    def _delivery_callback(source, delivery_errors):
+        def on_delivery(error, message):
+            if error is not None:
+                delivery_errors[source] = error
+        return on_delivery
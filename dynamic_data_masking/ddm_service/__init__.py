@@ -0,0 +1,4 @@
+from dynamic_data_masking.ddm_service.masking_service import MaskingService, MaskingJob
+from dynamic_data_masking.ddm_service.server import MaskingHTTPServer
+
+__all__ = ["MaskingService", "MaskingJob", "MaskingHTTPServer"]
\ No newline at end of file
@@ -0,0 +1,136 @@
+import inspect
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import DynamicDataMaskingPipelineDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import analyzer_engine_registry
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import LANG_MAP, CONF_LEVEL_MAP, ANALYZER
+
+class MaskingJob:
+    """A single file masking request and its lifecycle."""
+
+    def __init__(self, options):
+        self.job_id = uuid.uuid4().hex
+        self.options = options
+        self.status = 'queued'
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'error': self.error,
+            'input_file_path': self.options['input_file_path'],
+            'output_file_path': self.options['output_file_path'],
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class MaskingService:
+    """Keeps analyzer engines warm and runs masking jobs from a bounded queue with a fixed number of workers."""
+
+    def __init__(self, languages=('en',), conf_levels=('c4',), analyzer_engine='from_config_file',
+                 max_queue_size=100, concurrency=2, max_finished_jobs=1000, default_options=None):
+        self.languages = list(languages)
+        self.conf_levels = list(conf_levels)
+        self.analyzer_engine = analyzer_engine
+        self.concurrency = concurrency
+        self.max_finished_jobs = max_finished_jobs
+        self.default_options = default_options or {}
+
+        self.job_queue = queue.Queue(maxsize=max_queue_size)
+        self.jobs = OrderedDict()
+        self.jobs_lock = threading.Lock()
+        self.workers = []
+        self.running = 0
+        self.stopping = threading.Event()
+
+    def preload(self):
+        """Builds the analyzer engines for every configured language and confidence level."""
+        configurations = itertools.product([ANALYZER[self.analyzer_engine]], self.languages, [CONF_LEVEL_MAP[level] for level in self.conf_levels])
+        analyzer_engine_registry.warm_up(configurations)
+        return self
+
+    def start(self):
+        self.preload()
+        self.stopping.clear()
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._worker_loop, name=f"ddm-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        return self
+
+    def stop(self):
+        """Lets the workers finish the job they are running and exit, without waiting for the queue to drain."""
+        self.stopping.set()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
+    def submit(self, options):
+        """Queues a masking job, raises queue.Full when the service is at capacity."""
+        unknown = set(options) - set(inspect.signature(DynamicDataMaskingPipelineDirector.construct).parameters)
+        if unknown:
+            raise ValueError(f"Unknown options: {', '.join(sorted(unknown))}")
+        for key in ('input_file_path', 'output_file_path'):
+            if not options.get(key):
+                raise ValueError(f"Missing required option: {key}")
+        if options.get('lang', 'en') not in LANG_MAP:
+            raise ValueError(f"Unsupported language: {options['lang']}")
+
+        job = MaskingJob({**self.default_options, 'analyzer_engine': self.analyzer_engine, **options})
+        with self.jobs_lock:
+            self.job_queue.put_nowait(job)
+            self.jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id):
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def status(self):
+        with self.jobs_lock:
+            running = self.running
+        return {'queued': self.job_queue.qsize(), 'running': running, 'concurrency': self.concurrency}
+
+    def _worker_loop(self):
+        # Polls instead of waiting for a sentinel, which stop() could not queue while the queue is full
+        while not self.stopping.is_set():
+            try:
+                job = self.job_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._run_job(job)
+
+    def _run_job(self, job):
+        with self.jobs_lock:
+            self.running += 1
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            pipeline = DynamicDataMaskingPipelineDirector.construct(**job.options)
+            pipeline.execute_pipeline()
+            job.status = 'done'
+        except Exception as error:
+            job.status = 'failed'
+            job.error = f"{type(error).__name__}: {error}"
+        finally:
+            job.finished_at = time.time()
+            with self.jobs_lock:
+                self.running -= 1
+                self._forget_finished_jobs()
+
+    def _forget_finished_jobs(self):
+        """Keeps only the most recent finished jobs around for status queries."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job_id]
@@ -0,0 +1,95 @@
+import argparse
+import json
+import logging
+import queue
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dynamic_data_masking.ddm_service.masking_service import MaskingService
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import configure_logging
+
+logger = logging.getLogger(__name__)
+
+class MaskingRequestHandler(BaseHTTPRequestHandler):
+    """JSON API: POST /jobs, GET /jobs/<job_id>, GET /health."""
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == '/health':
+            return self._send_json(200, {'status': 'ok', **service.status()})
+
+        if self.path.startswith('/jobs/'):
+            job = service.get_job(self.path[len('/jobs/'):])
+            if job is None:
+                return self._send_json(404, {'error': 'job not found'})
+            return self._send_json(200, job.to_dict())
+
+        self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            return self._send_json(404, {'error': 'not found'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            options = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(options, dict):
+                return self._send_json(400, {'error': 'the job options must be a JSON object'})
+            job = self.server.service.submit(options)
+        except (ValueError, TypeError) as error:
+            return self._send_json(400, {'error': str(error)})
+        except queue.Full:
+            return self._send_json(503, {'error': 'job queue is full, retry later'})
+
+        self._send_json(202, job.to_dict())
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MaskingHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, service):
+        super().__init__(server_address, MaskingRequestHandler)
+        self.service = service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running dynamic data masking service with preloaded models")
+    parser.add_argument("--host", type=str, default='127.0.0.1', help='interface to listen on, keep it local unless the API is protected')
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--lang", nargs='+', default=['en'], choices=['en','fr','nl'], help='languages whose models are preloaded')
+    parser.add_argument("--conf_level", nargs='+', default=['c4'], choices=['c3','c4'], help='confidence levels whose analyzers are preloaded')
+    parser.add_argument("--analyzer_engine", type=str, default='from_config_file', choices=['from_config_file', 'from_code'])
+    parser.add_argument("--max-queue", type=int, default=100, help='jobs accepted before the API answers 503')
+    parser.add_argument("--concurrency", type=int, default=2, help='number of jobs processed at the same time')
+    parser.add_argument("--log-format", type=str, default='text', choices=['text', 'json'])
+    args = parser.parse_args()
+    configure_logging(json_format=args.log_format == 'json')
+
+    service = MaskingService(
+        languages=args.lang,
+        conf_levels=args.conf_level,
+        analyzer_engine=args.analyzer_engine,
+        max_queue_size=args.max_queue,
+        concurrency=args.concurrency
+        )
+    service.start()
+
+    server = MaskingHTTPServer((args.host, args.port), service)
+    logger.info("ddm service listening", extra={'host': args.host, 'port': args.port})
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
 from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_registry import AnalyzerEngineRegistry, analyzer_engine_registry
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.tiered_analysis import TieredAnalyzerEngine, TierPolicy, TierStatistics, tier_statistics
 
-__all__ = ['DynamicDataMaskingAnalyzer']
\ No newline at end of file
+__all__ = ['DynamicDataMaskingAnalyzer', 'AnalyzerEngineRegistry', 'analyzer_engine_registry', 'TieredAnalyzerEngine', 'TierPolicy', 'TierStatistics', 'tier_statistics']
\ No newline at end of file
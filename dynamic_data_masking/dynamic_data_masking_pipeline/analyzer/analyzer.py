@@ -1,23 +1,216 @@
-from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder import PresidioAnalyzerBuilder, PresidioAnalyzerEngineProviderBuilder
-from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_director import PresidioAnalyzerDirector
+import hashlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import yaml
+from presidio_analyzer import RecognizerResult
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_registry import AnalyzerEngineRegistry, analyzer_engine_registry
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder import DenyListAutomaton
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.text_chunker import TextChunker
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.tiered_analysis import TieredAnalyzerEngine, TierPolicy
+from dynamic_data_masking.dynamic_data_masking_pipeline.result_cache import MaskingResultCache
 
 class DynamicDataMaskingAnalyzer:
     
-    def __init__(self, from_config_file, language, use_predefined):
+    def __init__(self, from_config_file, language, use_predefined, use_engine_registry=True, result_cache=None, tiered=False, tier_policy=None):
         self.from_config_file = from_config_file
         self.language = language
         self.use_predefined = use_predefined
-        
-        if self.from_config_file:
-            print('opted for yaml analyzer config')
-            self.builder = PresidioAnalyzerEngineProviderBuilder()
-        else: 
-            print('opted for code analyzer config')
-            self.builder = PresidioAnalyzerBuilder(language=self.language)
+        self.use_engine_registry = use_engine_registry
+        self.result_cache = result_cache
+        # Tiered analysis screens the text with the small model and only runs the large one where the policy says so
+        self.tier_policy = (tier_policy or TierPolicy()) if tiered else None
+        self.fingerprint = self.engine_fingerprint() if result_cache is not None else None
 
-        self.director = PresidioAnalyzerDirector(self.builder)
+        if tiered:
+            self.analyzer = TieredAnalyzerEngine(
+                screen_engine=self.get_engine(use_engine_registry, tier='screen'),
+                full_engine=self.get_engine(use_engine_registry, tier='full'),
+                policy=self.tier_policy
+                )
+        else:
+            self.analyzer = self.get_engine(use_engine_registry)
 
-        self.analyzer = self.director.construct(from_config_file=self.from_config_file,language=self.language, use_predefined=self.use_predefined)
+    def get_engine(self, use_engine_registry=True, tier='full'):
+        if use_engine_registry:
+            return analyzer_engine_registry.get_engine(from_config_file=self.from_config_file, language=self.language, use_predefined=self.use_predefined, tier=tier)
+        return AnalyzerEngineRegistry.build_engine(from_config_file=self.from_config_file, language=self.language, use_predefined=self.use_predefined, tier=tier)
+
+    def engine_fingerprint(self):
+        """Identifies the engine configuration in result cache keys, including the contents of its config file and deny list term files."""
+        key = AnalyzerEngineRegistry.make_key(self.from_config_file, self.language, self.use_predefined)
+        if self.tier_policy is not None:
+            key = key + self.tier_policy.settings()
+        config_file = key[1]
+        if not config_file or not Path(config_file).exists():
+            return MaskingResultCache.fingerprint(key, None)
+        config_bytes = Path(config_file).read_bytes()
+        term_files_digest = DenyListAutomaton.term_files_digest(yaml.safe_load(config_bytes) or {}, Path(config_file).parent)
+        return MaskingResultCache.fingerprint(key, hashlib.sha256(config_bytes).hexdigest(), term_files_digest)
 
     def analyze_text(self, text):
-        return self.analyzer.analyze(text=text, language=self.language)
+        if self.result_cache is None or not self.result_cache.cacheable(text):
+            return self.analyzer.analyze(text=text, language=self.language)
+
+        leading, stripped = MaskingResultCache.normalize(text)
+        key = self.result_cache.make_key('analyzer', self.fingerprint, self.language, stripped)
+        cached = self.result_cache.get(key)
+        if cached is None:
+            cached = self._store_results(key, self.analyzer.analyze(text=stripped, language=self.language))
+        return self._load_results(cached, len(leading))
+
+    def analyze_batch(self, texts, batch_size=32, n_process=1):
+        """Lazily yields the results of each text, running the NLP model over the texts in batches.
+
+        With a result cache only the texts without a cached result go through the model,
+        each distinct value once per batch.
+        """
+        if self.result_cache is None:
+            yield from self._analyze_batch(texts, batch_size=batch_size, n_process=n_process)
+            return
+
+        texts = iter(texts)
+        while True:
+            batch = list(islice(texts, batch_size * max(1, n_process)))
+            if not batch:
+                return
+
+            lookups = []
+            missing = {}
+            for text in batch:
+                text = str(text)
+                if not self.result_cache.cacheable(text):
+                    lookups.append((None, 0, None))
+                    missing.setdefault(('text', text), text)
+                    continue
+                leading, stripped = MaskingResultCache.normalize(text)
+                key = self.result_cache.make_key('analyzer', self.fingerprint, self.language, stripped)
+                cached = None if ('key', key) in missing else self.result_cache.get(key)
+                lookups.append((key, len(leading), cached))
+                if cached is None:
+                    missing.setdefault(('key', key), stripped)
+
+            computed = {}
+            for (kind, identifier), results in zip(missing, self._analyze_batch(list(missing.values()), batch_size=batch_size, n_process=n_process)):
+                computed[(kind, identifier)] = self._store_results(identifier, results) if kind == 'key' else results
+
+            for text, (key, offset, cached) in zip(batch, lookups):
+                if key is None:
+                    yield computed[('text', str(text))]
+                else:
+                    yield self._load_results(cached if cached is not None else computed[('key', key)], offset)
+
+    def _store_results(self, key, results):
+        entries = [[result.entity_type, result.start, result.end, result.score, result.recognition_metadata] for result in results]
+        self.result_cache.put(key, entries)
+        return entries
+
+    @staticmethod
+    def _load_results(entries, offset):
+        # Fresh objects on every call, callers shift the offsets in place
+        return [RecognizerResult(entity_type, start + offset, end + offset, score, recognition_metadata=metadata)
+                for entity_type, start, end, score, metadata in entries]
+
+    def _analyze_batch(self, texts, batch_size=32, n_process=1):
+        if n_process > 1:
+            yield from self._analyze_batch_parallel(texts, batch_size=batch_size, n_process=n_process)
+            return
+
+        for text, nlp_artifacts in self.analyzer.nlp_engine.process_batch(texts=texts, language=self.language, batch_size=batch_size):
+            yield self.analyzer.analyze(text=text, language=self.language, nlp_artifacts=nlp_artifacts)
+
+    def _analyze_batch_parallel(self, texts, batch_size, n_process):
+        """Spreads batches of texts over a process pool, each worker analyzes them with the engine of its own registry."""
+        options = dict(from_config_file=self.from_config_file, language=self.language, use_predefined=self.use_predefined,
+                       use_engine_registry=self.use_engine_registry, tiered=self.tier_policy is not None, tier_policy=self.tier_policy)
+        texts = (str(text) for text in texts)
+        batches = iter(lambda: list(islice(texts, batch_size)), [])
+
+        with ProcessPoolExecutor(max_workers=n_process) as executor:
+            # Two batches per worker in flight at most, results are taken in submission order
+            pending = deque(executor.submit(_analyze_texts, options, batch, batch_size) for batch in islice(batches, n_process * 2))
+            while pending:
+                batch_results = pending.popleft().result()
+                next_batch = next(batches, None)
+                if next_batch is not None:
+                    pending.append(executor.submit(_analyze_texts, options, next_batch, batch_size))
+                yield from batch_results
+
+    def analyze_text_by_page(self, text, batch_size=32, n_process=1):
+        """Analyzes every page (split on form feeds) as one batch item and returns results with offsets into the full text."""
+        pages = text.split("\f")
+        page_offsets = []
+        offset = 0
+        for page in pages:
+            page_offsets.append(offset)
+            offset += len(page) + 1
+
+        results = []
+        for page_offset, page_results in zip(page_offsets, self.analyze_batch(pages, batch_size=batch_size, n_process=n_process)):
+            for result in page_results:
+                result.start += page_offset
+                result.end += page_offset
+            results.extend(page_results)
+        return results
+
+    def analyze_text_chunked(self, text, max_chunk_size=100000, overlap=500):
+        """Analyzes large texts chunk by chunk and returns all results with offsets into the full text."""
+        results = []
+        for chunk_results in self.iter_analyze_chunks(text, max_chunk_size=max_chunk_size, overlap=overlap):
+            results.extend(chunk_results)
+        return results
+
+    def iter_analyze_chunks(self, text, max_chunk_size=100000, overlap=500):
+        """Yields the results of each chunk once they are final, re-based to global offsets.
+
+        Results starting past the beginning of the next chunk are left to that chunk. A result
+        reaching into the next chunk may be cut off at the chunk end, so it is held back and
+        merged with the overlapping results of the same type the next chunk finds: the entity
+        is reported once, with the span covering both.
+        """
+        chunker = TextChunker(max_chunk_size=max_chunk_size, overlap=overlap)
+        chunks = chunker.iter_chunks(text)
+        current = next(chunks, None)
+        carried_over = []
+
+        while current is not None:
+            offset, chunk = current
+            following = next(chunks, None)
+            next_offset = following[0] if following is not None else len(text)
+
+            chunk_results = []
+            for result in self.analyzer.analyze(text=chunk, language=self.language):
+                result.start += offset
+                result.end += offset
+                if following is not None and result.start >= next_offset:
+                    continue
+                chunk_results.append(result)
+
+            for previous in carried_over:
+                duplicates = [result for result in chunk_results if self._is_duplicate(result, previous)]
+                for duplicate in duplicates:
+                    previous.start = min(previous.start, duplicate.start)
+                    previous.end = max(previous.end, duplicate.end)
+                    previous.score = max(previous.score, duplicate.score)
+                chunk_results = [result for result in chunk_results if not any(result is duplicate for duplicate in duplicates)]
+                chunk_results.append(previous)
+
+            # Only results reaching into the next chunk can collide with what it finds
+            carried_over = [result for result in chunk_results if following is not None and result.end > next_offset]
+            final = [result for result in chunk_results if not any(result is carried for carried in carried_over)]
+            yield sorted(final, key=lambda result: (result.start, result.end))
+            current = following
+
+    @staticmethod
+    def _is_duplicate(result, previous):
+        return (result.entity_type == previous.entity_type
+                and result.start < previous.end and previous.start < result.end)
+
+
+def _analyze_texts(options, texts, batch_size):
+    """Process pool entry point: analyzes texts in one process, on an analyzer built from options."""
+    analyzer = DynamicDataMaskingAnalyzer(**options)
+    return list(analyzer._analyze_batch(texts, batch_size=batch_size))
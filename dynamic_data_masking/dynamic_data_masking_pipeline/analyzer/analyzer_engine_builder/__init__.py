@@ -1,8 +1,9 @@
 from .analyzer_engine_builder import PresidioAnalyzerBuilder,PresidioAnalyzerEngineProviderBuilder
 
 from .recognizer_registry import RegistryRecognizerBuilder
+from .deny_list_recognizer import DenyListAutomaton, DenyListRecognizer
 
-from .nlp_configuration import NLP_CONFIGURATIONS
+from .nlp_configuration import NLP_CONFIGURATIONS, NLP_SCREENING_CONFIGURATIONS
 from .recognizers import RECOGNIZERS   
 
-__all__ = ['PresidioAnalyzerBuilder', 'RegistryRecognizerBuilder','PresidioAnalyzerEngineProviderBuilder', 'NLP_CONFIGURATIONS', 'RECOGNIZERS']
\ No newline at end of file
+__all__ = ['PresidioAnalyzerBuilder', 'RegistryRecognizerBuilder','PresidioAnalyzerEngineProviderBuilder', 'NLP_CONFIGURATIONS', 'NLP_SCREENING_CONFIGURATIONS', 'RECOGNIZERS', 'DenyListAutomaton', 'DenyListRecognizer']
\ No newline at end of file
@@ -1,9 +1,12 @@
 # analyzer_engine_builder.py
 from abc import ABC
+from pathlib import Path
 
 from presidio_analyzer import AnalyzerEngine, AnalyzerEngineProvider
 from presidio_analyzer.nlp_engine import NlpEngineProvider
 
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.deny_list_recognizer import DenyListAutomaton, replace_deny_list_recognizers
+
 class PresidioAnalyzer(ABC):
 
     def build_analyzer(self):
@@ -13,20 +16,41 @@ class PresidioAnalyzerEngineProviderBuilder(PresidioAnalyzer):
 
     def __init__(self):
         self.presidio_config_file = None
+        self.model_overrides = {}
 
     def set_config_file(self, path):
         self.presidio_config_file = path
         return self
 
+    def set_model_overrides(self, models):
+        """Replaces the spaCy model the config file names for some languages, {lang_code: model_name}."""
+        self.model_overrides = dict(models)
+        return self
+
     def build_analyzer(self):
         if not self.presidio_config_file:
             raise ValueError('NLP Engine not configured. Call set_config_file() first.')
         provider = AnalyzerEngineProvider(
             analyzer_engine_conf_file=self.presidio_config_file
         )
+        if self.model_overrides:
+            self._override_models(provider.configuration)
         analyzer = provider.create_engine()
+        # The deny lists of the config, and the term files listed under deny_list_files, are matched by one shared automaton
+        term_files = DenyListAutomaton.term_file_entries(provider.configuration, Path(self.presidio_config_file).parent)
+        replace_deny_list_recognizers(analyzer.registry, analyzer.supported_languages, term_files=term_files)
         return analyzer
 
+    def _override_models(self, configuration):
+        # Without an nlp_configuration in the file only the overriding models are loaded
+        nlp_configuration = configuration.get('nlp_configuration') or {'nlp_engine_name': 'spacy'}
+        models = {model['lang_code']: model['model_name'] for model in nlp_configuration.get('models', [])}
+        models.update(self.model_overrides)
+        configuration['nlp_configuration'] = {
+            **nlp_configuration,
+            'models': [{'lang_code': language, 'model_name': model_name} for language, model_name in models.items()]
+        }
+
 class PresidioAnalyzerBuilder(PresidioAnalyzer):
     def __init__(self, language):
         self.language = language
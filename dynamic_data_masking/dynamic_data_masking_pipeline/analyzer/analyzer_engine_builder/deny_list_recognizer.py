@@ -0,0 +1,235 @@
+import hashlib
+import logging
+import re
+from array import array
+from pathlib import Path
+
+from presidio_analyzer import EntityRecognizer, PatternRecognizer, RecognizerResult, AnalysisExplanation
+
+logger = logging.getLogger(__name__)
+
+# Whitespace that normalization would change: runs, and any whitespace but a plain space
+UNNORMALIZED_WHITESPACE = re.compile(r'\s\s|[^\S ]')
+
+def normalize(text):
+    """Casefolds text and collapses whitespace runs to one space.
+
+    Returns the normalized text and, for each of its characters, the index of the original
+    character it comes from, followed by len(text).
+    """
+    folded = text.casefold()
+    if len(folded) == len(text) and not UNNORMALIZED_WHITESPACE.search(text):
+        # Offsets are unchanged, the common case
+        return folded, range(len(text) + 1)
+
+    characters = []
+    origins = array('q')
+    previous_space = False
+    for index, character in enumerate(text):
+        if character.isspace():
+            if not previous_space:
+                characters.append(' ')
+                origins.append(index)
+            previous_space = True
+            continue
+        previous_space = False
+        folded = character.casefold()
+        characters.append(folded)
+        # A few characters fold to several (ß -> ss), all of them point back to it
+        origins.extend([index] * len(folded))
+    origins.append(len(text))
+    return ''.join(characters), origins
+
+
+def _is_word_character(character):
+    return character.isalnum() or character == '_'
+
+
+class DenyListAutomaton:
+    """Aho-Corasick automaton over the deny list terms of every entity and language.
+
+    Matching is case insensitive and treats any whitespace run as a single space. A scan
+    costs one pass over the text, whatever the number of terms. Like Presidio's deny list
+    regex, a term only matches between non-word characters.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        # Terms ending in each state, and the ones ending in its failure states too once built
+        self.state_terms = [[]]
+        self.outputs = [[]]
+        self.term_lengths = []
+        self.term_payloads = []
+        self.term_ids = {}
+        self.built = True
+
+    def __len__(self):
+        return len(self.term_lengths)
+
+    def add_term(self, term, entity, language=None, score=1.0):
+        """Adds a term for entity, language None matches it in every language."""
+        normalized = normalize(term.strip())[0]
+        if not normalized:
+            return self
+        term_id = self.term_ids.get(normalized)
+        if term_id is None:
+            state = 0
+            for character in normalized:
+                next_state = self.goto[state].get(character)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][character] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.state_terms.append([])
+                state = next_state
+            term_id = len(self.term_lengths)
+            self.term_ids[normalized] = term_id
+            self.term_lengths.append(len(normalized))
+            self.term_payloads.append({})
+            self.state_terms[state].append(term_id)
+            self.built = False
+        payloads = self.term_payloads[term_id]
+        payloads[(entity, language)] = max(score, payloads.get((entity, language), score))
+        return self
+
+    def add_terms(self, terms, entity, language=None, score=1.0):
+        for term in terms:
+            self.add_term(term, entity, language, score)
+        return self
+
+    def add_term_file(self, path, entity, language=None, score=1.0):
+        """Adds one term per line of a UTF-8 file, blank lines and lines starting with # are skipped."""
+        count = len(self)
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    self.add_term(line, entity, language, score)
+        logger.info("loaded deny list terms", extra={'path': str(path), 'entity': entity, 'language': language, 'new_terms': len(self) - count})
+        return self
+
+    def build(self):
+        """Computes the failure links breadth first, merging the outputs of each state's failure state into its own."""
+        goto, fail = self.goto, self.fail
+        outputs = list(self.state_terms)
+        queue = list(goto[0].values())
+        for state in queue:
+            fail[state] = 0
+        for state in queue:
+            for character, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and character not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(character, 0)
+                if outputs[fail[next_state]]:
+                    outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+        self.outputs = outputs
+        self.built = True
+        return self
+
+    def entities(self, language=None):
+        """Entities with at least one term in language (terms without a language count for every language)."""
+        return sorted({entity for payloads in self.term_payloads for entity, term_language in payloads
+                       if language is None or term_language in (None, language)})
+
+    def find(self, text, language=None, entities=None):
+        """Returns (start, end, entity, score) of every term occurrence in text, offsets are in the original text."""
+        if not self.built:
+            self.build()
+        normalized, origins = normalize(text)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        matches = []
+        state = 0
+        for position, character in enumerate(normalized):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            if end < len(normalized) and _is_word_character(normalized[end]):
+                continue
+            for term_id in outputs[state]:
+                start = end - self.term_lengths[term_id]
+                if start > 0 and _is_word_character(normalized[start - 1]):
+                    continue
+                for (entity, term_language), score in self.term_payloads[term_id].items():
+                    if (term_language is None or language is None or term_language == language) and (entities is None or entity in entities):
+                        matches.append((origins[start], origins[end - 1] + 1, entity, score))
+        return matches
+
+    @staticmethod
+    def term_file_entries(configuration, base_dir):
+        """The deny_list_files entries of an analyzer YAML configuration, with their paths resolved against base_dir.
+
+        Each entry names a path, a supported_entity, and optionally a supported_language and a score.
+        """
+        entries = []
+        for entry in configuration.get('deny_list_files') or []:
+            path = Path(entry['path'])
+            entries.append({**entry, 'path': path if path.is_absolute() else Path(base_dir) / path})
+        return entries
+
+    @classmethod
+    def term_files_digest(cls, configuration, base_dir):
+        """Digest of the term files a configuration refers to, so cached results change with them."""
+        digest = hashlib.sha256()
+        for entry in cls.term_file_entries(configuration, base_dir):
+            digest.update(str(entry['path']).encode())
+            if entry['path'].exists():
+                digest.update(entry['path'].read_bytes())
+        return digest.hexdigest()
+
+
+class DenyListRecognizer(EntityRecognizer):
+    """Presidio recognizer over a shared DenyListAutomaton, one instance per language."""
+
+    def __init__(self, automaton, supported_language='en', name='DenyListRecognizer'):
+        self.automaton = automaton
+        super().__init__(supported_entities=automaton.entities(supported_language), name=name, supported_language=supported_language)
+
+    def load(self):
+        pass
+
+    def analyze(self, text, entities, nlp_artifacts=None):
+        requested = set(entities) & set(self.supported_entities) if entities else set(self.supported_entities)
+        results = []
+        for start, end, entity, score in self.automaton.find(text, language=self.supported_language, entities=requested):
+            explanation = AnalysisExplanation(recognizer=self.name, original_score=score, textual_explanation=f"Deny list term of {entity}")
+            results.append(RecognizerResult(entity, start, end, score, analysis_explanation=explanation,
+                                            recognition_metadata={RecognizerResult.RECOGNIZER_NAME_KEY: self.name,
+                                                                  RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: self.id}))
+        return results
+
+
+def replace_deny_list_recognizers(registry, supported_languages, automaton=None, term_files=()):
+    """Moves the deny lists of the registry's PatternRecognizers into one automaton shared by all languages.
+
+    Recognizers that only held a deny list are removed, the others keep their regex patterns.
+    term_files are term_file_entries to load on top. Adds a DenyListRecognizer per language
+    and returns the automaton.
+    """
+    automaton = automaton or DenyListAutomaton()
+    kept = []
+    for recognizer in registry.recognizers:
+        if isinstance(recognizer, PatternRecognizer) and recognizer.deny_list:
+            automaton.add_terms(recognizer.deny_list, recognizer.supported_entities[0], recognizer.supported_language, recognizer.deny_list_score)
+            recognizer.patterns = [pattern for pattern in recognizer.patterns if pattern.name != 'deny_list']
+            recognizer.deny_list = []
+            if not recognizer.patterns:
+                continue
+        kept.append(recognizer)
+    registry.recognizers = kept
+
+    for entry in term_files:
+        automaton.add_term_file(entry['path'], entry['supported_entity'], entry.get('supported_language'), entry.get('score', 1.0))
+
+    automaton.build()
+    for language in supported_languages:
+        if automaton.entities(language):
+            registry.add_recognizer(DenyListRecognizer(automaton, supported_language=language))
+    logger.info("deny list automaton built", extra={'terms': len(automaton), 'states': len(automaton.goto)})
+    return automaton
@@ -13,3 +13,20 @@ NLP_CONFIGURATIONS = {
         "models": [{"lang_code": "nl", "model_name": "nl_core_news_lg"}],
     },
 }
+
+
+# Small models of the screening tier of tiered analysis, the models above only see the texts they flag
+NLP_SCREENING_CONFIGURATIONS = {
+    "en": {
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": "en", "model_name": "en_core_web_sm"}],
+    },
+    "fr": {
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": "fr", "model_name": "fr_core_news_sm"}],
+    },
+    "nl": {
+        "nlp_engine_name": "spacy",
+        "models": [{"lang_code": "nl", "model_name": "nl_core_news_sm"}],
+    },
+}
\ No newline at end of file
@@ -1,18 +1,26 @@
 from presidio_analyzer import Pattern, PatternRecognizer, RecognizerRegistry
 
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.deny_list_recognizer import DenyListAutomaton, DenyListRecognizer
+
 class RegistryRecognizerBuilder:
-    def __init__(self, language, use_predefined=False):
+    def __init__(self, language, use_predefined=False, deny_list_automaton=None):
         self.language = language
         self.use_predefined = use_predefined
         self.recognizer_registry = RecognizerRegistry(supported_languages=[language])
         self.pattern_recognizers = []
+        # All deny lists go into one automaton and are matched in a single pass over the text
+        self.deny_list_automaton = deny_list_automaton or DenyListAutomaton()
 
     def add_deny_list_patterns(self, deny_list_dict):
         for entity, deny_list in deny_list_dict.items():
-            pattern_recognizer = PatternRecognizer(
-                supported_entity=entity, deny_list=deny_list, supported_language=self.language
-            )
-            self.pattern_recognizers.append(pattern_recognizer)
+            self.deny_list_automaton.add_terms(deny_list, entity, language=self.language)
+        return self
+
+    def add_deny_list_files(self, deny_list_files_dict):
+        """Adds deny lists kept in term files, one term per line, given as {entity: [paths]}."""
+        for entity, paths in deny_list_files_dict.items():
+            for path in paths:
+                self.deny_list_automaton.add_term_file(path, entity, language=self.language)
         return self
 
     def add_regex_patterns(self, regex_dict):
@@ -33,4 +41,8 @@ class RegistryRecognizerBuilder:
 
         for recognizer in self.pattern_recognizers:
             self.recognizer_registry.add_recognizer(recognizer)
+
+        if self.deny_list_automaton.entities(self.language):
+            self.deny_list_automaton.build()
+            self.recognizer_registry.add_recognizer(DenyListRecognizer(self.deny_list_automaton, supported_language=self.language))
         return self.recognizer_registry
\ No newline at end of file
@@ -1,38 +1,71 @@
+import logging
+from pathlib import Path
+
+import spacy
+
 from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.recognizer_registry import RegistryRecognizerBuilder
-from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.nlp_configuration import NLP_CONFIGURATIONS
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.nlp_configuration import NLP_CONFIGURATIONS, NLP_SCREENING_CONFIGURATIONS
 from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.recognizers import RECOGNIZERS
 
 from dynamic_data_masking.ddm_config.config_reader import config
 
+logger = logging.getLogger(__name__)
+
+ANALYZER_CONFIG_DIR = Path(__file__).resolve().parents[2] / 'ddm_config' / 'analyzer_config'
 
 class PresidioAnalyzerDirector:
     def __init__(self, builder):
         self.builder = builder
 
-    def construct(self, from_config_file, language, use_predefined):
+    @staticmethod
+    def get_config_file(use_predefined):
+        if use_predefined:
+            return str(ANALYZER_CONFIG_DIR / 'all-config-C3.yaml')
+        return str(ANALYZER_CONFIG_DIR / 'all-config-C4.yaml')
+
+    @staticmethod
+    def get_screening_models(language):
+        """{lang_code: model_name} of the installed screening models, languages whose small model is missing keep the full one."""
+        models = {}
+        for model in NLP_SCREENING_CONFIGURATIONS[language]['models']:
+            if spacy.util.is_package(model['model_name']):
+                models[model['lang_code']] = model['model_name']
+            else:
+                logger.warning("screening model not installed, screening with the full model", extra={'language': model['lang_code'], 'model': model['model_name']})
+        return models
+
+    def construct(self, from_config_file, language, use_predefined, tier='full'):
+        """Builds the analyzer, tier 'screen' swaps the language's NLP model for the small screening model of tiered analysis."""
+        if tier not in ('full', 'screen'):
+            raise ValueError(f"Unsupported analyzer tier: {tier}")
+
         if from_config_file:
             if use_predefined:
-                print('form config file using C3')
-                config_file = r'dynamic_data_masking\ddm_config\analyzer_config\all-config-C3.yaml'
+                logger.info("form config file using C3")
             else:
-                print('form config file using oly  C4')
-                config_file = r'dynamic_data_masking\ddm_config\analyzer_config\all-config-C4.yaml'
+                logger.info("form config file using only C4")
+            config_file = self.get_config_file(use_predefined)
 
             self.builder.set_config_file(config_file)
+            if tier == 'screen':
+                screening_language = language if language in NLP_SCREENING_CONFIGURATIONS else 'en'
+                self.builder.set_model_overrides(self.get_screening_models(screening_language))
             return self.builder.build_analyzer()
         
         else:
             if language not in NLP_CONFIGURATIONS:
-                print(f"Warning: Language '{language}' not found, defaulting to English.")
+                logger.warning("Language not found, defaulting to English", extra={'language': language})
                 language = "en"
 
-            configuration = NLP_CONFIGURATIONS[language]
+            screening = tier == 'screen' and self.get_screening_models(language)
+            configuration = NLP_SCREENING_CONFIGURATIONS[language] if screening else NLP_CONFIGURATIONS[language]
             recognizer_data = RECOGNIZERS.get(language, {'deny_list': {}, 'regex_list': {}})
 
             recognizer_builder = RegistryRecognizerBuilder(language=language, use_predefined=use_predefined)
             recognizer_registry = (
                 recognizer_builder
                 .add_deny_list_patterns(recognizer_data['deny_list'])
+                .add_deny_list_files(recognizer_data.get('deny_list_files', {}))
                 .add_regex_patterns(recognizer_data['regex_list'])
                 .build()
             )
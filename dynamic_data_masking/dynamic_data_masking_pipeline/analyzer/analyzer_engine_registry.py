@@ -0,0 +1,79 @@
+import logging
+import threading
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder import PresidioAnalyzerBuilder, PresidioAnalyzerEngineProviderBuilder
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_director import PresidioAnalyzerDirector
+
+logger = logging.getLogger(__name__)
+
+class AnalyzerEngineRegistry:
+    """Process-wide cache of built AnalyzerEngine instances, so each NLP model is loaded once per configuration."""
+
+    def __init__(self):
+        self._engines = {}
+        self._build_locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(from_config_file, language, use_predefined, tier='full'):
+        config_file = PresidioAnalyzerDirector.get_config_file(use_predefined) if from_config_file else None
+        return (from_config_file, config_file, language, use_predefined, tier)
+
+    @staticmethod
+    def build_engine(from_config_file, language, use_predefined, tier='full'):
+        """Builds a new AnalyzerEngine without going through the cache, tier 'screen' builds it on the small screening model."""
+        if from_config_file:
+            logger.info("opted for yaml analyzer config", extra={'language': language, 'use_predefined': use_predefined, 'tier': tier})
+            builder = PresidioAnalyzerEngineProviderBuilder()
+        else:
+            logger.info("opted for code analyzer config", extra={'language': language, 'use_predefined': use_predefined, 'tier': tier})
+            builder = PresidioAnalyzerBuilder(language=language)
+
+        director = PresidioAnalyzerDirector(builder)
+        return director.construct(from_config_file=from_config_file, language=language, use_predefined=use_predefined, tier=tier)
+
+    def get_engine(self, from_config_file, language, use_predefined, tier='full'):
+        """Returns the engine for this configuration, building it on first use."""
+        key = self.make_key(from_config_file, language, use_predefined, tier)
+        engine = self._engines.get(key)
+        if engine is not None:
+            return engine
+
+        # One lock per configuration: concurrent callers wait for a single build,
+        # while engines for other configurations can still be built in parallel
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+
+        with build_lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self.build_engine(from_config_file, language, use_predefined, tier)
+                with self._lock:
+                    self._engines[key] = engine
+        return engine
+
+    def warm_up(self, configurations):
+        """Builds the engines for an iterable of (from_config_file, language, use_predefined[, tier]) up front."""
+        for configuration in configurations:
+            self.get_engine(*configuration)
+        return self
+
+    def evict(self, from_config_file, language, use_predefined, tier='full'):
+        """Drops the cached engine for this configuration, returns True if one was cached."""
+        key = self.make_key(from_config_file, language, use_predefined, tier)
+        with self._lock:
+            self._build_locks.pop(key, None)
+            return self._engines.pop(key, None) is not None
+
+    def clear(self):
+        """Drops every cached engine."""
+        with self._lock:
+            self._engines.clear()
+            self._build_locks.clear()
+
+    def cached_keys(self):
+        with self._lock:
+            return list(self._engines)
+
+# Shared registry used by DynamicDataMaskingAnalyzer
+analyzer_engine_registry = AnalyzerEngineRegistry()
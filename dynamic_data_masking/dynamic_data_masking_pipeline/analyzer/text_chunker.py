@@ -0,0 +1,40 @@
+class TextChunker:
+    """Splits text into overlapping chunks, cutting on page, paragraph, line or word boundaries when possible."""
+
+    # Preferred cut points, strongest first: page break, paragraph, line, word
+    BOUNDARIES = ("\f", "\n\n", "\n", " ")
+
+    def __init__(self, max_chunk_size=100000, overlap=500):
+        if overlap >= max_chunk_size:
+            raise ValueError("Chunk overlap must be smaller than the chunk size.")
+        self.max_chunk_size = max_chunk_size
+        self.overlap = overlap
+
+    def iter_chunks(self, text):
+        """Yields (offset, chunk) pairs, consecutive chunks share up to `overlap` characters."""
+        start = 0
+        while start < len(text):
+            end = self._find_cut(text, start)
+            yield start, text[start:end]
+            if end >= len(text):
+                break
+            start = max(self._find_start(text, end), start + 1)
+
+    def _find_start(self, text, end):
+        """Starts the next chunk on the first word boundary inside the overlap window."""
+        overlap_start = end - self.overlap
+        boundaries = [position for position in (text.find(boundary, overlap_start, end) for boundary in self.BOUNDARIES) if position != -1]
+        return min(boundaries) + 1 if boundaries else overlap_start
+
+    def _find_cut(self, text, start):
+        end = start + self.max_chunk_size
+        if end >= len(text):
+            return len(text)
+
+        # Only cut in the second half of the window so chunks stay reasonably large
+        lower_bound = start + max(self.overlap + 1, self.max_chunk_size // 2)
+        for boundary in self.BOUNDARIES:
+            cut = text.rfind(boundary, lower_bound, end)
+            if cut != -1:
+                return cut + len(boundary)
+        return end
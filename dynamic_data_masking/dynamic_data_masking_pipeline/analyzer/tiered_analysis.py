@@ -0,0 +1,210 @@
+import logging
+import re
+import threading
+from itertools import islice
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+# Pages, and paragraphs within a page, are the segments tiered analysis screens
+SEGMENT_BREAK = re.compile(r'\f|\n[ \t]*\n')
+LETTER = re.compile(r'[^\W\d_]')
+# Recognizers whose results come from the NLP model, the large model can do better than the small one
+NER_RECOGNIZERS = {'SpacyRecognizer', 'StanzaRecognizer', 'TransformersRecognizer'}
+
+class TierPolicy:
+    """Decides which screened segments go through the large model.
+
+    A segment escalates when the screen reports a result scoring at least
+    candidate_threshold (it holds PII, where the large model finds the names the small
+    one misses), a model result scoring within uncertain_range, or more proper nouns not
+    covered by any result than max_uncovered_proper_nouns. Segments with fewer than
+    min_letters letters, blank pages and tables of numbers, never escalate: the regex and
+    deny list recognizers of the screen already cover them.
+    """
+
+    def __init__(self, candidate_threshold=0.5, uncertain_range=(0.3, 0.5), max_uncovered_proper_nouns=2, min_letters=1):
+        self.candidate_threshold = candidate_threshold
+        self.uncertain_range = uncertain_range
+        self.max_uncovered_proper_nouns = max_uncovered_proper_nouns
+        self.min_letters = min_letters
+
+    def settings(self):
+        return ('tiered', self.candidate_threshold, tuple(self.uncertain_range), self.max_uncovered_proper_nouns, self.min_letters)
+
+    def escalation_reason(self, text, results, nlp_artifacts=None):
+        """'candidate', 'uncertain' or 'proper_nouns' when the segment needs the large model, None otherwise.
+
+        results are the screen's results before the score threshold is applied.
+        """
+        if sum(1 for _ in islice(LETTER.finditer(text), self.min_letters)) < self.min_letters:
+            return None
+        if any(result.score >= self.candidate_threshold for result in results):
+            return 'candidate'
+        low, high = self.uncertain_range
+        if any(low <= result.score < high and self._recognizer_name(result) in NER_RECOGNIZERS for result in results):
+            return 'uncertain'
+        if nlp_artifacts is not None and self.uncovered_proper_nouns(nlp_artifacts, results) > self.max_uncovered_proper_nouns:
+            return 'proper_nouns'
+        return None
+
+    @staticmethod
+    def uncovered_proper_nouns(nlp_artifacts, results):
+        count = 0
+        for token in nlp_artifacts.tokens or []:
+            if token.pos_ != 'PROPN':
+                continue
+            start, end = token.idx, token.idx + len(token)
+            if not any(result.start < end and start < result.end for result in results):
+                count += 1
+        return count
+
+    @staticmethod
+    def _recognizer_name(result):
+        return (result.recognition_metadata or {}).get('recognizer_name')
+
+
+class TierStatistics:
+    """Counts, across threads, how many segments and characters each tier handled and why segments escalated."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.segments = 0
+            self.skipped = 0
+            self.screened = 0
+            self.escalated = {}
+            self.screened_characters = 0
+            self.escalated_characters = 0
+
+    def record(self, skipped=0, screened=0, screened_characters=0, escalations=()):
+        """escalations are (reason, characters) of the segments sent to the large model."""
+        with self._lock:
+            self.segments += skipped + screened
+            self.skipped += skipped
+            self.screened += screened
+            self.screened_characters += screened_characters
+            for reason, characters in escalations:
+                self.escalated[reason] = self.escalated.get(reason, 0) + 1
+                self.escalated_characters += characters
+
+    def as_dict(self):
+        with self._lock:
+            escalated = sum(self.escalated.values())
+            return {
+                'segments': self.segments,
+                'skipped': self.skipped,
+                'screened': self.screened,
+                'escalated': escalated,
+                'escalated_by_reason': dict(self.escalated),
+                'screened_characters': self.screened_characters,
+                'escalated_characters': self.escalated_characters,
+                'escalation_rate': escalated / self.screened if self.screened else 0.0,
+            }
+
+
+class TieredAnalyzerEngine:
+    """AnalyzerEngine stand-in that screens text with a small model and re-analyzes flagged segments with the large one.
+
+    The text is split into pages and paragraphs, merged up to segment_chars characters.
+    Whitespace-only segments are skipped, the others are analyzed by screen_engine in
+    one batch. Segments the policy escalates are analyzed again by full_engine, whose
+    results replace the screen's; the screen results of the other segments are final.
+    Offsets are in the analyzed text, as with AnalyzerEngine.analyze.
+    """
+
+    def __init__(self, screen_engine, full_engine, policy=None, statistics=None, segment_chars=2000):
+        self.screen_engine = screen_engine
+        self.full_engine = full_engine
+        self.policy = policy or TierPolicy()
+        self.statistics = statistics if statistics is not None else tier_statistics
+        self.segment_chars = segment_chars
+
+    @property
+    def nlp_engine(self):
+        # Callers batching texts through the NLP model feed the screen
+        return self.screen_engine.nlp_engine
+
+    @property
+    def registry(self):
+        return self.screen_engine.registry
+
+    def segments(self, text):
+        """Yields (offset, segment) covering text, breaking at form feeds and blank lines."""
+        start = 0
+        segment_start = 0
+        for match in SEGMENT_BREAK.finditer(text):
+            end = match.end()
+            if end - segment_start > self.segment_chars and start > segment_start:
+                # The paragraph ending here starts the next segment
+                yield segment_start, text[segment_start:start]
+                segment_start = start
+            if match.group() == '\f':
+                # Pages always end a segment
+                yield segment_start, text[segment_start:end]
+                segment_start = end
+            start = end
+        if segment_start < len(text) or not text:
+            yield segment_start, text[segment_start:]
+
+    def analyze(self, text, language, nlp_artifacts=None, **kwargs):
+        if nlp_artifacts is not None:
+            # The caller already ran the screen model over the whole text
+            return self._analyze_segments([(0, text)], language, [nlp_artifacts], **kwargs)
+
+        segments = list(self.segments(text))
+        return self._analyze_segments(segments, language, None, **kwargs)
+
+    def _analyze_segments(self, segments, language, artifacts, score_threshold=None, **kwargs):
+        # The policy sees the screen results below the threshold too, they are what makes a segment uncertain
+        if score_threshold is None:
+            score_threshold = self.screen_engine.default_score_threshold
+        screened = [(offset, segment) for offset, segment in segments if segment.strip()]
+        skipped = len(segments) - len(screened)
+        if artifacts is None:
+            artifacts = (nlp_artifacts for _, nlp_artifacts in
+                         self.screen_engine.nlp_engine.process_batch([segment for _, segment in screened], language=language))
+        elif not screened:
+            artifacts = []
+
+        results = []
+        flagged = []
+        escalations = []
+        with span('analyzer.tier.screen', items=len(screened)):
+            for (offset, segment), nlp_artifacts in zip(screened, artifacts):
+                segment_results = self.screen_engine.analyze(text=segment, language=language, nlp_artifacts=nlp_artifacts, score_threshold=0,
+                                                             **kwargs)
+                reason = self.policy.escalation_reason(segment, segment_results, nlp_artifacts)
+                if reason is None:
+                    results.extend(self._shift([result for result in segment_results if result.score >= score_threshold], offset))
+                else:
+                    flagged.append((offset, segment))
+                    escalations.append((reason, len(segment)))
+
+        if flagged:
+            with span('analyzer.tier.full', items=len(flagged)):
+                full_artifacts = self.full_engine.nlp_engine.process_batch([segment for _, segment in flagged], language=language)
+                for (offset, segment), (_, nlp_artifacts) in zip(flagged, full_artifacts):
+                    segment_results = self.full_engine.analyze(text=segment, language=language, nlp_artifacts=nlp_artifacts,
+                                                               score_threshold=score_threshold, **kwargs)
+                    results.extend(self._shift(segment_results, offset))
+
+        self.statistics.record(skipped=skipped, screened=len(screened), screened_characters=sum(len(segment) for _, segment in screened),
+                               escalations=escalations)
+        logger.debug("tiered analysis", extra={'segments': len(segments), 'skipped': skipped, 'escalated': len(flagged)})
+        return sorted(results, key=lambda result: (result.start, result.end))
+
+    @staticmethod
+    def _shift(results, offset):
+        for result in results:
+            result.start += offset
+            result.end += offset
+        return results
+
+
+# Shared statistics of every TieredAnalyzerEngine that is not given its own
+tier_statistics = TierStatistics()
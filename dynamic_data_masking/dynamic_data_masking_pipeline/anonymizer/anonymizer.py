@@ -1,12 +1,62 @@
+import threading
+
+from presidio_analyzer import RecognizerResult
+from presidio_anonymizer.entities import OperatorConfig
+
 from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer.anonymizer_engine_director import AnonymizerEngineDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.result_cache import MaskingResultCache
 
 class DynamicDataMaskingAnonimyzer:
-    
-    def __init__(self):
+    """Masks analyzed text, the engine and operator configs are built once per configuration and shared by all instances."""
+
+    _engines = {}
+    _engines_lock = threading.Lock()
+
+    def __init__(self, result_cache=None):
         self.anonimyzer = None
         self.operators = None
+        self.result_cache = result_cache
 
     def anonimyze(self,text, analyzer_results, use_default_operators):
-        self.anonimyzer, self.operators = AnonymizerEngineDirector.build_anonymizer(use_default_operators=use_default_operators)
-        anonymizer_results = self.anonimyzer.anonymize(text=text,analyzer_results=analyzer_results)
+        if self.result_cache is None or not self.result_cache.cacheable(text):
+            return self._anonimyze(text, analyzer_results, use_default_operators)
+
+        leading, stripped = MaskingResultCache.normalize(text)
+        offset = len(leading)
+        spans = sorted([result.entity_type, result.start - offset, result.end - offset, result.score] for result in analyzer_results)
+        if any(start < 0 or end > len(stripped) for _, start, end, _ in spans):
+            # An entity reaching into the surrounding whitespace, mask the text as it is
+            return self._anonimyze(text, analyzer_results, use_default_operators)
+
+        key = self.result_cache.make_key('anonymizer', MaskingResultCache.fingerprint(use_default_operators), None, stripped, spans)
+        masked_text = self.result_cache.get(key)
+        if masked_text is None:
+            stripped_results = [RecognizerResult(entity_type, start, end, score) for entity_type, start, end, score in spans]
+            masked_text = self._anonimyze(stripped, stripped_results, use_default_operators)
+            self.result_cache.put(key, masked_text)
+        return leading + masked_text + text[offset + len(stripped):]
+
+    def anonymize_many(self, texts, analyzer_results, use_default_operators=True):
+        """Masks every text with its own analyzer results, all on the same engine, with the operators the pipeline uses by default."""
+        return [self.anonimyze(text, results, use_default_operators) for text, results in zip(texts, analyzer_results)]
+
+    @classmethod
+    def get_engine(cls, use_default_operators):
+        """Returns the (engine, operators) pair of a configuration, building it on first use."""
+        key = bool(use_default_operators)
+        engine = cls._engines.get(key)
+        if engine is None:
+            with cls._engines_lock:
+                engine = cls._engines.get(key)
+                if engine is None:
+                    anonymizer, operators = AnonymizerEngineDirector.build_anonymizer(use_default_operators=key)
+                    if operators:
+                        # AnonymizerEngine adds a missing DEFAULT to the dict it is given, which is shared between threads here
+                        operators = {'DEFAULT': OperatorConfig('replace'), **operators}
+                    engine = cls._engines[key] = (anonymizer, operators)
+        return engine
+
+    def _anonimyze(self, text, analyzer_results, use_default_operators):
+        self.anonimyzer, self.operators = self.get_engine(use_default_operators)
+        anonymizer_results = self.anonimyzer.anonymize(text=text,analyzer_results=analyzer_results, operators=self.operators)
         return anonymizer_results.text
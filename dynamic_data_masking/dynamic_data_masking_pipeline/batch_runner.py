@@ -0,0 +1,131 @@
+import glob
+import os
+import time
+from pathlib import Path
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import DynamicDataMaskingPipelineDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import analyzer_engine_registry
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import ANALYZER, CONF_LEVEL_MAP
+from dynamic_data_masking.dynamic_data_masking_pipeline.staged_executor import StagedPipelineExecutor, StageError
+
+GLOB_CHARACTERS = set('*?[')
+PARTIAL_SUFFIX = '.partial'
+
+def is_batch_input(input_spec):
+    """Anything but a single PDF file is a batch: a directory, a glob pattern or a manifest file."""
+    path = Path(input_spec)
+    return path.is_dir() or bool(GLOB_CHARACTERS & set(input_spec)) or (path.is_file() and path.suffix.lower() != '.pdf')
+
+
+def resolve_batch_inputs(input_spec):
+    """Returns (root, input paths) for a directory, a glob pattern or a manifest listing one PDF path per line.
+
+    Output paths mirror the inputs relative to root. Relative paths in a manifest are relative to the manifest.
+    """
+    path = Path(input_spec)
+    if path.is_dir():
+        return path, sorted(candidate for candidate in path.rglob('*') if candidate.suffix.lower() == '.pdf' and candidate.is_file())
+
+    if GLOB_CHARACTERS & set(input_spec):
+        inputs = sorted(Path(match) for match in glob.glob(input_spec, recursive=True) if Path(match).is_file())
+        # The directories of the pattern before the first wildcard
+        static_parts = []
+        for part in path.parts[:-1]:
+            if GLOB_CHARACTERS & set(part):
+                break
+            static_parts.append(part)
+        return Path(*static_parts) if static_parts else Path('.'), inputs
+
+    inputs = []
+    with open(path, encoding='utf-8') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                entry = Path(line)
+                inputs.append(entry if entry.is_absolute() else path.parent / entry)
+    root = Path(os.path.commonpath([str(entry.resolve().parent) for entry in inputs])) if inputs else path.parent
+    return root, [entry.resolve() for entry in inputs]
+
+
+class BatchMaskingRunner:
+    """Masks many documents in one process, with the analyzer engines loaded once.
+
+    Documents flow through a StagedPipelineExecutor, so extraction, analysis and redaction
+    of different documents overlap. Outputs mirror the input tree under output_root and are
+    written under a temporary name first, which makes existing outputs safe to skip when a
+    batch is resumed.
+    """
+
+    def __init__(self, output_root, jobs=1, queue_size=8, overwrite=False, **pipeline_options):
+        self.output_root = Path(output_root)
+        self.jobs = jobs
+        self.queue_size = queue_size
+        self.overwrite = overwrite
+        self.pipeline_options = pipeline_options
+
+    def output_path(self, root, input_path):
+        return self.output_root / Path(input_path).resolve().relative_to(Path(root).resolve())
+
+    def preload(self):
+        tiers = ['screen', 'full'] if self.pipeline_options.get('tiered_analysis') else ['full']
+        analyzer_engine_registry.warm_up([(
+            ANALYZER[self.pipeline_options.get('analyzer_engine', 'from_config_file')],
+            self.pipeline_options.get('lang', 'en'),
+            CONF_LEVEL_MAP[self.pipeline_options.get('conf_level', 'c4')],
+            tier
+        ) for tier in tiers])
+
+    def run(self, root, inputs):
+        """Masks every input without an output yet and returns the batch summary."""
+        work_items = []
+        skipped = 0
+        for input_path in inputs:
+            if self.output_root.resolve() in Path(input_path).resolve().parents:
+                # Masked files of an earlier run inside the input tree
+                continue
+            output_path = self.output_path(root, input_path)
+            if output_path.exists() and not self.overwrite:
+                skipped += 1
+                continue
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            work_items.append({
+                'input_file_path': str(input_path),
+                'output_file_path': str(output_path) + PARTIAL_SUFFIX,
+            })
+
+        self.preload()
+        pipeline = DynamicDataMaskingPipelineDirector.construct(input_file_path=None, output_file_path=None, **self.pipeline_options)
+        executor = StagedPipelineExecutor.from_pipeline(
+            pipeline, queue_size=self.queue_size, analysis_workers=self.jobs, extraction_workers=self.jobs, document_workers=self.jobs
+        )
+
+        started = time.perf_counter()
+        documents = pages = 0
+        failures = []
+        for result in executor.run(work_items):
+            if isinstance(result, StageError):
+                failed_item = work_items[result.document_id] if result.document_id is not None else None
+                if failed_item and os.path.exists(failed_item['output_file_path']):
+                    os.remove(failed_item['output_file_path'])
+                failures.append({
+                    'input_file_path': failed_item['input_file_path'] if failed_item else None,
+                    'stage': result.stage,
+                    'error': f"{type(result.error).__name__}: {result.error}",
+                })
+                continue
+            partial_path = result['output_file_path']
+            os.replace(partial_path, partial_path[:-len(PARTIAL_SUFFIX)])
+            documents += 1
+            pages += len(result['page_stats'])
+
+        elapsed = time.perf_counter() - started
+        return {
+            'documents': documents,
+            'pages': pages,
+            'skipped': skipped,
+            'failed': len(failures),
+            'failures': failures,
+            'seconds': elapsed,
+            'documents_per_second': documents / elapsed if elapsed else 0.0,
+            'pages_per_second': pages / elapsed if elapsed else 0.0,
+        }
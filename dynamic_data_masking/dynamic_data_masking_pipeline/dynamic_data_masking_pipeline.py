@@ -1,9 +1,15 @@
+import logging
 from abc import ABC, abstractmethod
 
-from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor import DynamicDataMaskingFileProcessor
-from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor import DynamicDataMaskingFileProcessor, OCRResultCache
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import DynamicDataMaskingAnalyzer, TierPolicy
 from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer import DynamicDataMaskingAnonimyzer
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor import DynamicDataMaskingFileRedactor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.comparison import ComparisonStrategyFactory
+from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import LANG_MAP, CONF_LEVEL_MAP, ANALYZER, ANONYMIZER, OCR_MODE, OCR_PREPROCESSING
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+logger = logging.getLogger(__name__)
 
 class PipelineStep(ABC):
     
@@ -12,64 +18,131 @@ class PipelineStep(ABC):
         pass
 
 class FileProcessorStep(PipelineStep):
-    def __init__(self, file_path, language, resolution, ocr_config):
+    def __init__(self, file_path, language, resolution, ocr_config, single_pass=True, extraction_mode='ocr', workers=1,
+                 ocr_cache_dir=None, ocr_cache_max_bytes=1024 * 1024 * 1024, keep_page_images=False, page_image_resolution=None,
+                 ocr_preprocessing=None, adaptive_resolution=False, streaming=False):
         self.file_path = file_path
         self.language = language
         self.resolution = resolution
         self.ocr_config = ocr_config
+        self.single_pass = single_pass
+        self.extraction_mode = extraction_mode
+        self.workers = workers
+        self.ocr_cache = OCRResultCache(ocr_cache_dir, max_bytes=ocr_cache_max_bytes) if ocr_cache_dir else None
+        self.keep_page_images = keep_page_images
+        self.page_image_resolution = page_image_resolution
+        self.ocr_preprocessing = ocr_preprocessing
+        self.adaptive_resolution = adaptive_resolution
+        self.streaming = streaming
 
-    def execute(self, data=None):
-        print("FILE READER RUNS")
-        file_processor = DynamicDataMaskingFileProcessor(
-            file_path=self.file_path, 
+    def get_file_processor(self, data=None):
+        # Work items can name their own file, the constructor's file is the default
+        return DynamicDataMaskingFileProcessor(
+            file_path=(data or {}).get("input_file_path", self.file_path), 
             language=self.language, 
             resolution=self.resolution,
-            ocr_config=self.ocr_config
+            ocr_config=self.ocr_config,
+            single_pass=self.single_pass,
+            extraction_mode=self.extraction_mode,
+            workers=self.workers,
+            ocr_cache=self.ocr_cache,
+            keep_page_images=self.keep_page_images,
+            page_image_resolution=self.page_image_resolution,
+            ocr_preprocessing=self.ocr_preprocessing,
+            adaptive_resolution=self.adaptive_resolution,
+            streaming=self.streaming
             )
+
+    def execute(self, data=None):
+        logger.info("file reader runs", extra={'file_path': str((data or {}).get("input_file_path", self.file_path))})
+        file_processor = self.get_file_processor(data)
         extracted_text, word_coordinates = file_processor.process()
-        return {"text": extracted_text, "word_coordinates": word_coordinates}
+        return {
+            **(data or {}),
+            "text": extracted_text,
+            "word_coordinates": word_coordinates,
+            "page_stats": file_processor.page_stats,
+            "page_images": file_processor.page_images
+        }
+
+    def iter_pages(self, data=None):
+        """Yields one work item per page: its text, word coordinates (page relative offsets), stats and kept image."""
+        for page_text, word_data, page_stat, page_image in self.get_file_processor(data).iter_pages():
+            yield {
+                "text": page_text,
+                "word_coordinates": word_data,
+                "page_stat": page_stat,
+                "page_image": page_image
+            }
 
 
 class AnalyzerStep(PipelineStep):
-    def __init__(self, from_config_file, language, use_predefined):
+    def __init__(self, from_config_file, language, use_predefined, chunk_size=None, chunk_overlap=None, batch_size=None, n_process=1,
+                 result_cache=None, tiered=False, tier_policy=None):
         self.language = language
         self.use_predefined = use_predefined
         self.from_config_file = from_config_file
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.result_cache = result_cache
+        self.tiered = tiered
+        self.tier_policy = tier_policy
 
     def execute(self, data):
-        print("ANALYZER RUNS")
-        analyzer = DynamicDataMaskingAnalyzer(from_config_file=self.from_config_file,language=self.language, use_predefined=self.use_predefined)
-        result = analyzer.analyze_text(text=data["text"])
+        logger.info("analyzer runs", extra={'text_length': len(data["text"]), 'tiered': self.tiered})
+        analyzer = DynamicDataMaskingAnalyzer(from_config_file=self.from_config_file,language=self.language, use_predefined=self.use_predefined,
+                                              result_cache=self.result_cache, tiered=self.tiered, tier_policy=self.tier_policy)
+        if self.batch_size:
+            result = analyzer.analyze_text_by_page(text=data["text"], batch_size=self.batch_size, n_process=self.n_process)
+        elif self.chunk_size:
+            result = analyzer.analyze_text_chunked(text=data["text"], max_chunk_size=self.chunk_size, overlap=self.get_chunk_overlap())
+        else:
+            result = analyzer.analyze_text(text=data["text"])
         data["analysis_results"] = result
         return data
+
+    def get_chunk_overlap(self):
+        # Without an explicit overlap, small chunks share a quarter of their size
+        if self.chunk_overlap is None:
+            return min(500, self.chunk_size // 4)
+        return self.chunk_overlap
     
 class AnonymizerStep(PipelineStep):
 
-    def __init__(self, use_default_operators):
+    def __init__(self, use_default_operators, result_cache=None):
         self.use_default_operators = use_default_operators
+        self.result_cache = result_cache
 
     def execute(self, data):
-        print("ANONYMIZER RUNS")
-        anonymizer = DynamicDataMaskingAnonimyzer()
+        logger.info("anonymizer runs", extra={'entities': len(data["analysis_results"])})
+        anonymizer = DynamicDataMaskingAnonimyzer(result_cache=self.result_cache)
         masked_text = anonymizer.anonimyze(text=data["text"], analyzer_results=data["analysis_results"], use_default_operators=self.use_default_operators)
         data["masked_text"] = masked_text
         return data
     
 class RedactorStep(PipelineStep):
-    def __init__(self, input_file_path, output_pdf_path, redaction_strategy):
+    def __init__(self, input_file_path, output_pdf_path, redaction_strategy, comparison_strategy="span"):
         self.input_file_path = input_file_path
         self.output_pdf_path = output_pdf_path
         self.redaction_strategy = redaction_strategy
+        self.comparison_strategy = comparison_strategy
         
     def execute(self, data):
-        print("REDACTOR RUNS")
-        redactor = DynamicDataMaskingFileRedactor(redaction_strategy=self.redaction_strategy)
+        logger.info("redactor runs", extra={'redaction_strategy': self.redaction_strategy, 'comparison_strategy': self.comparison_strategy})
+        redactor = DynamicDataMaskingFileRedactor(
+            comparison_strategy=ComparisonStrategyFactory.get_comparison_strategy(self.comparison_strategy),
+            redaction_strategy=self.redaction_strategy
+            )
         redactor.redact_file(
-            input_file_path=self.input_file_path,
+            input_file_path=data.get("input_file_path", self.input_file_path),
             extracted_text=data["text"],
             masked_text=data["masked_text"],
             words_info=data["word_coordinates"],
-            output_pdf_path=self.output_pdf_path
+            output_pdf_path=data.get("output_file_path", self.output_pdf_path),
+            analyzer_results=data.get("analysis_results"),
+            page_images=data.get("page_images")
         )
         return data
 
@@ -82,8 +155,87 @@ class DynamicDataMaskingPipeline:
 
     def execute_pipeline(self, initial_data=None):
         data = initial_data
-        for step in self.steps:
-            data = step.execute(data)
+        with span("pipeline") as pipeline_record:
+            for step in self.steps:
+                with span(type(step).__name__) as record:
+                    data = step.execute(data)
+                    # Pages handled by the step, when the data tells
+                    record.add_items(len(data.get("page_stats") or []) if isinstance(data, dict) else 0)
+            pipeline_record.add_items(len(data.get("page_stats") or []) if isinstance(data, dict) else 0)
         return data
 
 
+class DynamicDataMaskingPipelineDirector:
+    """Assembles the standard file masking pipeline from the CLI style options."""
+
+    @staticmethod
+    def construct(input_file_path, output_file_path, lang='en', resolution=500, ocr_config='--oem 3 --psm 6',
+                  extraction_mode='hybrid', workers=1, ocr_mode='single_pass', ocr_cache_dir=None, ocr_cache_size_mb=1024, conf_level='c4',
+                  analyzer_engine='from_config_file', analysis_chunk_size=0, analysis_chunk_overlap=None, analysis_batch_size=0,
+                  analysis_processes=1, anonimyzer_operator='yes', masking_strategy='blackout',
+                  comparison_strategy='span', image_redaction_resolution=200, ocr_preprocessing='none', adaptive_resolution=False,
+                  streaming=False, tiered_analysis=False, tier_candidate_threshold=0.5, tier_max_proper_nouns=2):
+        pipeline = DynamicDataMaskingPipeline()
+        pipeline.add_step(FileProcessorStep(
+            file_path=input_file_path,
+            language=LANG_MAP[lang],
+            resolution=resolution,
+            ocr_config=ocr_config,
+            single_pass=OCR_MODE[ocr_mode],
+            extraction_mode=extraction_mode,
+            workers=workers,
+            ocr_cache_dir=ocr_cache_dir,
+            ocr_cache_max_bytes=ocr_cache_size_mb * 1024 * 1024,
+            # Image redaction paints the pages rendered for OCR instead of rendering them again
+            keep_page_images=masking_strategy == 'image',
+            page_image_resolution=image_redaction_resolution,
+            ocr_preprocessing=OCR_PREPROCESSING[ocr_preprocessing],
+            adaptive_resolution=adaptive_resolution,
+            streaming=streaming
+            )
+        )
+        pipeline.add_step(AnalyzerStep(
+            from_config_file=ANALYZER[analyzer_engine],
+            language=lang,
+            use_predefined=CONF_LEVEL_MAP[conf_level],
+            chunk_size=analysis_chunk_size,
+            chunk_overlap=analysis_chunk_overlap,
+            batch_size=analysis_batch_size,
+            n_process=analysis_processes,
+            tiered=tiered_analysis,
+            tier_policy=TierPolicy(candidate_threshold=tier_candidate_threshold, max_uncovered_proper_nouns=tier_max_proper_nouns)
+            )
+        )
+        pipeline.add_step(AnonymizerStep(
+            use_default_operators=ANONYMIZER[anonimyzer_operator]
+            )
+        )
+        pipeline.add_step(RedactorStep(
+            redaction_strategy=masking_strategy,
+            comparison_strategy=comparison_strategy,
+            input_file_path=input_file_path,
+            output_pdf_path=output_file_path
+            )
+        )
+        return pipeline
+
+    @staticmethod
+    def construct_text(lang='en', conf_level='c4', analyzer_engine='from_config_file', anonimyzer_operator='yes', result_cache=None):
+        """Analyzer and anonymizer steps only, for raw text records: execute_pipeline({"text": ...}).
+
+        A MaskingResultCache shared between pipelines lets repeating records skip the NLP work.
+        """
+        pipeline = DynamicDataMaskingPipeline()
+        pipeline.add_step(AnalyzerStep(
+            from_config_file=ANALYZER[analyzer_engine],
+            language=lang,
+            use_predefined=CONF_LEVEL_MAP[conf_level],
+            result_cache=result_cache
+            )
+        )
+        pipeline.add_step(AnonymizerStep(
+            use_default_operators=ANONYMIZER[anonimyzer_operator],
+            result_cache=result_cache
+            )
+        )
+        return pipeline
@@ -1,3 +1,4 @@
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.file_processor import DynamicDataMaskingFileProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.ocr_cache import OCRResultCache
 
-__all__ = ["DynamicDataMaskingFileProcessor"]
\ No newline at end of file
+__all__ = ["DynamicDataMaskingFileProcessor", "OCRResultCache"]
\ No newline at end of file
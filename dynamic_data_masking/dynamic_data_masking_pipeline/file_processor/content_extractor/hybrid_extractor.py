@@ -0,0 +1,124 @@
+import numpy as np
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.pdf_extractor import PDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor import PageToImageConverter
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+class HybridPDFProcessor(PDFProcessor):
+    """Reads words straight from the PDF text layer and only falls back to OCR for scanned or image-only pages.
+
+    On pages with a usable text layer, every image covering more than min_image_coverage
+    of the page (a pasted ID scan, a signature, a scanned attachment) is OCR'd on its
+    own and its words are added after the text layer words.
+    """
+
+    def __init__(self, file_path, language, resolution, ocr_config, single_pass=True, workers=1, cache=None,
+                 keep_page_images=False, page_image_resolution=None, ocr_preprocessing=None, adaptive_resolution=False,
+                 streaming=False, min_chars=10, max_unmapped_ratio=0.1, max_image_coverage=0.5, line_tolerance=3,
+                 min_image_coverage=0.01):
+        super().__init__(file_path, language, resolution, ocr_config, single_pass=single_pass, workers=workers, cache=cache,
+                         keep_page_images=keep_page_images, page_image_resolution=page_image_resolution,
+                         ocr_preprocessing=ocr_preprocessing, adaptive_resolution=adaptive_resolution, streaming=streaming)
+        self.min_chars = min_chars
+        self.max_unmapped_ratio = max_unmapped_ratio
+        self.max_image_coverage = max_image_coverage
+        self.line_tolerance = line_tolerance
+        self.min_image_coverage = min_image_coverage
+
+    def cache_settings(self):
+        return super().cache_settings() + (self.min_chars, self.max_unmapped_ratio, self.max_image_coverage, self.line_tolerance,
+                                           self.min_image_coverage)
+
+    def _process_page(self, page, page_num):
+        with span('pdf.text_layer', page_number=page_num) as record:
+            words = page.extract_words()
+            usable = self._has_usable_text_layer(page, words)
+            if usable:
+                page_text, word_data = self._text_layer_page(words, page_num)
+                record.add_items(len(word_data))
+
+        if not usable:
+            page_text, word_data = self._ocr_page(page, page_num)
+            return page_text, word_data, {'page_number': page_num, 'method': 'ocr', 'words': len(word_data)}
+
+        regions = self._image_regions(page)
+        if regions:
+            page_text, word_data = self._add_image_regions(page, page_num, page_text, word_data, regions)
+        return page_text, word_data, {'page_number': page_num, 'method': 'text_layer', 'words': len(word_data), 'ocr_regions': len(regions)}
+
+    def _has_usable_text_layer(self, page, words):
+        """A text layer is usable when it holds enough real characters and the page is not mostly a scanned image."""
+        text = "".join(word['text'] for word in words)
+        if len(text) < self.min_chars:
+            return False
+
+        # Glyphs without a unicode mapping come out of pdfminer as "(cid:NN)"
+        unmapped = sum(len(word['text']) for word in words if '(cid:' in word['text'])
+        if unmapped / len(text) > self.max_unmapped_ratio:
+            return False
+
+        page_area = page.width * page.height
+        image_area = sum(image['width'] * image['height'] for image in page.images)
+        return not page_area or image_area / page_area <= self.max_image_coverage
+
+    def _image_regions(self, page):
+        """Bounding boxes, clipped to the page, of the images large enough to hold text worth reading."""
+        page_x0, page_top, page_x1, page_bottom = page.bbox
+        min_area = self.min_image_coverage * page.width * page.height
+        regions = []
+        for image in page.images:
+            x0, top = max(image['x0'], page_x0), max(image['top'], page_top)
+            x1, bottom = min(image['x1'], page_x1), min(image['bottom'], page_bottom)
+            if x1 > x0 and bottom > top and (x1 - x0) * (bottom - top) >= min_area:
+                regions.append((x0, top, x1, bottom))
+        return regions
+
+    def _add_image_regions(self, page, page_num, page_text, word_data, regions):
+        """OCRs each image region and appends its text and words to the text layer ones, each region as a paragraph."""
+        text_parts = [page_text[:-len("\n\f")]]
+        words = WordStoreBuilder().add_store(word_data)
+        position = len(text_parts[0])
+        for bbox in regions:
+            region = page.crop(bbox)
+            with span('pdf.render', page_number=page_num, region=True):
+                image = PageToImageConverter.convert(region, resolution=self.resolution)
+            with span('pdf.ocr', page_number=page_num, region=True) as record:
+                region_text, region_words = self.ocr_processor.process(image, region, page_num, lang=self.language, ocr_config=self.ocr_config)
+                record.add_items(len(region_words))
+            region_text = region_text[:-len("\n\f")] if region_text.endswith("\n\f") else region_text
+            if not region_text.strip():
+                continue
+            # The region's boxes are relative to its top left corner
+            region_words.boxes += np.asarray([bbox[0], bbox[1], bbox[0], bbox[1]], dtype=region_words.boxes.dtype)
+            position += len("\n\n")
+            text_parts.append("\n\n" + region_text)
+            words.add_store(region_words, char_offset=position)
+            position += len(region_text)
+        return "".join(text_parts) + "\n\f", words.build()
+
+    def _text_layer_page(self, words, page_num):
+        """Builds the page text line by line from the text layer words, keeping their PDF coordinates and text offsets."""
+        text_parts = []
+        words_info = WordStoreBuilder()
+        position = 0
+        line_top = None
+
+        for word in words:
+            if line_top is None:
+                separator = ""
+                line_top = word['top']
+            elif abs(word['top'] - line_top) > self.line_tolerance:
+                separator = "\n"
+                line_top = word['top']
+            else:
+                separator = " "
+
+            text_parts.append(separator)
+            text_parts.append(word['text'])
+            position += len(separator)
+
+            words_info.add_word(word['text'], word['x0'], word['top'], word['x1'], word['bottom'], page_num, position, position + len(word['text']))
+            position += len(word['text'])
+
+        return "".join(text_parts) + "\n\f", words_info.build()
@@ -1,31 +1,248 @@
+import math
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import islice
+
 import pdfplumber
 
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor import ContentExtractor
-from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor import ImageTextProcessor, ImageCoordinateProcessor, PageToImageConverter
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor import ImageTextProcessor, ImageCoordinateProcessor, ImageOCRProcessor, PageToImageConverter, ImagePreprocessor, AdaptiveResolution
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span, get_instrumentation, enable_instrumentation
 
 class PDFProcessor(ContentExtractor):
-    """Handles PDF processing, extracting text and word coordinates."""
+    """Handles PDF processing, extracting text and word coordinates.
+
+    ocr_preprocessing ('gray' or 'binary') deskews and crops rendered pages before OCR.
+    With adaptive_resolution each page is rendered at the DPI its text size needs, up to
+    resolution, instead of always at resolution. streaming turns off the document wide
+    object cache of pdfminer, so memory stays flat on documents with thousands of pages.
+    """
 
-    def __init__(self, file_path, language, resolution, ocr_config):
+    # Pages per process pool chunk at most, a chunk's results are held until it is consumed
+    max_chunk_pages = 16
+
+    def __init__(self, file_path, language, resolution, ocr_config, single_pass=True, workers=1, cache=None,
+                 keep_page_images=False, page_image_resolution=None, ocr_preprocessing=None, adaptive_resolution=False,
+                 streaming=False):
         super().__init__(file_path, language, resolution, ocr_config)
+        self.single_pass = single_pass
+        self.workers = workers
+        self.cache = cache
+        self.file_hash = None
+        self.keep_page_images = keep_page_images
+        self.page_image_resolution = page_image_resolution
+        self.streaming = streaming
+        self.page_images = []
+        self._kept_page_images = {}
+        self.ocr_processor = ImageOCRProcessor()
         self.text_processor = ImageTextProcessor()
         self.coord_processor = ImageCoordinateProcessor()
+        self.preprocessor = ImagePreprocessor(mode=ocr_preprocessing) if ocr_preprocessing else None
+        self.adaptive_resolution = AdaptiveResolution(max_resolution=resolution, min_resolution=min(150, resolution)) if adaptive_resolution else None
+        self.page_stats = []
+        self.instrumented = False
+
+    def __getstate__(self):
+        # Worker processes get the settings, not the pages extracted so far
+        state = self.__dict__.copy()
+        state.update(_kept_page_images={}, page_images=[], page_stats=[])
+        return state
 
     def process(self):
         """Processes a PDF and extracts text along with word coordinates."""
-        extracted_text = ""
-        all_word_data = []
+        page_texts = []
+        all_word_data = WordStoreBuilder()
+        self.page_stats = []
+        page_images = []
+        page_offset = 0
+
+        for page_text, word_data, page_stat, page_image in self.iter_pages():
+            # Word offsets are relative to their page, shift them into the document text
+            all_word_data.add_store(word_data, char_offset=page_offset)
+            page_texts.append(page_text)
+            self.page_stats.append(page_stat)
+            page_images.append(page_image)
+            page_offset += len(page_text)
+
+        # One entry per page, None for pages that were never rendered (text layer or cached pages)
+        self.page_images = page_images if self.keep_page_images else []
+
+        return "".join(page_texts), all_word_data.build()
+
+    def iter_pages(self):
+        """Yields (page_text, word_data, page_stat, page_image) as each page is extracted.
 
-        with pdfplumber.open(self.file_path) as pdf:
+        Word offsets are relative to the page text. page_image is None unless page images
+        are kept and the page was rendered.
+        """
+        self._kept_page_images = {}
+        # Worker processes only record spans when the parent does
+        self.instrumented = get_instrumentation().enabled
+        if self.cache is not None:
+            self.file_hash = self.cache.hash_file(self.file_path)
+
+        try:
+            for page_num, (page_text, word_data, page_stat) in enumerate(self._iter_page_results(), start=1):
+                yield page_text, word_data, page_stat, self._kept_page_images.pop(page_num, None)
+        finally:
+            self._kept_page_images = {}
+
+    def _iter_page_results(self):
+        """Yields the result of every page in page order, sequentially or across a process pool."""
+        if self.workers > 1:
+            yield from self._iter_page_results_parallel()
+            return
+
+        with self.open_pdf() as pdf:
             for page_num, page in enumerate(pdf.pages, start=1):
-                image = PageToImageConverter.convert(page, resolution=self.resolution)
+                try:
+                    yield self._process_page_cached(page, page_num)
+                finally:
+                    # Drops the parsed objects and layout of the page, it is not read again
+                    page.close()
+
+    def open_pdf(self, pages=None):
+        """Opens the PDF with pdfplumber, only parsing the given page numbers when pages is set."""
+        pdf = pdfplumber.open(self.file_path, pages=pages)
+        if self.streaming:
+            # pdfminer keeps every object it parsed, including the image streams of all pages seen so far
+            pdf.doc.caching = False
+        return pdf
+
+    def _iter_page_results_parallel(self):
+        """Spreads page indices over a process pool, each worker opens the PDF and renders its own pages."""
+        with self.open_pdf() as pdf:
+            page_count = len(pdf.pages)
+
+        # A few chunks per worker keeps the pool busy when some pages are much slower than others
+        chunk_size = max(1, min(self.max_chunk_pages, math.ceil(page_count / (self.workers * 4))))
+        page_chunks = iter([range(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)])
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Two chunks per worker in flight at most, so finished pages never pile up ahead of the consumer.
+            # Results are taken in submission order, so pages come back in page order.
+            pending = deque(executor.submit(_process_page_range, self, chunk) for chunk in islice(page_chunks, self.workers * 2))
+            while pending:
+                chunk_results, kept_page_images, span_records = pending.popleft().result()
+                next_chunk = next(page_chunks, None)
+                if next_chunk is not None:
+                    pending.append(executor.submit(_process_page_range, self, next_chunk))
+                self._kept_page_images.update(kept_page_images)
+                get_instrumentation().add_records(span_records)
+                yield from chunk_results
 
+    def cache_settings(self):
+        """Everything besides the file content and page index that changes a page result."""
+        return (type(self).__name__, self.resolution, self.language, self.ocr_config, self.single_pass,
+                self.preprocessor.settings() if self.preprocessor else None,
+                self.adaptive_resolution.settings() if self.adaptive_resolution else None)
+
+    def _process_page_cached(self, page, page_num):
+        """Serves the page from the OCR result cache when possible, processing and storing it otherwise."""
+        with span('pdf.page', page_number=page_num) as record:
+            page_text, word_data, page_stat = self._process_page_with_cache(page, page_num)
+            record.set(method=page_stat['method'], cached=page_stat.get('cached', False)).add_items(len(word_data))
+        return page_text, word_data, page_stat
+
+    def _process_page_with_cache(self, page, page_num):
+        if self.cache is None:
+            return self._process_page(page, page_num)
+
+        key = self.cache.make_key(self.file_hash, page_num, self.cache_settings())
+        cached = self.cache.get(key)
+        if cached is not None:
+            page_text, word_data, page_stat = cached
+            return page_text, word_data, {**page_stat, 'cached': True}
+
+        page_text, word_data, page_stat = self._process_page(page, page_num)
+        self.cache.put(key, page_text, word_data, page_stat)
+        return page_text, word_data, page_stat
+
+    def _process_page(self, page, page_num):
+        """Processes a single page, returning its text, word coordinates and extraction stats."""
+        page_text, word_data = self._ocr_page(page, page_num)
+        return page_text, word_data, {'page_number': page_num, 'method': 'ocr', 'words': len(word_data)}
+
+    def _ocr_page(self, page, page_num):
+        """Rasterizes a single page and runs OCR on it."""
+        with span('pdf.render', page_number=page_num) as record:
+            resolution = self.adaptive_resolution.choose(page) if self.adaptive_resolution else self.resolution
+            record.set(resolution=resolution)
+            image = PageToImageConverter.convert(page, resolution=resolution)
+            self._keep_page_image(page, page_num, image, resolution)
+
+        transform = None
+        if self.preprocessor is not None:
+            with span('pdf.preprocess', page_number=page_num, mode=self.preprocessor.mode) as record:
+                image, transform = self.preprocessor.process(image, page)
+                record.set(skew_angle=transform.angle)
+
+        with span('pdf.ocr', page_number=page_num, single_pass=self.single_pass) as record:
+            if self.single_pass:
+                # Text and word coordinates from a single Tesseract call
+                page_text, word_data = self.ocr_processor.process(image, page, page_num, lang=self.language, ocr_config=self.ocr_config,
+                                                                  transform=transform)
+            else:
                 # Extract Text
                 page_text = self.text_processor.process(image, lang=self.language, ocr_config=self.ocr_config)
-                extracted_text += page_text
 
                 # Extract Word Coordinates
-                word_data = self.coord_processor.process(image, page, page_num, lang=self.language)
-                all_word_data.extend(word_data)
+                word_data = self.coord_processor.process(image, page, page_num, lang=self.language, ocr_config=self.ocr_config,
+                                                         transform=transform)
+                self._align_word_offsets(page_text, word_data)
+            record.add_items(len(word_data))
+        return page_text, word_data
+
+    def _keep_page_image(self, page, page_num, image, resolution):
+        """Keeps the rendered page, or a copy downscaled to page_image_resolution, for image-domain redaction."""
+        if not self.keep_page_images:
+            return
+        if self.page_image_resolution and self.page_image_resolution < resolution:
+            scale = self.page_image_resolution / resolution
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+        self._kept_page_images[page_num] = (image, float(page.width), float(page.height))
+
+    @staticmethod
+    def _align_word_offsets(page_text, word_data):
+        """Aligns the OCR words with the whitespace separated tokens of the separately recognized page text.
+
+        The two token sequences are diffed, so a word only matches a whole token. Words the
+        text pass read differently share the span of the tokens it read in their place, and
+        words it dropped get the span between their aligned neighbours; an analyzer span
+        over that stretch of text still redacts them.
+        """
+        tokens = [(match.start(), match.end()) for match in re.finditer(r'\S+', page_text)]
+        words = [word_data.text(index).strip() for index in range(len(word_data))]
+        matcher = SequenceMatcher(None, words, [page_text[start:end] for start, end in tokens], autojunk=False)
+
+        for tag, word_start, word_end, token_start, token_end in matcher.get_opcodes():
+            if tag == 'equal' or (tag == 'replace' and word_end - word_start == token_end - token_start):
+                for offset in range(word_end - word_start):
+                    word_data.char_offsets[word_start + offset] = tokens[token_start + offset]
+            elif tag == 'replace':
+                word_data.char_offsets[word_start:word_end] = (tokens[token_start][0], tokens[token_end - 1][1])
+            elif tag == 'delete':
+                # Between the neighbouring tokens, or over them when nothing separates them
+                previous = tokens[token_start - 1] if token_start > 0 else (0, 0)
+                following = tokens[token_start] if token_start < len(tokens) else (len(page_text), len(page_text))
+                span = (previous[1], following[0]) if following[0] > previous[1] else (previous[0], following[1])
+                word_data.char_offsets[word_start:word_end] = span
+
+
+def _process_page_range(processor, page_indices):
+    """Process pool entry point: processes the given zero-based page indices of the processor's PDF.
 
-        return extracted_text, all_word_data
\ No newline at end of file
+    Returns the page results, the page images kept while processing them and the spans recorded meanwhile.
+    """
+    processor._kept_page_images = {}
+    instrumentation = enable_instrumentation() if processor.instrumented else get_instrumentation()
+    results = []
+    # Only the pages of the chunk are parsed
+    with processor.open_pdf(pages=[index + 1 for index in page_indices]) as pdf:
+        for page in pdf.pages:
+            results.append(processor._process_page_cached(page, page.page_number))
+            page.close()
+    return results, processor._kept_page_images, instrumentation.take_records()
@@ -2,29 +2,71 @@ from pathlib import Path
 import pdfplumber
 
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.pdf_extractor import PDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.hybrid_extractor import HybridPDFProcessor
 
 class DynamicDataMaskingFileProcessor:
     """Determines the correct processing function based on file type."""
 
-    def __init__(self, file_path, language, resolution, ocr_config):
+    def __init__(self, file_path, language, resolution, ocr_config, single_pass=True, extraction_mode='ocr', workers=1, ocr_cache=None,
+                 keep_page_images=False, page_image_resolution=None, ocr_preprocessing=None, adaptive_resolution=False,
+                 streaming=False):
         self.file_path = Path(file_path)
         self.language = language
         self.resolution = resolution
         self.ocr_config = ocr_config
+        self.single_pass = single_pass
+        self.workers = workers
+        self.ocr_cache = ocr_cache
+        self.keep_page_images = keep_page_images
+        self.page_image_resolution = page_image_resolution
+        self.ocr_preprocessing = ocr_preprocessing
+        self.adaptive_resolution = adaptive_resolution
+        self.streaming = streaming
         self.file_extension = self.file_path.suffix.lower()
+        self.page_stats = []
+        self.page_images = []
+
+        # Mapping extraction modes to their PDF processors
+        self.pdf_processors = {
+            'ocr': PDFProcessor,
+            'hybrid': HybridPDFProcessor
+        }
+        if extraction_mode not in self.pdf_processors:
+            raise ValueError(f"Unsupported extraction mode: {extraction_mode}")
 
         # Mapping file types to their respective processors
         self.supported_types = {
-            '.pdf': PDFProcessor
+            '.pdf': self.pdf_processors[extraction_mode]
             # '.jpg': ,  # Future expansion
             # '.email': ,    # Future expansion
         }
 
-    def process(self):
-        """Determines and executes the correct processing function."""
+    def get_processor(self):
+        """Builds the processor matching the file type."""
         if self.file_extension in self.supported_types:
             processor_class = self.supported_types[self.file_extension]
-            processor = processor_class(self.file_path, self.language, self.resolution, self.ocr_config)
-            return processor.process()
+            return processor_class(
+                self.file_path, self.language, self.resolution, self.ocr_config,
+                single_pass=self.single_pass,
+                workers=self.workers,
+                cache=self.ocr_cache,
+                keep_page_images=self.keep_page_images,
+                page_image_resolution=self.page_image_resolution,
+                ocr_preprocessing=self.ocr_preprocessing,
+                adaptive_resolution=self.adaptive_resolution,
+                streaming=self.streaming
+                )
         else:
-            raise ValueError(f"Unsupported file type: {self.file_extension}")
\ No newline at end of file
+            raise ValueError(f"Unsupported file type: {self.file_extension}")
+
+    def process(self):
+        """Determines and executes the correct processing function."""
+        processor = self.get_processor()
+        result = processor.process()
+        self.page_stats = processor.page_stats
+        self.page_images = processor.page_images
+        return result
+
+    def iter_pages(self):
+        """Yields (page_text, word_data, page_stat, page_image) page by page, see PDFProcessor.iter_pages."""
+        yield from self.get_processor().iter_pages()
\ No newline at end of file
@@ -1,3 +1,4 @@
-from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor.image_processor import PageToImageConverter, ImageTextProcessor, ImageCoordinateProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor.image_preprocessor import PageTransform, AdaptiveResolution, ImagePreprocessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor.image_processor import PageToImageConverter, ImageTextProcessor, ImageCoordinateProcessor, ImageOCRProcessor
 
-__all__ = [ "PageToImageConverter", "ImageTextProcessor", "ImageCoordinateProcessor"]
\ No newline at end of file
+__all__ = [ "PageToImageConverter", "ImageTextProcessor", "ImageCoordinateProcessor", "ImageOCRProcessor", "PageTransform", "AdaptiveResolution", "ImagePreprocessor"]
\ No newline at end of file
@@ -0,0 +1,182 @@
+import math
+
+import numpy as np
+from PIL import Image
+
+class PageTransform:
+    """Maps pixel boxes of a (deskewed, cropped) OCR image back to PDF page coordinates.
+
+    The processed image is the rendered image rotated by angle degrees counterclockwise
+    around its center and then cropped at (crop_left, crop_top); x_scale and y_scale are
+    page points per rendered pixel.
+    """
+
+    def __init__(self, x_scale, y_scale, angle=0.0, center=(0.0, 0.0), crop_left=0, crop_top=0):
+        self.x_scale = x_scale
+        self.y_scale = y_scale
+        self.angle = angle
+        self.center = center
+        self.crop_left = crop_left
+        self.crop_top = crop_top
+
+    @classmethod
+    def for_image(cls, page, image):
+        """Plain scaling from an image rendered from the whole page."""
+        return cls(float(page.width) / image.width, float(page.height) / image.height)
+
+    def map_boxes(self, boxes):
+        """Maps an (n, 4) array of left, top, right, bottom pixel boxes to page boxes."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x0, y0, x1, y1 = (boxes[:, i] for i in range(4))
+        x0, x1 = x0 + self.crop_left, x1 + self.crop_left
+        y0, y1 = y0 + self.crop_top, y1 + self.crop_top
+
+        if self.angle:
+            # Undo the rotation on all four corners and take their bounding box
+            theta = math.radians(self.angle)
+            cos, sin = math.cos(theta), math.sin(theta)
+            center_x, center_y = self.center
+            corners_x = np.stack([x0, x1, x1, x0]) - center_x
+            corners_y = np.stack([y0, y0, y1, y1]) - center_y
+            original_x = center_x + corners_x * cos - corners_y * sin
+            original_y = center_y + corners_x * sin + corners_y * cos
+            x0, x1 = original_x.min(axis=0), original_x.max(axis=0)
+            y0, y1 = original_y.min(axis=0), original_y.max(axis=0)
+
+        return np.stack([x0 * self.x_scale, y0 * self.y_scale, x1 * self.x_scale, y1 * self.y_scale], axis=1)
+
+
+def otsu_threshold(pixels):
+    """Otsu's threshold of a uint8 grayscale array, from its histogram in one vectorized pass."""
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    if not total:
+        return 128
+    levels = np.arange(256)
+    weight_background = np.cumsum(histogram)
+    weight_foreground = total - weight_background
+    cumulative_mean = np.cumsum(histogram * levels)
+    mean_background = cumulative_mean / np.maximum(weight_background, 1)
+    mean_foreground = (cumulative_mean[-1] - cumulative_mean) / np.maximum(weight_foreground, 1)
+    between_class_variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+    return int(np.argmax(between_class_variance))
+
+
+def ink_mask(gray):
+    """Dark pixels of a grayscale page, i.e. the text."""
+    return gray <= otsu_threshold(gray)
+
+
+class AdaptiveResolution:
+    """Picks the rendering DPI of a page from the height of its text lines, measured on a cheap low-DPI probe.
+
+    Tesseract is most accurate with text lines around target_line_height pixels tall,
+    rendering larger only costs time. The line height is the median height of the ink
+    row runs of the probe's horizontal projection profile. Pages without detectable
+    lines are rendered at max_resolution.
+    """
+
+    def __init__(self, probe_resolution=72, target_line_height=40, min_resolution=150, max_resolution=500):
+        self.probe_resolution = probe_resolution
+        self.target_line_height = target_line_height
+        self.min_resolution = min_resolution
+        self.max_resolution = max_resolution
+
+    def settings(self):
+        return ('adaptive', self.probe_resolution, self.target_line_height, self.min_resolution, self.max_resolution)
+
+    def choose(self, page):
+        probe = np.asarray(page.to_image(resolution=self.probe_resolution).original.convert('L'))
+        line_height = self.line_height(probe)
+        if line_height is None:
+            return self.max_resolution
+        line_height_points = line_height * 72 / self.probe_resolution
+        resolution = self.target_line_height * 72 / line_height_points
+        return int(min(self.max_resolution, max(self.min_resolution, round(resolution))))
+
+    @staticmethod
+    def line_height(gray):
+        """Median height in pixels of the text lines of a grayscale image, None without text."""
+        rows_with_ink = ink_mask(gray).mean(axis=1) > 0.002
+        # Starts and ends of every run of consecutive ink rows
+        edges = np.diff(np.concatenate(([0], rows_with_ink.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        heights = ends - starts
+        # Runs of one or two rows are rules and noise at probe resolution
+        heights = heights[heights >= 3]
+        if not len(heights):
+            return None
+        return float(np.median(heights))
+
+
+class ImagePreprocessor:
+    """Prepares a rendered page for OCR: grayscale or binary, deskewed and cropped to its content.
+
+    All steps work on NumPy arrays, the rotation is a single PIL call. process() returns
+    the image to OCR and the PageTransform that maps its word boxes back to the page.
+    """
+
+    def __init__(self, mode='gray', deskew=True, crop=True, crop_margin=16, max_skew=5.0, skew_step=0.2, skew_sample=200000):
+        if mode not in ('gray', 'binary'):
+            raise ValueError(f"Unsupported preprocessing mode: {mode}")
+        self.mode = mode
+        self.deskew = deskew
+        self.crop = crop
+        self.crop_margin = crop_margin
+        self.max_skew = max_skew
+        self.skew_step = skew_step
+        self.skew_sample = skew_sample
+
+    def settings(self):
+        return (self.mode, self.deskew, self.crop, self.crop_margin, self.max_skew, self.skew_step)
+
+    def process(self, image, page):
+        transform = PageTransform.for_image(page, image)
+        gray = np.asarray(image.convert('L'))
+        ink = ink_mask(gray)
+
+        if self.deskew:
+            angle = self.estimate_skew(ink)
+            if abs(angle) >= self.skew_step / 2:
+                transform.angle = angle
+                transform.center = (gray.shape[1] / 2, gray.shape[0] / 2)
+                gray = np.asarray(Image.fromarray(gray).rotate(angle, resample=Image.BILINEAR, fillcolor=255))
+                ink = ink_mask(gray)
+
+        if self.mode == 'binary':
+            gray = np.where(ink, 0, 255).astype(np.uint8)
+
+        if self.crop:
+            rows, columns = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+            if len(rows):
+                top, bottom = max(0, rows[0] - self.crop_margin), min(gray.shape[0], rows[-1] + 1 + self.crop_margin)
+                left, right = max(0, columns[0] - self.crop_margin), min(gray.shape[1], columns[-1] + 1 + self.crop_margin)
+                gray = gray[top:bottom, left:right]
+                transform.crop_left, transform.crop_top = int(left), int(top)
+
+        return Image.fromarray(np.ascontiguousarray(gray)), transform
+
+    def estimate_skew(self, ink):
+        """Angle (degrees, counterclockwise) that levels the text lines.
+
+        Projects the ink pixels onto rows for every candidate angle and keeps the angle
+        whose row histogram is the sharpest, i.e. has the largest sum of squares.
+        """
+        ys, xs = np.nonzero(ink)
+        if len(ys) < 100:
+            return 0.0
+        if len(ys) > self.skew_sample:
+            stride = len(ys) // self.skew_sample + 1
+            ys, xs = ys[::stride], xs[::stride]
+
+        angles = np.arange(-self.max_skew, self.max_skew + self.skew_step / 2, self.skew_step)
+        tangents = np.tan(np.radians(angles))
+        best_angle, best_score = 0.0, -1.0
+        for angle, tangent in zip(angles, tangents):
+            # Text lines running down to the right by angle (y points down) collapse onto single rows
+            projected = np.round(ys - xs * tangent).astype(np.int64)
+            counts = np.bincount(projected - projected.min())
+            score = float(np.dot(counts, counts))
+            if score > best_score:
+                best_angle, best_score = float(angle), score
+        return best_angle
@@ -1,14 +1,32 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
 import pytesseract
 from pytesseract import Output
 
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor.image_preprocessor import PageTransform
+
 class PageToImageConverter:
 
     @staticmethod
     def convert(page, resolution):
         return page.to_image(resolution=resolution).original
 
+
+def _page_boxes(ocr_data, indices, image, page, transform=None):
+    """PDF page boxes (x0, top, x1, bottom) of the given OCR words.
+
+    Without a transform the image is the whole rendered page and the boxes are only scaled.
+    """
+    transform = transform or PageTransform.for_image(page, image)
+    left = np.asarray([ocr_data['left'][i] for i in indices], dtype=np.float64)
+    top = np.asarray([ocr_data['top'][i] for i in indices], dtype=np.float64)
+    width = np.asarray([ocr_data['width'][i] for i in indices], dtype=np.float64)
+    height = np.asarray([ocr_data['height'][i] for i in indices], dtype=np.float64)
+    return transform.map_boxes(np.stack([left, top, left + width, top + height], axis=1)).tolist()
+
+
 class ImageProcessor(ABC):
 
     @abstractmethod
@@ -26,26 +44,53 @@ class ImageTextProcessor(ImageProcessor):
 class ImageCoordinateProcessor(ImageProcessor):
     """Processes an image to extract word coordinates and scales them to the original PDF."""
 
-    def process(self, image, page, page_number, lang):
-        ocr_data = pytesseract.image_to_data(image, output_type=Output.DICT, lang=lang)
-        words_info = []
-
-        # Scale factors to adjust OCR bounding boxes to the PDF page size
-        x_scale = page.width / image.width
-        y_scale = page.height / image.height
-
-        for i in range(len(ocr_data['text'])):
-            if ocr_data['text'][i].strip():  # Ignore empty text results
-                word_info = {
-                    'text': ocr_data['text'][i],
-                    'start_x': ocr_data['left'][i] * x_scale,
-                    'start_y': ocr_data['top'][i] * y_scale,
-                    'end_x': (ocr_data['left'][i] + ocr_data['width'][i]) * x_scale,
-                    'end_y': (ocr_data['top'][i] + ocr_data['height'][i]) * y_scale,
-                    'page_number': page_number
-                }
-                words_info.append(word_info)
-
-        return words_info
-    
+    def process(self, image, page, page_number, lang, ocr_config='', transform=None):
+        ocr_data = pytesseract.image_to_data(image, output_type=Output.DICT, lang=lang, config=ocr_config)
+        words = WordStoreBuilder()
+
+        kept = [i for i in range(len(ocr_data['text'])) if ocr_data['text'][i].strip()]  # Ignore empty text results
+        for i, box in zip(kept, _page_boxes(ocr_data, kept, image, page, transform)):
+            words.add_word(ocr_data['text'][i], *box, page_number)
+
+        return words.build()
+
+
+class ImageOCRProcessor(ImageProcessor):
+    """Runs Tesseract once per image and derives both the page text and the word coordinates from the same result."""
+
+    def process(self, image, page, page_number, lang, ocr_config='', transform=None):
+        ocr_data = pytesseract.image_to_data(image, output_type=Output.DICT, lang=lang, config=ocr_config)
+        words = WordStoreBuilder()
+
+        kept = [i for i in range(len(ocr_data['text'])) if ocr_data['text'][i].strip()]  # Ignore empty text results
+        page_boxes = _page_boxes(ocr_data, kept, image, page, transform)
+
+        # Rebuild the reading order text the way image_to_string lays it out:
+        # words joined by spaces, lines by newlines and paragraphs by a blank line.
+        # Each word keeps the character offsets of its position in that text.
+        text_parts = []
+        position = 0
+        current_paragraph, current_line = None, None
+        for i, box in zip(kept, page_boxes):
+            word = ocr_data['text'][i].strip()
+
+            paragraph_key = (ocr_data['block_num'][i], ocr_data['par_num'][i])
+            line_key = paragraph_key + (ocr_data['line_num'][i],)
+            if current_paragraph is None:
+                separator = ""
+            elif paragraph_key != current_paragraph:
+                separator = "\n\n"
+            elif line_key != current_line:
+                separator = "\n"
+            else:
+                separator = " "
+            current_paragraph, current_line = paragraph_key, line_key
+
+            text_parts.append(separator)
+            text_parts.append(word)
+            position += len(separator)
+
+            words.add_word(word, *box, page_number, position, position + len(word))
+            position += len(word)
 
+        return "".join(text_parts) + "\n\f", words.build()
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+class OCRResultCache:
+    """Content-addressed on-disk cache of per-page extraction results.
+
+    Entries are keyed by the file content hash, the page index and the extraction
+    settings, and stored as compressed .npz files. Writes go through a temporary file
+    and an atomic rename, so concurrent writers never expose a partial entry. When the
+    cache grows past max_bytes the least recently used entries are deleted, down to
+    low_water of max_bytes.
+
+    The cache size is a running total kept by each instance, so a put does not scan the
+    directory. The directory is scanned on the first put, when the total passes
+    max_bytes, and every rescan_interval puts to pick up what other processes wrote.
+    """
+
+    def __init__(self, cache_dir, max_bytes=1024 * 1024 * 1024, low_water=0.9, rescan_interval=1000):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.rescan_interval = rescan_interval
+        self.total_bytes = None
+        self.puts_since_scan = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def hash_file(file_path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(file_hash, page_number, settings):
+        """settings holds everything that changes the page result: resolution, language, OCR config, ..."""
+        payload = json.dumps([file_hash, page_number, list(settings)], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.npz"
+
+    def get(self, key):
+        """Returns (page_text, word_data, page_stat) or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                word_data = WordStore(
+                    texts=entry['texts'].tolist(),
+                    text_ids=entry['text_ids'],
+                    boxes=entry['boxes'],
+                    page_numbers=entry['page_numbers'],
+                    char_offsets=entry['char_offsets'],
+                )
+                page_text = str(entry['page_text'])
+                page_stat = json.loads(str(entry['page_stat']))
+            # Reads refresh the modification time, which is what eviction orders by
+            os.utime(path)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # Missing, evicted in the meantime or corrupted entries are all misses
+            return None
+        return page_text, word_data, page_stat
+
+    def put(self, key, page_text, word_data, page_stat):
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced_size = path.stat().st_size
+        except OSError:
+            replaced_size = 0
+
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                np.savez_compressed(
+                    file,
+                    page_text=np.array(page_text),
+                    page_stat=np.array(json.dumps(page_stat)),
+                    texts=np.array(word_data.texts, dtype=str),
+                    text_ids=word_data.text_ids,
+                    boxes=word_data.boxes,
+                    page_numbers=word_data.page_numbers,
+                    char_offsets=word_data.char_offsets,
+                )
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        self.puts_since_scan += 1
+        if self.total_bytes is None or self.puts_since_scan >= self.rescan_interval:
+            self.evict()
+        else:
+            self.total_bytes += size - replaced_size
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Scans the cache and, when it is larger than max_bytes, deletes the least recently used entries down to the low water mark."""
+        self.puts_since_scan = 0
+        entries = []
+        total_size = 0
+        for path in self.cache_dir.glob('*/*.npz'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        self.total_bytes = total_size
+        if total_size <= self.max_bytes:
+            return
+
+        target_size = self.max_bytes * self.low_water
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except OSError:
+                # Already evicted by another writer
+                pass
+            total_size -= size
+            if total_size <= target_size:
+                break
+        self.total_bytes = total_size
+
+    def clear(self):
+        for path in self.cache_dir.glob('*/*.npz'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        self.total_bytes = 0
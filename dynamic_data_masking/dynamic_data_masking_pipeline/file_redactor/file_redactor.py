@@ -1,21 +1,26 @@
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor import RedactionStrategyFactory
-from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.word_data_mapper import WordDataMapper
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.comparison import DefaultComparisonStrategy, WordDifferenceFinder
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
 
 class DynamicDataMaskingFileRedactor:
     def __init__(self, comparison_strategy=None, redaction_strategy="blackout"):
         self.comparison_strategy = comparison_strategy or DefaultComparisonStrategy()
         self.redaction_strategy = RedactionStrategyFactory.get_redaction_strategy(redaction_strategy)
 
-    def redact_file(self, input_file_path, extracted_text, masked_text, words_info, output_pdf_path):
+    def redact_file(self, input_file_path, extracted_text, masked_text, words_info, output_pdf_path, analyzer_results=None, page_images=None):
+        if not isinstance(words_info, WordStore):
+            words_info = WordStore.from_words(words_info)
+
         # Step 1: Identify differing words
         difference_finder = WordDifferenceFinder(self.comparison_strategy)
-        differing_words = difference_finder.find_differing_words(extracted_text, masked_text)
+        differing_words = difference_finder.find_differing_words(extracted_text, masked_text, analyzer_results=analyzer_results)
 
         # Step 2: Map words to coordinates
-        data_mapper = WordDataMapper(words_info)
+        data_mapper = self.comparison_strategy.get_data_mapper(words_info)
         differing_words_data = data_mapper.get_word_coordinates(differing_words)
 
         # Step 3: Apply redaction strategy
-        self.redaction_strategy.apply_redaction(input_file_path, differing_words_data, output_pdf_path)
+        if self.redaction_strategy.uses_page_images:
+            return self.redaction_strategy.apply_redaction(input_file_path, differing_words_data, output_pdf_path, page_images=page_images)
+        return self.redaction_strategy.apply_redaction(input_file_path, differing_words_data, output_pdf_path)
         
\ No newline at end of file
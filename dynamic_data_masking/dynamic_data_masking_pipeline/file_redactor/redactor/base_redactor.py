@@ -1,6 +1,27 @@
 from abc import ABC, abstractmethod
+from io import BytesIO
 
 class RedactionStrategy(ABC):
+    # Strategies that paint the page images kept during extraction receive them as page_images
+    uses_page_images = False
+
     @abstractmethod
     def apply_redaction(self, input_pdf_path, differing_words_data, output_pdf_path):
-        pass
\ No newline at end of file
+        pass
+
+    @staticmethod
+    def open_input(input_pdf):
+        """Accepts a file path, a binary file object or the raw PDF bytes."""
+        if isinstance(input_pdf, (bytes, bytearray, memoryview)):
+            return BytesIO(input_pdf)
+        return input_pdf
+
+    @staticmethod
+    def write_output(writer, output_pdf):
+        """Writes to a file path or binary file object, or returns the PDF bytes when output_pdf is None."""
+        if output_pdf is None:
+            buffer = BytesIO()
+            writer.write(buffer)
+            return buffer.getvalue()
+        writer.write(output_pdf)
+        return None
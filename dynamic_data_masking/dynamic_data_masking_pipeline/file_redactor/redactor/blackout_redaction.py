@@ -1,42 +1,73 @@
-import pdfplumber
+import logging
+from io import BytesIO
+
+import numpy as np
 from reportlab.pdfgen import canvas
 from PyPDF2 import PdfWriter, PdfReader
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.base_redactor import RedactionStrategy
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+logger = logging.getLogger(__name__)
 
 class BlackoutRedaction(RedactionStrategy):
+    """Draws black boxes over the redacted words, building each overlay in memory.
+
+    The word boxes are pdfplumber coordinates, measured from the top left of the mediabox on
+    the rotated page; the overlay is merged into the unrotated page content, so they are
+    mapped to its PDF user space first.
+    """
+
     def apply_redaction(self, input_pdf_path, differing_words_data, output_pdf_path):
-        temp_pdf_path = "temp_overlay.pdf"
+        input_pdf = PdfReader(self.open_input(input_pdf_path))
+        writer = PdfWriter()
+        pages_to_redact = set(differing_words_data.pages())
 
-        with pdfplumber.open(input_pdf_path) as pdf:
-            overlay = canvas.Canvas(temp_pdf_path)
+        for page_num, page in enumerate(input_pdf.pages, start=1):
+            # Pages without hits are copied as they are
+            if page_num in pages_to_redact:
+                boxes = differing_words_data.page_boxes(page_num)
+                with span('redact.overlay', items=len(boxes), page_number=page_num):
+                    overlay = self._build_overlay(page, boxes)
+                with span('redact.merge', page_number=page_num):
+                    page.merge_page(overlay)
+            writer.add_page(page)
 
-            for page_num, page in enumerate(pdf.pages, start=1):
-                page_width, page_height = page.width, page.height
-                overlay.setPageSize((page_width, page_height))
+        logger.info("black out strategy", extra={'pages': len(input_pdf.pages), 'redacted_pages': len(pages_to_redact)})
+        with span('redact.write', items=len(input_pdf.pages)):
+            return self.write_output(writer, output_pdf_path)
 
-                # Find words to redact on this page
-                words_on_page = [word for word in differing_words_data if word['page_number'] == page_num]
-                for word in words_on_page:
-                    x0, y0, x1, y1 = word['start_x'], word['start_y'], word['end_x'], word['end_y']
-                    overlay.setFillColor('black')
-                    overlay.setStrokeColor('black')
-                    overlay.setLineWidth(0.5)
-                    overlay.rect(x0, page_height - y1, x1 - x0, y1 - y0, fill=1)
+    @staticmethod
+    def to_pdf_rects(boxes, page):
+        """Maps (n, 4) pdfplumber boxes of page to (x, y, width, height) rectangles in its unrotated PDF user space.
 
-                overlay.showPage()
-                print('black out strategy')
+        Inverts the transform pdfplumber applies through pdfminer: the page rotation, and
+        y measured down from the mediabox height.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x0, top, x1, bottom = (boxes[:, i] for i in range(4))
+        left, lower, right, upper = (float(value) for value in (page.mediabox.left, page.mediabox.bottom, page.mediabox.right, page.mediabox.top))
+        rotation = (page.get('/Rotate') or 0) % 360
+        if rotation == 90:
+            xs, ys = (2 * left + top, 2 * left + bottom), (x0, x1)
+        elif rotation == 180:
+            xs, ys = (left + right - x1, left + right - x0), (2 * lower + top, 2 * lower + bottom)
+        elif rotation == 270:
+            xs, ys = (right - left - bottom, right - left - top), (lower + upper - x1, lower + upper - x0)
+        else:
+            xs, ys = (x0, x1), (upper - lower - bottom, upper - lower - top)
+        return np.stack([xs[0], ys[0], xs[1] - xs[0], ys[1] - ys[0]], axis=1)
 
-            overlay.save()
-            print('file saved')
+    @classmethod
+    def _build_overlay(cls, page, boxes):
+        buffer = BytesIO()
+        overlay = canvas.Canvas(buffer, pagesize=(float(page.mediabox.right), float(page.mediabox.top)))
+        overlay.setFillColor('black')
+        overlay.setStrokeColor('black')
+        overlay.setLineWidth(0.5)
 
-        input_pdf = PdfReader(input_pdf_path)
-        overlay_pdf = PdfReader(temp_pdf_path)
-        writer = PdfWriter()
+        for x, y, width, height in cls.to_pdf_rects(boxes, page).tolist():
+            overlay.rect(x, y, width, height, fill=1)
 
-        for i, page in enumerate(input_pdf.pages):
-            if i < len(overlay_pdf.pages):
-                page.merge_page(overlay_pdf.pages[i])
-            writer.add_page(page)
-            
-        with open(output_pdf_path, "wb") as output_file:
-            writer.write(output_file)
\ No newline at end of file
+        overlay.showPage()
+        overlay.save()
+        return PdfReader(buffer).pages[0]
@@ -0,0 +1,85 @@
+import logging
+
+import numpy as np
+import pymupdf
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.base_redactor import RedactionStrategy
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+class ContentRemovalRedaction(RedactionStrategy):
+    """Removes the text and image content under the redaction boxes from the page content streams, then fills the boxes.
+
+    Unlike the blackout overlay nothing stays extractable underneath, so the output
+    does not need to be rasterized to be compliant. Pages without hits are left as they are.
+    The word boxes are pdfplumber coordinates, i.e. measured from the top left of the
+    mediabox on the rotated page; they are converted to PyMuPDF's unrotated, cropbox
+    relative coordinates before redacting.
+    """
+
+    def __init__(self, fill=(0, 0, 0), images=pymupdf.PDF_REDACT_IMAGE_PIXELS):
+        self.fill = fill
+        self.images = images
+
+    def apply_redaction(self, input_pdf_path, differing_words_data, output_pdf_path):
+        document = self._open_document(self.open_input(input_pdf_path))
+
+        for page_num in differing_words_data.pages():
+            page = document[page_num - 1]
+            boxes = differing_words_data.page_boxes(page_num)
+            with span('redact.content_removal', items=len(boxes), page_number=page_num):
+                rects = [pymupdf.Rect(box) for box in self.to_pymupdf_boxes(boxes, page).tolist()]
+                for rect in rects:
+                    page.add_redact_annot(rect, fill=self.fill)
+                # Drops text-show operators and blanks image pixels inside the boxes
+                page.apply_redactions(images=self.images)
+                self._check_removed(page, page_num, rects)
+
+        logger.info("content removal strategy", extra={'redacted_pages': len(differing_words_data.pages())})
+        with span('redact.write', items=len(document)):
+            return self._write_document(document, output_pdf_path)
+
+    @staticmethod
+    def to_pymupdf_boxes(boxes, page):
+        """Maps (n, 4) pdfplumber boxes of page to PyMuPDF's unrotated page coordinates."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x0, top, x1, bottom = (boxes[:, i] for i in range(4))
+        width, height = page.mediabox.width, page.mediabox.height
+        # Undo the page rotation pdfplumber applies, within the mediabox
+        rotation = page.rotation % 360
+        if rotation == 90:
+            x0, top, x1, bottom = top, height - x1, bottom, height - x0
+        elif rotation == 180:
+            x0, top, x1, bottom = width - x1, height - bottom, width - x0, height - top
+        elif rotation == 270:
+            x0, top, x1, bottom = width - bottom, x0, width - top, x1
+        # PyMuPDF measures from the top left of the cropbox
+        crop_left, crop_top = page.cropbox.x0, page.cropbox.y0
+        return np.stack([x0 - crop_left, top - crop_top, x1 - crop_left, bottom - crop_top], axis=1)
+
+    @staticmethod
+    def _check_removed(page, page_num, rects):
+        for rect in rects:
+            remaining = page.get_textbox(rect).strip()
+            if remaining:
+                raise RuntimeError(f"Text left inside a redaction box on page {page_num}")
+
+    @staticmethod
+    def _open_document(source):
+        if hasattr(source, 'read'):
+            return pymupdf.open(stream=source.read(), filetype='pdf')
+        return pymupdf.open(source)
+
+    @staticmethod
+    def _write_document(document, output_pdf):
+        pdf_bytes = document.tobytes(deflate=True)
+        document.close()
+        if output_pdf is None:
+            return pdf_bytes
+        if hasattr(output_pdf, 'write'):
+            output_pdf.write(pdf_bytes)
+        else:
+            with open(output_pdf, 'wb') as output_file:
+                output_file.write(pdf_bytes)
+        return None
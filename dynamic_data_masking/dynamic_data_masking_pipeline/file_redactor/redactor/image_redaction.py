@@ -0,0 +1,96 @@
+import logging
+from io import BytesIO
+
+import numpy as np
+import pdfplumber
+from PIL import Image
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.base_redactor import RedactionStrategy
+
+logger = logging.getLogger(__name__)
+
+class ImageRedaction(RedactionStrategy):
+    """Paints the redaction boxes in pixel space and writes the output PDF straight from the page images.
+
+    Reuses the images rendered during extraction when they are handed over, so scanned
+    documents need no second parse or rendering pass. Pages without a kept image are
+    rendered from the input. The output holds no text layer at all.
+    """
+
+    uses_page_images = True
+    default_resolution = 200
+
+    def __init__(self, resolution=None, image_mode='L', quality=75):
+        # None keeps the resolution of the images kept during extraction
+        self.resolution = resolution
+        self.image_mode = image_mode
+        self.quality = quality
+
+    def apply_redaction(self, input_pdf_path, differing_words_data, output_pdf_path, page_images=None):
+        page_images = list(page_images or [])
+        dpi = self.resolution or self._kept_resolution(page_images) or self.default_resolution
+        if not page_images or any(entry is None for entry in page_images):
+            page_images = self._render_missing_pages(input_pdf_path, page_images, dpi)
+
+        output_images = []
+        for page_num, (image, page_width, page_height) in enumerate(page_images, start=1):
+            image = self._resize(image, page_width, page_height, dpi)
+            # Bilevel output is painted in grayscale and thresholded when converting back
+            pixels = np.array(image.convert('L' if self.image_mode == '1' else self.image_mode))
+            boxes = differing_words_data.page_boxes(page_num)
+            if len(boxes):
+                mask = self._box_mask(boxes, pixels.shape[:2], image.width / page_width, image.height / page_height)
+                pixels[mask] = 0
+            output_images.append(Image.fromarray(pixels).convert(self.image_mode))
+
+        # PIL uses one resolution for the whole file, which is why every page was resized to the same dpi
+        first, rest = output_images[0], output_images[1:]
+        logger.info("image strategy", extra={'pages': len(output_images), 'resolution': dpi})
+
+        save_options = dict(format='PDF', save_all=True, append_images=rest, resolution=dpi, quality=self.quality)
+        if output_pdf_path is None:
+            buffer = BytesIO()
+            first.save(buffer, **save_options)
+            return buffer.getvalue()
+        first.save(output_pdf_path, **save_options)
+        return None
+
+    @staticmethod
+    def _kept_resolution(page_images):
+        for entry in page_images:
+            if entry is not None:
+                image, page_width, _ = entry
+                return image.width / page_width * 72
+        return None
+
+    @staticmethod
+    def _resize(image, page_width, page_height, dpi):
+        size = (max(1, round(page_width * dpi / 72)), max(1, round(page_height * dpi / 72)))
+        return image if image.size == size else image.resize(size)
+
+    @staticmethod
+    def _box_mask(boxes, shape, x_scale, y_scale):
+        """Rasterizes all boxes at once with a 2D difference array instead of one slice assignment per box."""
+        height, width = shape
+        x0 = np.clip(np.floor(boxes[:, 0] * x_scale), 0, width).astype(np.intp)
+        y0 = np.clip(np.floor(boxes[:, 1] * y_scale), 0, height).astype(np.intp)
+        x1 = np.clip(np.ceil(boxes[:, 2] * x_scale), 0, width).astype(np.intp)
+        y1 = np.clip(np.ceil(boxes[:, 3] * y_scale), 0, height).astype(np.intp)
+
+        difference = np.zeros((height + 1, width + 1), dtype=np.int32)
+        np.add.at(difference, (y0, x0), 1)
+        np.add.at(difference, (y0, x1), -1)
+        np.add.at(difference, (y1, x0), -1)
+        np.add.at(difference, (y1, x1), 1)
+        coverage = difference.cumsum(axis=0).cumsum(axis=1)
+        return coverage[:height, :width] > 0
+
+    def _render_missing_pages(self, input_pdf_path, page_images, dpi):
+        with pdfplumber.open(self.open_input(input_pdf_path)) as pdf:
+            rendered = []
+            for page_num, page in enumerate(pdf.pages, start=1):
+                entry = page_images[page_num - 1] if page_num <= len(page_images) else None
+                if entry is None:
+                    entry = (page.to_image(resolution=dpi).original, float(page.width), float(page.height))
+                rendered.append(entry)
+        return rendered
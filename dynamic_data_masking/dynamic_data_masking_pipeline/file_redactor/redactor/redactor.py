@@ -1,10 +1,14 @@
 from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.blackout_redaction import BlackoutRedaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.content_removal_redaction import ContentRemovalRedaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.image_redaction import ImageRedaction
 
 class RedactionStrategyFactory:
     @staticmethod
     def get_redaction_strategy(strategy_type="blackout"):
         strategies = {
-            "blackout": BlackoutRedaction()
+            "blackout": BlackoutRedaction(),
+            "content_removal": ContentRemovalRedaction(),
+            "image": ImageRedaction()
             # Future strategies: "blur": BlurRedaction(), "replace": ReplaceTextRedaction()
         }
         return strategies.get(strategy_type, BlackoutRedaction())
\ No newline at end of file
@@ -1,20 +1,57 @@
 from abc import ABC, abstractmethod
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.word_data_mapper import WordDataMapper
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.word_offset_mapper import WordOffsetMapper
+
 class WordDifferenceFinder:
     def __init__(self, comparison_strategy):
         self.comparison_strategy = comparison_strategy
 
-    def find_differing_words(self, original_text, masked_text):
-        return self.comparison_strategy.compare(original_text, masked_text)
+    def find_differing_words(self, original_text, masked_text, analyzer_results=None):
+        return self.comparison_strategy.compare(original_text, masked_text, analyzer_results=analyzer_results)
     
 class ComparisonStrategy(ABC):
     @abstractmethod
-    def compare(self, original_text, masked_text):
+    def compare(self, original_text, masked_text, analyzer_results=None):
         pass
 
+    def get_data_mapper(self, words_info):
+        """Returns the mapper that turns the output of compare() into word coordinates."""
+        return WordDataMapper(words_info)
+
 
 class DefaultComparisonStrategy(ComparisonStrategy):
-    def compare(self, original_text, masked_text):
+    def compare(self, original_text, masked_text, analyzer_results=None):
         original_words = set(original_text.lower().split())
         masked_words = set(masked_text.lower().split())
         return original_words.difference(masked_words)
-        
\ No newline at end of file
+
+
+class SpanComparisonStrategy(ComparisonStrategy):
+    """Uses the analyzer's character spans directly instead of diffing the original and masked text."""
+
+    def compare(self, original_text, masked_text, analyzer_results=None):
+        if analyzer_results is None:
+            raise ValueError("Span comparison needs the analyzer results.")
+
+        # Merge overlapping spans so each word is looked up once
+        spans = []
+        for start, end in sorted((result.start, result.end) for result in analyzer_results):
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        return [tuple(span) for span in spans]
+
+    def get_data_mapper(self, words_info):
+        return WordOffsetMapper(words_info)
+
+
+class ComparisonStrategyFactory:
+    @staticmethod
+    def get_comparison_strategy(strategy_type="span"):
+        strategies = {
+            "span": SpanComparisonStrategy(),
+            "word_diff": DefaultComparisonStrategy()
+        }
+        return strategies.get(strategy_type, SpanComparisonStrategy())
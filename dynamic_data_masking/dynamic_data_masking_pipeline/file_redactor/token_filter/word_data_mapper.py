@@ -1,19 +1,10 @@
-from collections import defaultdict
+import numpy as np
 
 class WordDataMapper:
     def __init__(self, words_info):
-        # Remove empty text entries
-        filtered_words_info = [word for word in words_info if word['text'].strip()]
-        self.word_data_map = self._build_word_data_map(filtered_words_info)
-
-    def _build_word_data_map(self, words_info):
-        word_data_map = defaultdict(list)
-        for word_data in words_info:
-            word_data_map[word_data['text'].lower()].append(word_data)
-        return word_data_map
+        # words_info is a WordStore, it never holds empty text entries
+        self.words_info = words_info
 
     def get_word_coordinates(self, differing_words):
-        differing_words_data = [
-            data for word in differing_words for data in self.word_data_map.get(word, [])
-        ]
-        return differing_words_data
\ No newline at end of file
+        indices = [self.words_info.find_text(word) for word in differing_words]
+        return self.words_info.select(np.concatenate(indices) if indices else [])
@@ -0,0 +1,32 @@
+import numpy as np
+
+class WordOffsetMapper:
+    """Maps character spans of the extracted text to the words covering them.
+
+    Relies on the char offsets recorded in the WordStore during extraction; words
+    come out of extraction in text order, so both offset columns are sorted and each
+    span is resolved with two binary searches.
+    """
+
+    def __init__(self, words_info):
+        self.words_info = words_info
+        starts, ends = words_info.char_starts, words_info.char_ends
+        self.order = None
+        if len(starts) and np.any(np.diff(starts) < 0):
+            self.order = np.argsort(starts, kind='stable')
+            starts, ends = starts[self.order], ends[self.order]
+        self.starts = starts
+        self.ends = ends
+
+    def get_word_indices(self, spans):
+        spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        firsts = np.searchsorted(self.ends, spans[:, 0], side='right')
+        lasts = np.searchsorted(self.starts, spans[:, 1], side='left')
+        indices = np.concatenate([np.arange(first, last) for first, last in zip(firsts, lasts)] or [np.empty(0, dtype=np.intp)])
+
+        # Words without a position in the text, i.e. an empty span, are never redacted by offset
+        indices = indices[self.ends[indices] > self.starts[indices]]
+        return indices if self.order is None else self.order[indices]
+
+    def get_word_coordinates(self, spans):
+        return self.words_info.select(self.get_word_indices(spans))
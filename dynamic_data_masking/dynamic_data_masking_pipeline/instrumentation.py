@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then left out
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class SpanRecord(dict):
+    """One timed span: name, parent, wall and thread CPU seconds, peak RSS at its end, item count and attributes."""
+
+    def set(self, **attributes):
+        self['attributes'].update(attributes)
+        return self
+
+    def add_items(self, count):
+        self['items'] = (self['items'] or 0) + count
+        return self
+
+
+class Instrumentation:
+    """Collects spans from every thread of the process and hands them to the exporters.
+
+    A disabled instrumentation still yields span records, so instrumented code never has
+    to check whether it is enabled; it just keeps nothing.
+    """
+
+    def __init__(self, exporters=(), enabled=True):
+        self.exporters = list(exporters)
+        self.enabled = enabled
+        self.records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name, items=None, **attributes):
+        stack = self._local.__dict__.setdefault('stack', [])
+        record = SpanRecord(name=name, parent=stack[-1]['name'] if stack else None, items=items, attributes=attributes)
+        stack.append(record)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        record['started_at'] = time.time()
+        try:
+            yield record
+        except BaseException as error:
+            record['error'] = type(error).__name__
+            raise
+        finally:
+            stack.pop()
+            record['wall_seconds'] = time.perf_counter() - wall_started
+            record['cpu_seconds'] = time.thread_time() - cpu_started
+            if self.enabled:
+                record['peak_rss_bytes'] = peak_rss_bytes()
+                record['process_id'] = os.getpid()
+                self.add_records([record])
+                logger.debug("span finished", extra={'span': dict(record)})
+
+    def add_records(self, records):
+        """Adds records collected elsewhere, e.g. by a worker process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.records.extend(records)
+
+    def take_records(self):
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+    def summary(self):
+        """Totals per span name: calls, wall and CPU seconds, items and the highest peak RSS seen."""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            total = totals.setdefault(record['name'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'items': 0, 'errors': 0, 'peak_rss_bytes': 0})
+            total['calls'] += 1
+            total['wall_seconds'] += record['wall_seconds']
+            total['cpu_seconds'] += record['cpu_seconds']
+            total['items'] += record['items'] or 0
+            total['errors'] += 'error' in record
+            total['peak_rss_bytes'] = max(total['peak_rss_bytes'], record.get('peak_rss_bytes') or 0)
+        return totals
+
+    def export(self):
+        """Writes the collected spans with every exporter and starts over."""
+        summary = self.summary()
+        records = self.take_records()
+        for exporter in self.exporters:
+            exporter.export(records, summary)
+
+
+class JsonLinesExporter:
+    """Appends every span as one JSON object per line."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def export(self, records, summary):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record, default=str) + '\n')
+
+
+class PrometheusTextExporter:
+    """Writes the span totals in the Prometheus text exposition format, e.g. for the node exporter textfile collector.
+
+    The file is replaced atomically, so a scrape never reads a partial file.
+    """
+
+    def __init__(self, path, prefix='ddm'):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def render(self, summary):
+        metrics = [
+            ('span_calls_total', 'counter', 'Number of finished spans.', 'calls'),
+            ('span_wall_seconds_total', 'counter', 'Wall clock time spent in spans.', 'wall_seconds'),
+            ('span_cpu_seconds_total', 'counter', 'Thread CPU time spent in spans.', 'cpu_seconds'),
+            ('span_items_total', 'counter', 'Items (pages, words, ...) processed in spans.', 'items'),
+            ('span_errors_total', 'counter', 'Spans that ended with an exception.', 'errors'),
+            ('span_peak_rss_bytes', 'gauge', 'Highest process peak RSS observed at the end of a span.', 'peak_rss_bytes'),
+        ]
+        lines = []
+        for name, metric_type, help_text, key in metrics:
+            lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {self.prefix}_{name} {metric_type}")
+            for span_name, total in sorted(summary.items()):
+                label = span_name.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{self.prefix}_{name}{{span="{label}"}} {total[key]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, records, summary):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'w', encoding='utf-8') as file:
+            file.write(self.render(summary))
+        os.replace(temp_path, self.path)
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Formats log records as JSON objects, including the fields passed with extra=."""
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def configure_logging(level='INFO', json_format=False):
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonLogFormatter() if json_format else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+
+# Process wide instrumentation, disabled until enable_instrumentation is called
+_instrumentation = Instrumentation(enabled=False)
+
+def get_instrumentation():
+    return _instrumentation
+
+
+def enable_instrumentation(exporters=()):
+    global _instrumentation
+    _instrumentation = Instrumentation(exporters=exporters)
+    return _instrumentation
+
+
+def span(name, items=None, **attributes):
+    """Times a block with the process wide instrumentation: with span('pdf.render', page_number=3) as record: ..."""
+    return _instrumentation.span(name, items=items, **attributes)
@@ -19,3 +19,13 @@ ANONYMIZER = {
     'no':False
 }
 
+OCR_MODE = {
+    'single_pass':True,
+    'two_pass':False
+}
+
+OCR_PREPROCESSING = {
+    'none':None,
+    'gray':'gray',
+    'binary':'binary'
+}
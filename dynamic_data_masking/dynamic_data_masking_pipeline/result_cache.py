@@ -0,0 +1,115 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+class MaskingResultCache:
+    """Memoizes analyzer and anonymizer results of short, repeating values.
+
+    Values are keyed by a digest of (namespace, engine fingerprint, language, text), where
+    the text is stripped of surrounding whitespace and callers re-base offsets onto the
+    original text. The memory tier is an LRU bounded by entry count and by the approximate
+    size of the stored values; the optional disk tier is an SQLite file that several
+    processes can share. Texts longer than max_text_length bypass the cache, whole
+    documents rarely repeat and would only push the short values out.
+    """
+
+    def __init__(self, max_entries=100000, max_bytes=256 * 1024 * 1024, disk_path=None, max_text_length=10000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_text_length = max_text_length
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("CREATE TABLE IF NOT EXISTS masking_results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @staticmethod
+    def fingerprint(*parts):
+        """Digest of everything that changes an engine's output: configuration keys, config file contents, ..."""
+        return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def normalize(text):
+        """Splits text into (leading whitespace, stripped text)."""
+        stripped = text.strip()
+        return text[:len(text) - len(text.lstrip())], stripped
+
+    def cacheable(self, text):
+        return len(text) <= self.max_text_length
+
+    @staticmethod
+    def make_key(namespace, fingerprint, language, text, *extra):
+        payload = json.dumps([namespace, fingerprint, language, text, *extra], ensure_ascii=False, default=str)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Returns the stored JSON-compatible value or None."""
+        with self._lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(value)
+
+        if self._disk is not None:
+            with self._lock:
+                row = self._disk.execute("SELECT value FROM masking_results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._store(key, row[0])
+                with self._lock:
+                    self.disk_hits += 1
+                return json.loads(row[0])
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+        self._store(key, value)
+        if self._disk is not None:
+            with self._lock:
+                self._disk.execute("INSERT OR REPLACE INTO masking_results (key, value) VALUES (?, ?)", (key, value))
+
+    def _store(self, key, value):
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(key) + len(previous)
+            self.entries[key] = value
+            self.size += len(key) + len(value)
+            while self.entries and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+                evicted_key, evicted_value = self.entries.popitem(last=False)
+                self.size -= len(evicted_key) + len(evicted_value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.size,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM masking_results")
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
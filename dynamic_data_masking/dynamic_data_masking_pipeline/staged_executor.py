@@ -0,0 +1,296 @@
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import FileProcessorStep, AnalyzerStep
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import span
+
+_END = object()
+_STOPPED = object()
+
+class StageError:
+    """Takes the place of a work item that failed in a stage, so the failure flows downstream instead of blocking it."""
+
+    def __init__(self, stage, error, document_id=None, page_number=None):
+        self.stage = stage
+        self.error = error
+        self.document_id = document_id
+        self.page_number = page_number
+
+    def __repr__(self):
+        return f"StageError(stage={self.stage!r}, document_id={self.document_id!r}, page_number={self.page_number!r}, error={self.error!r})"
+
+
+class DocumentEnd:
+    """Sent after the last page of a document, page_count tells the assembly stage how many pages to wait for."""
+
+    def __init__(self, document, page_count, error=None):
+        self.document = document
+        self.page_count = page_count
+        self.error = error
+        self.document_id = document["document_id"]
+
+
+class PipelineStage(ABC):
+    """A stage of the staged executor: process(item) yields the items handed to the next stage.
+
+    Stages without handles_control_items pass StageError and DocumentEnd items straight through.
+    """
+
+    handles_control_items = False
+
+    def __init__(self, name, workers=1):
+        self.name = name
+        self.workers = workers
+
+    @abstractmethod
+    def process(self, item):
+        pass
+
+
+class StepStage(PipelineStage):
+    """Runs a PipelineStep on every work item."""
+
+    def __init__(self, step, workers=1, name=None):
+        super().__init__(name or type(step).__name__, workers)
+        self.step = step
+
+    def process(self, item):
+        with span(f"stage.{self.name}", document_id=item.get("document_id"), page_number=item.get("page_number")):
+            result = self.step.execute(item)
+        yield result
+
+
+class PageExtractionStage(PipelineStage):
+    """Turns document work items into page work items as soon as each page is extracted."""
+
+    def __init__(self, step, workers=1, name='FileProcessorStep'):
+        super().__init__(name, workers)
+        self.step = step
+
+    def process(self, document):
+        page_count = 0
+        try:
+            for page in self.step.iter_pages(document):
+                page_count += 1
+                page["document_id"] = document["document_id"]
+                page["page_number"] = page_count
+                yield page
+        except Exception as error:
+            yield DocumentEnd(document, page_count, StageError(self.name, error, document["document_id"]))
+            return
+        yield DocumentEnd(document, page_count)
+
+
+class DocumentAssemblyStage(PipelineStage):
+    """Collects the page items of each document and emits the document once all of its pages went through."""
+
+    handles_control_items = True
+
+    def __init__(self, name='DocumentAssembly'):
+        # Keeps per document state, so a single worker
+        super().__init__(name, workers=1)
+        self.documents = {}
+
+    def process(self, item):
+        if isinstance(item, StageError) and (item.document_id is None or item.page_number is None):
+            # Not the failure of a single page, nothing to wait for
+            yield item
+            return
+
+        document_id = item["document_id"] if isinstance(item, dict) else item.document_id
+        state = self.documents.setdefault(document_id, {"pages": {}, "errors": [], "received": 0, "end": None})
+        if isinstance(item, DocumentEnd):
+            state["end"] = item
+            if item.error is not None:
+                state["errors"].append(item.error)
+        elif isinstance(item, StageError):
+            state["errors"].append(item)
+            state["received"] += 1
+        else:
+            state["pages"][item["page_number"]] = item
+            state["received"] += 1
+
+        # Pages can overtake the end marker when an earlier stage runs several workers
+        end = state["end"]
+        if end is None or state["received"] < end.page_count:
+            return
+        del self.documents[document_id]
+        if state["errors"]:
+            yield state["errors"][0]
+        else:
+            yield self.assemble(end.document, state["pages"])
+
+    @staticmethod
+    def assemble(document, pages):
+        """Joins the page items into the document dict the document level steps expect."""
+        page_texts = []
+        word_data = WordStoreBuilder()
+        analysis_results = []
+        page_stats = []
+        page_images = []
+        page_offset = 0
+        for page_number in sorted(pages):
+            page = pages[page_number]
+            word_data.add_store(page["word_coordinates"], char_offset=page_offset)
+            for result in page.get("analysis_results", []):
+                result.start += page_offset
+                result.end += page_offset
+                analysis_results.append(result)
+            page_texts.append(page["text"])
+            page_stats.append(page["page_stat"])
+            page_images.append(page["page_image"])
+            page_offset += len(page["text"])
+
+        data = {
+            **document,
+            "text": "".join(page_texts),
+            "word_coordinates": word_data.build(),
+            "page_stats": page_stats,
+            "page_images": page_images if any(image is not None for image in page_images) else []
+        }
+        if any("analysis_results" in page for page in pages.values()):
+            data["analysis_results"] = analysis_results
+        return data
+
+
+class StagedPipelineExecutor:
+    """Runs pipeline stages concurrently, each on its own threads, connected by bounded queues.
+
+    Every stage works on the next item while the following stage handles the previous one:
+    pages are analyzed while later pages are still being extracted, and a document is
+    anonymized and redacted while the next document is extracted. A full queue blocks its
+    producer, which bounds the memory held by in-flight pages. A failing item becomes a
+    StageError that is yielded by run() in its place, and closing the run() generator stops
+    all stage threads.
+    """
+
+    def __init__(self, stages, queue_size=8):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_pipeline(cls, pipeline, queue_size=8, analysis_workers=1, extraction_workers=1, document_workers=1):
+        """Splits a DynamicDataMaskingPipeline into stages: extraction and analysis per page, the other steps per document.
+
+        extraction_workers documents are extracted at the same time, document_workers documents
+        are anonymized and redacted at the same time.
+        """
+        stages = []
+        page_level = False
+        for step in pipeline.steps:
+            if isinstance(step, FileProcessorStep):
+                stages.append(PageExtractionStage(step, workers=extraction_workers))
+                page_level = True
+            elif isinstance(step, AnalyzerStep) and page_level:
+                stages.append(StepStage(step, workers=analysis_workers))
+            else:
+                if page_level:
+                    stages.append(DocumentAssemblyStage())
+                    page_level = False
+                stages.append(StepStage(step, workers=document_workers))
+        if page_level:
+            stages.append(DocumentAssemblyStage())
+        return cls(stages, queue_size=queue_size)
+
+    def run(self, work_items):
+        """Feeds the work items (dicts such as {"input_file_path", "output_file_path"}) through the stages.
+
+        Yields the final data of every work item, or a StageError for the ones that failed,
+        in completion order. Work items without a document_id are numbered in input order.
+        """
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self.stats = {stage.name: {"items": 0, "errors": 0, "seconds": 0.0} for stage in self.stages}
+
+        threads = [threading.Thread(target=self._feed, args=(work_items, queues[0], stop), name="ddm-stage-input", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(stage, queues[index], queues[index + 1], stop, remaining, lock),
+                    name=f"ddm-stage-{stage.name}-{worker}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(queues[-1], stop)
+                if item is _END or item is _STOPPED:
+                    break
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def _feed(self, work_items, output_queue, stop):
+        try:
+            for index, item in enumerate(work_items):
+                if not self._put(output_queue, {"document_id": index, **item}, stop):
+                    return
+        except Exception as error:
+            # A broken input iterator (unreadable manifest, ...) ends the run instead of hanging it
+            self._put(output_queue, StageError("input", error), stop)
+        self._put(output_queue, _END, stop)
+
+    def _work(self, stage, input_queue, output_queue, stop, remaining, lock):
+        while True:
+            item = self._get(input_queue, stop)
+            if item is _STOPPED:
+                return
+            if item is _END:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                # The last worker of a stage forwards the end, the others hand it to their siblings
+                self._put(output_queue if last else input_queue, _END, stop)
+                return
+
+            if isinstance(item, (StageError, DocumentEnd)) and not stage.handles_control_items:
+                if not self._put(output_queue, item, stop):
+                    return
+                continue
+
+            started = time.perf_counter()
+            try:
+                for output in stage.process(item):
+                    if not self._put(output_queue, output, stop):
+                        return
+                failed = False
+            except Exception as error:
+                failed = True
+                document_id = item.get("document_id") if isinstance(item, dict) else getattr(item, "document_id", None)
+                page_number = item.get("page_number") if isinstance(item, dict) else None
+                if not self._put(output_queue, StageError(stage.name, error, document_id, page_number), stop):
+                    return
+            with self._stats_lock:
+                stats = self.stats[stage.name]
+                stats["items"] += 1
+                stats["errors"] += failed
+                stats["seconds"] += time.perf_counter() - started
+
+    @staticmethod
+    def _put(target_queue, item, stop):
+        while not stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source_queue, stop):
+        while not stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOPPED
@@ -0,0 +1,155 @@
+from array import array
+
+import numpy as np
+
+class WordStoreBuilder:
+    """Accumulates OCR / text layer words into growable typed arrays and an interned text table."""
+
+    def __init__(self):
+        self.texts = []
+        self.text_ids = {}
+        self.word_text_ids = array('i')
+        self.boxes = array('f')
+        self.page_numbers = array('i')
+        self.char_offsets = array('q')
+
+    def _intern(self, text):
+        text_id = self.text_ids.get(text)
+        if text_id is None:
+            text_id = self.text_ids[text] = len(self.texts)
+            self.texts.append(text)
+        return text_id
+
+    def add_word(self, text, start_x, start_y, end_x, end_y, page_number, char_start=-1, char_end=-1):
+        self.word_text_ids.append(self._intern(text))
+        self.boxes.extend((start_x, start_y, end_x, end_y))
+        self.page_numbers.append(page_number)
+        self.char_offsets.extend((char_start, char_end))
+        return self
+
+    def add_words(self, words_info):
+        """Adds word dicts in the {'text', 'start_x', ..., 'page_number'} layout."""
+        for word in words_info:
+            self.add_word(word['text'], word['start_x'], word['start_y'], word['end_x'], word['end_y'], word['page_number'],
+                          word.get('char_start', -1), word.get('char_end', -1))
+        return self
+
+    def add_store(self, store, char_offset=0):
+        """Appends every word of another store, shifting its character offsets by char_offset."""
+        id_map = np.fromiter((self._intern(text) for text in store.texts), dtype=np.int32, count=len(store.texts))
+        self.word_text_ids.frombytes(id_map[store.text_ids].astype(np.int32).tobytes())
+        self.boxes.frombytes(store.boxes.astype(np.float32).tobytes())
+        self.page_numbers.frombytes(store.page_numbers.astype(np.int32).tobytes())
+        offsets = store.char_offsets + np.where(store.char_offsets >= 0, char_offset, 0)
+        self.char_offsets.frombytes(offsets.astype(np.int64).tobytes())
+        return self
+
+    def build(self):
+        return WordStore(
+            texts=self.texts,
+            text_ids=np.frombuffer(self.word_text_ids, dtype=np.int32).copy(),
+            boxes=np.frombuffer(self.boxes, dtype=np.float32).reshape(-1, 4).copy(),
+            page_numbers=np.frombuffer(self.page_numbers, dtype=np.int32).copy(),
+            char_offsets=np.frombuffer(self.char_offsets, dtype=np.int64).reshape(-1, 2).copy(),
+        )
+
+
+class WordStore:
+    """Columnar storage of word coordinates, page numbers and text offsets.
+
+    Words are kept ordered by page, so every page maps to one contiguous slice.
+    Iterating a store yields the word dicts used before the store existed.
+    """
+
+    def __init__(self, texts, text_ids, boxes, page_numbers, char_offsets):
+        if len(page_numbers) and np.any(np.diff(page_numbers) < 0):
+            order = np.argsort(page_numbers, kind='stable')
+            text_ids, boxes, page_numbers, char_offsets = text_ids[order], boxes[order], page_numbers[order], char_offsets[order]
+
+        self.texts = texts
+        self.text_ids = text_ids
+        self.boxes = boxes
+        self.page_numbers = page_numbers
+        self.char_offsets = char_offsets
+        self._page_index = None
+        self._normalized_index = None
+
+    @classmethod
+    def empty(cls):
+        return WordStoreBuilder().build()
+
+    @classmethod
+    def from_words(cls, words_info):
+        return WordStoreBuilder().add_words(words_info).build()
+
+    def __len__(self):
+        return len(self.text_ids)
+
+    def __getitem__(self, index):
+        start_x, start_y, end_x, end_y = self.boxes[index].tolist()
+        char_start, char_end = self.char_offsets[index].tolist()
+        return {
+            'text': self.texts[self.text_ids[index]],
+            'start_x': start_x,
+            'start_y': start_y,
+            'end_x': end_x,
+            'end_y': end_y,
+            'page_number': int(self.page_numbers[index]),
+            'char_start': char_start,
+            'char_end': char_end
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def char_starts(self):
+        return self.char_offsets[:, 0]
+
+    @property
+    def char_ends(self):
+        return self.char_offsets[:, 1]
+
+    @property
+    def nbytes(self):
+        return self.text_ids.nbytes + self.boxes.nbytes + self.page_numbers.nbytes + self.char_offsets.nbytes
+
+    def text(self, index):
+        return self.texts[self.text_ids[index]]
+
+    def pages(self):
+        return list(self._get_page_index())
+
+    def page_slice(self, page_number):
+        start, stop = self._get_page_index().get(page_number, (0, 0))
+        return slice(start, stop)
+
+    def page_boxes(self, page_number):
+        """Returns an (n, 4) array of start_x, start_y, end_x, end_y for the words on a page."""
+        return self.boxes[self.page_slice(page_number)]
+
+    def find_text(self, normalized_text):
+        """Returns the indices of every word whose lower-cased text equals normalized_text."""
+        text_ids = self._get_normalized_index().get(normalized_text)
+        if not text_ids:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(np.isin(self.text_ids, text_ids))
+
+    def select(self, indices):
+        """Returns a new store with the words at the given indices, sharing the text table."""
+        indices = np.unique(np.asarray(indices, dtype=np.intp))
+        return WordStore(self.texts, self.text_ids[indices], self.boxes[indices], self.page_numbers[indices], self.char_offsets[indices])
+
+    def _get_page_index(self):
+        if self._page_index is None:
+            pages, starts, counts = np.unique(self.page_numbers, return_index=True, return_counts=True)
+            self._page_index = {int(page): (int(start), int(start + count)) for page, start, count in zip(pages, starts, counts)}
+        return self._page_index
+
+    def _get_normalized_index(self):
+        if self._normalized_index is None:
+            self._normalized_index = {}
+            for text_id, text in enumerate(self.texts):
+                self._normalized_index.setdefault(text.lower(), []).append(text_id)
+        return self._normalized_index
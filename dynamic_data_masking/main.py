@@ -1,53 +1,145 @@
 import argparse
+import logging
 
 from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import *
-from dynamic_data_masking.dynamic_data_masking_pipeline.mappers import LANG_MAP, CONF_LEVEL_MAP, ANALYZER, ANONYMIZER
+from dynamic_data_masking.dynamic_data_masking_pipeline.batch_runner import BatchMaskingRunner, is_batch_input, resolve_batch_inputs
+from dynamic_data_masking.dynamic_data_masking_pipeline.staged_executor import StagedPipelineExecutor, StageError
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import tier_statistics
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import configure_logging, enable_instrumentation, JsonLinesExporter, PrometheusTextExporter
+
+logger = logging.getLogger(__name__)
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is negative")
+    return number
 
 def main():
     parser = argparse.ArgumentParser(description="Arguments parser for dynamic data masking engine")
     # FILE PROCESSOR STEP ARGUMENTS
-    parser.add_argument("input_file_path", help='paht to the file required masking')
+    parser.add_argument("input_file_path", help='paht to the file required masking, or a directory, glob pattern or manifest file (one PDF path per line) to mask in batch mode')
     parser.add_argument("--lang", type=str, default='en', choices=['en','fr','nl'], help='language of the file')
     parser.add_argument("--resolution", type=int, default=500, help="resolution for input file reading")
     parser.add_argument("--ocr-config", type=str, default='--oem 3 --psm 6', help='provides configuration for content extraction from file using OCR (Object Character Recognition)')
+    parser.add_argument("--extraction-mode", type=str, default='hybrid', choices=['hybrid', 'ocr'], help='hybrid reads words from the PDF text layer and only runs OCR on scanned pages, ocr runs OCR on every page')
+    parser.add_argument("--workers", type=int, default=1, help='number of processes used to render and OCR pages in parallel')
+    parser.add_argument("--ocr-mode", type=str, default='single_pass', choices=['single_pass', 'two_pass'], help='single_pass derives text and word coordinates from one OCR call per page, two_pass runs OCR separately for each')
+    parser.add_argument("--ocr-cache-dir", type=str, default=None, help='directory of the on-disk OCR result cache, re-masking a cached file skips rendering and OCR')
+    parser.add_argument("--ocr-preprocessing", type=str, default='none', choices=['none', 'gray', 'binary'], help='deskew and crop rendered pages before OCR, as grayscale or binarized images')
+    parser.add_argument("--adaptive-resolution", action='store_true', help='render each OCR page at the resolution its text size needs, --resolution is the upper limit')
+    parser.add_argument("--streaming", action='store_true', help='extract and analyze one page at a time with flat memory use, for documents with thousands of pages')
+    parser.add_argument("--ocr-cache-size-mb", type=int, default=1024, help='size limit of the OCR result cache, least recently used pages are evicted first')
 
     # TEXT ANALYZER STEP ARGUMENTS
     parser.add_argument("--conf_level", type=str, default='c4')
     parser.add_argument("--analyzer_engine", type=str, default='from_config_file', choices=['from_config_file', 'from_code'], help='provides the option on Analyzer Engine builder code / from config file')
+    parser.add_argument("--analysis-chunk-size", type=non_negative_int, default=0, help='analyze the text in chunks of at most this many characters, 0 analyzes the whole text at once')
+    parser.add_argument("--analysis-chunk-overlap", type=non_negative_int, default=None, help='characters shared by consecutive analysis chunks, must be smaller than the chunk size, defaults to 500 or a quarter of the chunk size if smaller')
+    parser.add_argument("--analysis-batch-size", type=int, default=0, help='analyze the document page by page, batching this many pages through the NLP model, 0 disables per page analysis')
+    parser.add_argument("--analysis-processes", type=int, default=1, help='number of processes used by the NLP model for per page analysis')
+    parser.add_argument("--tiered-analysis", action='store_true', help='screen pages and paragraphs with the regex, deny list and small NLP model recognizers, only running the large model on the segments they flag')
+    parser.add_argument("--tier-candidate-threshold", type=float, default=0.5, help='tiered analysis: a screen result scoring at least this sends its segment to the large model')
+    parser.add_argument("--tier-max-proper-nouns", type=int, default=2, help='tiered analysis: segments with more proper nouns the screen found no entity in go to the large model')
 
     # TEXT ANONYMIZER STEP ARGUMETNS
     parser.add_argument("--anonimyzer_operator", type=str, default='yes', help='type of anonimyzer')
 
     # FILE REDACTOR STEP ARGUMENTS
-    parser.add_argument("--masking_strategy", default="blackout", help="Masking strategy for masking data")
-    parser.add_argument("--output_file_path", help="path to where the masked file will be generated")
+    parser.add_argument("--masking_strategy", default="blackout", help="Masking strategy for masking data: blackout draws boxes over the text, content_removal also removes the text and images under them, image paints the boxes into the page images and writes an image-only PDF")
+    parser.add_argument("--image_redaction_resolution", type=int, default=200, help="resolution of the page images kept for the image masking strategy")
+    parser.add_argument("--comparison_strategy", default="span", choices=['span', 'word_diff'], help="span redacts the words covered by the analyzer results, word_diff redacts every occurrence of the words changed by the anonymizer")
+    parser.add_argument("--output_file_path", help="path to where the masked file will be generated, the output directory in batch mode")
+
+    # BATCH MODE ARGUMENTS
+    parser.add_argument("--jobs", type=int, default=1, help='batch mode: number of documents extracted, analyzed and redacted at the same time')
+    parser.add_argument("--queue-size", type=int, default=8, help='batch mode: work items buffered between two pipeline stages')
+    parser.add_argument("--overwrite", action='store_true', help='batch mode: mask files again even if their output already exists')
+
+    # INSTRUMENTATION ARGUMENTS
+    parser.add_argument("--log-level", type=str, default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument("--log-format", type=str, default='text', choices=['text', 'json'], help='json writes one JSON object per log record, with the structured fields')
+    parser.add_argument("--metrics-jsonl", type=str, default=None, help='append the timing, CPU and memory spans of every stage and page to this JSON lines file')
+    parser.add_argument("--metrics-prometheus", type=str, default=None, help='write per stage totals in the Prometheus text format to this file')
     args = parser.parse_args()
+    if args.analysis_chunk_overlap is not None and args.analysis_chunk_size and args.analysis_chunk_overlap >= args.analysis_chunk_size:
+        parser.error("--analysis-chunk-overlap must be smaller than --analysis-chunk-size")
 
-    pipeline = DynamicDataMaskingPipeline()
-    pipeline.add_step(FileProcessorStep(
-        file_path=args.input_file_path, 
-        language=LANG_MAP[args.lang], 
-        resolution=args.resolution, 
-        ocr_config=args.ocr_config
-        )
-    )
-    pipeline.add_step(AnalyzerStep(
-        from_config_file=ANALYZER[args.analyzer_engine],
-        language=args.lang,
-        use_predefined=CONF_LEVEL_MAP[args.conf_level]
+    configure_logging(level=args.log_level, json_format=args.log_format == 'json')
+    exporters = []
+    if args.metrics_jsonl:
+        exporters.append(JsonLinesExporter(args.metrics_jsonl))
+    if args.metrics_prometheus:
+        exporters.append(PrometheusTextExporter(args.metrics_prometheus))
+    instrumentation = enable_instrumentation(exporters) if exporters else None
+
+    try:
+        run(parser, args)
+        if args.tiered_analysis:
+            tiers = tier_statistics.as_dict()
+            logger.info(
+                "tiered analysis: %d of %d screened segments went to the large model, %d blank segments skipped",
+                tiers['escalated'], tiers['screened'], tiers['skipped'], extra={'tiers': tiers}
+            )
+    finally:
+        if instrumentation is not None:
+            instrumentation.export()
+
+def run(parser, args):
+    pipeline_options = dict(
+        lang=args.lang,
+        resolution=args.resolution,
+        ocr_config=args.ocr_config,
+        extraction_mode=args.extraction_mode,
+        workers=args.workers,
+        ocr_mode=args.ocr_mode,
+        ocr_cache_dir=args.ocr_cache_dir,
+        ocr_cache_size_mb=args.ocr_cache_size_mb,
+        ocr_preprocessing=args.ocr_preprocessing,
+        adaptive_resolution=args.adaptive_resolution,
+        streaming=args.streaming,
+        conf_level=args.conf_level,
+        analyzer_engine=args.analyzer_engine,
+        analysis_chunk_size=args.analysis_chunk_size,
+        analysis_chunk_overlap=args.analysis_chunk_overlap,
+        analysis_batch_size=args.analysis_batch_size,
+        analysis_processes=args.analysis_processes,
+        tiered_analysis=args.tiered_analysis,
+        tier_candidate_threshold=args.tier_candidate_threshold,
+        tier_max_proper_nouns=args.tier_max_proper_nouns,
+        anonimyzer_operator=args.anonimyzer_operator,
+        masking_strategy=args.masking_strategy,
+        comparison_strategy=args.comparison_strategy,
+        image_redaction_resolution=args.image_redaction_resolution
         )
-    )
-    pipeline.add_step(AnonymizerStep(
-        use_default_operators=ANONYMIZER[args.anonimyzer_operator]
+
+    if is_batch_input(args.input_file_path):
+        if not args.output_file_path:
+            parser.error("--output_file_path is required in batch mode, it is the output directory")
+        root, inputs = resolve_batch_inputs(args.input_file_path)
+        runner = BatchMaskingRunner(args.output_file_path, jobs=args.jobs, queue_size=args.queue_size, overwrite=args.overwrite, **pipeline_options)
+        summary = runner.run(root, inputs)
+        failures = summary.pop('failures')
+        logger.info(
+            "batch done: %d documents, %d pages in %.1fs (%.2f docs/s, %.2f pages/s), %d skipped, %d failed",
+            summary['documents'], summary['pages'], summary['seconds'], summary['documents_per_second'],
+            summary['pages_per_second'], summary['skipped'], summary['failed'], extra={'summary': summary}
         )
-    )
+        for failure in failures:
+            logger.error("failed to mask %s", failure['input_file_path'], extra=failure)
+        return
 
-    pipeline.add_step(RedactorStep(
-        redaction_strategy=args.masking_strategy,
-        input_file_path=args.input_file_path, 
-        output_pdf_path=args.output_file_path
+    pipeline = DynamicDataMaskingPipelineDirector.construct(
+        input_file_path=args.input_file_path,
+        output_file_path=args.output_file_path,
+        **pipeline_options
         )
-    )
+    if args.streaming:
+        # Pages flow through extraction and analysis one at a time, only the document level steps see the whole document
+        for result in StagedPipelineExecutor.from_pipeline(pipeline, queue_size=args.queue_size).run([{}]):
+            if isinstance(result, StageError):
+                raise result.error
+        return
     pipeline.execute_pipeline()
 
 if __name__ == "__main__":
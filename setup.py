@@ -15,11 +15,13 @@ setup(
         "pytesseract",
         "Pillow",
         "opencv-python",
-        "PyMuPDF"
+        "PyMuPDF",
+        "numpy"
     ],
     entry_points={
         "console_scripts": [
             "ddm_engine=dynamic_data_masking.main:main",
+            "ddm_service=dynamic_data_masking.ddm_service.server:main",
         ],
     },
     package_data={
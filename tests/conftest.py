@@ -0,0 +1,44 @@
+import pytest
+import spacy
+from reportlab.pdfgen import canvas
+from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer.nlp_engine import NlpEngineProvider
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import analyzer_engine_registry
+
+@pytest.fixture(scope='session')
+def blank_analyzer_engine(tmp_path_factory):
+    """Presidio engine on a blank spaCy pipeline: the pattern recognizers work, no NER model is needed."""
+    model_path = tmp_path_factory.mktemp('models') / 'blank_en'
+    spacy.blank('en').to_disk(model_path)
+    nlp_engine = NlpEngineProvider(nlp_configuration={
+        'nlp_engine_name': 'spacy',
+        'models': [{'lang_code': 'en', 'model_name': str(model_path)}],
+    }).create_engine()
+    return AnalyzerEngine(nlp_engine=nlp_engine)
+
+
+@pytest.fixture
+def regex_analyzer(monkeypatch, blank_analyzer_engine):
+    """Serves the blank pipeline engine from the shared registry for every configuration."""
+    monkeypatch.setattr(analyzer_engine_registry, 'get_engine', lambda *args, **kwargs: blank_analyzer_engine)
+    return blank_analyzer_engine
+
+
+LETTER_LINES = [
+    "Please send the signed contract back to our office before Friday.",
+    "Questions about the invoice go to billing.team@example.com only.",
+    "The remaining pages describe the terms and conditions in detail.",
+]
+
+@pytest.fixture
+def letter_pdf(tmp_path):
+    """One page PDF with a text layer, holding a single email address."""
+    path = tmp_path / "letter.pdf"
+    pdf = canvas.Canvas(str(path), pagesize=(612, 792))
+    pdf.setFont('Helvetica', 11)
+    for index, line in enumerate(LETTER_LINES):
+        pdf.drawString(72, 720 - 20 * index, line)
+    pdf.showPage()
+    pdf.save()
+    return path
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_registry import AnalyzerEngineRegistry
+
+
+class CountingBuilder:
+    """Stands in for build_engine: slow enough for callers to pile up, and counts the builds per configuration."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.builds = Counter()
+        self.running = Counter()
+        self.most_running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, from_config_file, language, use_predefined, tier='full'):
+        key = (language, use_predefined, tier)
+        with self._lock:
+            self.builds[key] += 1
+            self.running[key] += 1
+            self.most_running = max(self.most_running, sum(self.running.values()))
+        time.sleep(self.delay)
+        with self._lock:
+            self.running[key] -= 1
+        return object()
+
+
+@pytest.fixture
+def builder(monkeypatch):
+    builder = CountingBuilder()
+    monkeypatch.setattr(AnalyzerEngineRegistry, 'build_engine', staticmethod(builder))
+    return builder
+
+
+def test_engines_are_built_once_and_cached(builder):
+    registry = AnalyzerEngineRegistry()
+
+    engine = registry.get_engine(False, 'en', True)
+    assert registry.get_engine(False, 'en', True) is engine
+    assert registry.get_engine(False, 'en', True, 'screen') is not engine
+    assert registry.get_engine(False, 'fr', True) is not engine
+    assert builder.builds == {('en', True, 'full'): 1, ('en', True, 'screen'): 1, ('fr', True, 'full'): 1}
+
+
+def test_concurrent_callers_share_a_single_build_per_key(builder):
+    registry = AnalyzerEngineRegistry()
+    configurations = [(False, language, True) for language in ('en', 'fr', 'es', 'de')] * 16
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        engines = list(pool.map(lambda configuration: registry.get_engine(*configuration), configurations))
+
+    assert builder.builds == {(language, True, 'full'): 1 for language in ('en', 'fr', 'es', 'de')}
+    for configuration, engine in zip(configurations, engines):
+        assert engine is registry.get_engine(*configuration)
+    # Engines for different keys do not wait on each other
+    assert builder.most_running > 1
+
+
+def test_warm_up_builds_every_configuration_up_front(builder):
+    registry = AnalyzerEngineRegistry()
+
+    assert registry.warm_up([(False, 'en', True), (False, 'en', True, 'screen'), (False, 'en', True)]) is registry
+
+    assert builder.builds == {('en', True, 'full'): 1, ('en', True, 'screen'): 1}
+    assert sorted(key[-1] for key in registry.cached_keys()) == ['full', 'screen']
+
+
+def test_evict_drops_one_engine_and_clear_drops_all(builder):
+    registry = AnalyzerEngineRegistry().warm_up([(False, 'en', True), (False, 'fr', True)])
+    engine = registry.get_engine(False, 'en', True)
+
+    assert registry.evict(False, 'en', True) is True
+    assert registry.evict(False, 'en', True) is False
+    assert registry.cached_keys() == [AnalyzerEngineRegistry.make_key(False, 'fr', True)]
+    assert registry.get_engine(False, 'en', True) is not engine
+    assert builder.builds[('en', True, 'full')] == 2
+
+    registry.clear()
+    assert registry.cached_keys() == []
+    registry.get_engine(False, 'fr', True)
+    assert builder.builds[('fr', True, 'full')] == 2
@@ -0,0 +1,47 @@
+from presidio_analyzer import RecognizerResult
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer import anonymizer as anonymizer_module
+from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer.anonymizer import DynamicDataMaskingAnonimyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import AnonymizerStep
+
+TEXTS = ["Call Anna Smith", "Phone 555 0100 now", "Mail ann@example.com"]
+RESULTS = [
+    [RecognizerResult('PERSON', 5, 15, 0.85)],
+    [RecognizerResult('PHONE_NUMBER', 6, 14, 0.75)],
+    [RecognizerResult('EMAIL_ADDRESS', 5, 20, 1.0)],
+]
+
+def test_configured_operators_are_applied():
+    masked = DynamicDataMaskingAnonimyzer().anonymize_many(TEXTS, RESULTS)
+    # PERSON is replaced, PHONE_NUMBER redacted, every other entity gets the DEFAULT replace
+    assert masked == ["Call <REDACTED>", "Phone  now", "Mail <EMAIL_ADDRESS>"]
+
+    plain = DynamicDataMaskingAnonimyzer().anonymize_many(TEXTS, RESULTS, use_default_operators=False)
+    assert plain == ["Call <PERSON>", "Phone <PHONE_NUMBER> now", "Mail <EMAIL_ADDRESS>"]
+
+
+def test_batch_masking_matches_the_pipeline_step():
+    step = AnonymizerStep(use_default_operators=True)
+    expected = [step.execute({"text": text, "analysis_results": results})["masked_text"] for text, results in zip(TEXTS, RESULTS)]
+    assert DynamicDataMaskingAnonimyzer().anonymize_many(TEXTS, RESULTS) == expected
+
+
+def test_engine_is_built_once_per_configuration(monkeypatch):
+    builds = []
+    build_anonymizer = anonymizer_module.AnonymizerEngineDirector.build_anonymizer
+
+    def counting_build(use_default_operators=False):
+        builds.append(use_default_operators)
+        return build_anonymizer(use_default_operators=use_default_operators)
+
+    monkeypatch.setattr(DynamicDataMaskingAnonimyzer, '_engines', {})
+    monkeypatch.setattr(anonymizer_module.AnonymizerEngineDirector, 'build_anonymizer', staticmethod(counting_build))
+
+    first, second = DynamicDataMaskingAnonimyzer(), DynamicDataMaskingAnonimyzer()
+    first.anonymize_many(TEXTS, RESULTS)
+    second.anonymize_many(TEXTS, RESULTS)
+    second.anonimyze(TEXTS[0], RESULTS[0], use_default_operators=False)
+
+    assert builds == [True, False]
+    assert first.anonimyzer is second.get_engine(True)[0]
+    assert first.operators['DEFAULT'].operator_name == 'replace' and first.operators['PERSON'].params['new_value'] == '<REDACTED>'
@@ -0,0 +1,33 @@
+import pytest
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer import DynamicDataMaskingAnalyzer
+
+TEXTS = [
+    "Contact ann@example.com or visit https://example.org/help",
+    "",
+    "No personal data on this line.",
+    "Server 192.168.10.12 mailed bob@example.net twice, bob@example.net",
+    "   ",
+    "IBAN GB82WEST12345698765432 belongs to the account",
+] * 3
+
+def spans(results):
+    return sorted((result.entity_type, result.start, result.end, round(result.score, 6)) for result in results)
+
+
+@pytest.mark.parametrize('batch_size, n_process', [(1, 1), (4, 1), (32, 1), (4, 2)])
+def test_batch_results_equal_per_text_results(regex_analyzer, batch_size, n_process):
+    analyzer = DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=True)
+
+    batched = list(analyzer.analyze_batch(iter(TEXTS), batch_size=batch_size, n_process=n_process))
+
+    assert len(batched) == len(TEXTS)
+    assert [spans(results) for results in batched] == [spans(analyzer.analyze_text(text)) for text in TEXTS]
+    assert any(batched)
+
+
+def test_pages_are_rebased_onto_the_document(regex_analyzer):
+    analyzer = DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=True)
+    text = "\f".join(TEXTS[:4])
+
+    assert spans(analyzer.analyze_text_by_page(text, batch_size=2)) == spans(analyzer.analyze_text(text))
@@ -0,0 +1,105 @@
+import shutil
+
+import pdfplumber
+import pytest
+
+from dynamic_data_masking.dynamic_data_masking_pipeline import batch_runner
+from dynamic_data_masking.dynamic_data_masking_pipeline.batch_runner import BatchMaskingRunner, is_batch_input, resolve_batch_inputs
+
+
+@pytest.fixture
+def input_tree(tmp_path, letter_pdf):
+    """in/a.pdf, in/sub/b.pdf and in/notes.txt, all but the text file copies of the letter."""
+    root = tmp_path / "in"
+    (root / "sub").mkdir(parents=True)
+    shutil.copy(letter_pdf, root / "a.pdf")
+    shutil.copy(letter_pdf, root / "sub" / "b.pdf")
+    (root / "notes.txt").write_text("not a pdf")
+    return root
+
+
+def test_single_pdf_is_not_a_batch(input_tree):
+    assert not is_batch_input(str(input_tree / "a.pdf"))
+    assert is_batch_input(str(input_tree))
+    assert is_batch_input(str(input_tree / "*.pdf"))
+    assert is_batch_input(str(input_tree / "notes.txt"))
+
+
+def test_directory_inputs_are_every_pdf_below_it(input_tree):
+    root, inputs = resolve_batch_inputs(str(input_tree))
+
+    assert root == input_tree
+    assert inputs == [input_tree / "a.pdf", input_tree / "sub" / "b.pdf"]
+
+
+def test_glob_inputs_are_rooted_before_the_first_wildcard(input_tree):
+    root, inputs = resolve_batch_inputs(str(input_tree / "**" / "*.pdf"))
+
+    assert root == input_tree
+    assert inputs == [input_tree / "a.pdf", input_tree / "sub" / "b.pdf"]
+
+
+def test_manifest_paths_are_relative_to_the_manifest(input_tree):
+    manifest = input_tree / "sub" / "manifest.txt"
+    manifest.write_text(f"# masked weekly\nb.pdf\n\n  ../a.pdf  \n{input_tree / 'sub' / 'b.pdf'}\n")
+
+    root, inputs = resolve_batch_inputs(str(manifest))
+
+    assert root == input_tree.resolve()
+    assert inputs == [(input_tree / "sub" / "b.pdf").resolve(), (input_tree / "a.pdf").resolve(),
+                      (input_tree / "sub" / "b.pdf").resolve()]
+
+
+def page_count(path):
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def test_run_mirrors_the_input_tree_and_skips_finished_outputs(regex_analyzer, input_tree, tmp_path):
+    output_root = tmp_path / "out"
+    root, inputs = resolve_batch_inputs(str(input_tree))
+
+    summary = BatchMaskingRunner(output_root).run(root, inputs)
+
+    assert (summary['documents'], summary['pages'], summary['skipped'], summary['failed']) == (2, 2, 0, 0)
+    outputs = sorted(path.relative_to(output_root).as_posix() for path in output_root.rglob('*') if path.is_file())
+    assert outputs == ["a.pdf", "sub/b.pdf"]
+    assert page_count(output_root / "sub" / "b.pdf") == 1
+
+    (output_root / "a.pdf").unlink()
+    summary = BatchMaskingRunner(output_root).run(root, inputs)
+    assert (summary['documents'], summary['skipped']) == (1, 1)
+    assert (output_root / "a.pdf").exists()
+
+
+def test_a_crashed_run_leaves_no_final_output_and_is_redone(regex_analyzer, input_tree, tmp_path, monkeypatch):
+    output_root = tmp_path / "out"
+    root, inputs = resolve_batch_inputs(str(input_tree))
+
+    def crash(source, destination):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(batch_runner.os, "replace", crash)
+    with pytest.raises(KeyboardInterrupt):
+        BatchMaskingRunner(output_root).run(root, inputs)
+    monkeypatch.undo()
+    monkeypatch.setattr(batch_runner.analyzer_engine_registry, 'get_engine', lambda *args, **kwargs: regex_analyzer)
+
+    assert not list(output_root.rglob('*.pdf'))
+    assert list(output_root.rglob('*.partial'))
+
+    summary = BatchMaskingRunner(output_root).run(root, inputs)
+    assert (summary['documents'], summary['skipped']) == (2, 0)
+    assert sorted(path.name for path in output_root.rglob('*.pdf')) == ["a.pdf", "b.pdf"]
+
+
+def test_failed_documents_leave_no_output(regex_analyzer, input_tree, tmp_path):
+    output_root = tmp_path / "out"
+    (input_tree / "broken.pdf").write_bytes(b"%PDF-1.4 this is not a document")
+    root, inputs = resolve_batch_inputs(str(input_tree))
+
+    summary = BatchMaskingRunner(output_root).run(root, inputs)
+
+    assert (summary['documents'], summary['failed']) == (2, 1)
+    assert summary['failures'][0]['input_file_path'] == str(input_tree / "broken.pdf")
+    assert sorted(path.name for path in output_root.rglob('*') if path.is_file()) == ["a.pdf", "b.pdf"]
@@ -0,0 +1,123 @@
+from io import BytesIO
+
+import pdfplumber
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import NameObject, NumberObject
+from reportlab.pdfgen import canvas
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.blackout_redaction import BlackoutRedaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+SECRET = {"John", "Smith"}
+
+
+def write_pdf(path, cropbox=None, rotation=0):
+    pdf = canvas.Canvas(str(path), pagesize=(612, 792))
+    for _ in range(2):
+        if cropbox:
+            pdf.setCropBox(cropbox)
+        if rotation:
+            pdf.setPageRotation(rotation)
+        pdf.setFont("Helvetica", 12)
+        pdf.drawString(100, 700, "Hello John Smith here")
+        pdf.drawString(300, 300, "Account of Maria Garcia")
+        pdf.showPage()
+    pdf.save()
+
+
+def move_mediabox(path, left, bottom):
+    """Moves the mediabox origin, and the cropbox with it, away from (0, 0)."""
+    reader, writer = PdfReader(str(path)), PdfWriter()
+    for page in reader.pages:
+        page.mediabox.lower_left = (left, bottom)
+        page.cropbox.lower_left = (left, bottom)
+        writer.add_page(page)
+    with open(path, 'wb') as output:
+        writer.write(output)
+
+
+def page_words(path, names):
+    """pdfplumber boxes of the words in names, per page; words of upside down pages come out reversed."""
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            pages.append([(word["x0"], word["top"], word["x1"], word["bottom"]) for word in page.extract_words()
+                          if word["text"] in names or word["text"][::-1] in names])
+    return pages
+
+
+def secret_words(path):
+    return WordStore.from_words([
+        {"text": "secret", "start_x": x0, "start_y": top, "end_x": x1, "end_y": bottom, "page_number": page_number}
+        for page_number, boxes in enumerate(page_words(path, SECRET), start=1) for x0, top, x1, bottom in boxes
+    ])
+
+
+def covers(rect, box, tolerance=0.5):
+    return (rect[0] - tolerance <= box[0] and rect[1] - tolerance <= box[1]
+            and box[2] <= rect[2] + tolerance and box[3] <= rect[3] + tolerance)
+
+
+def intersects(rect, box):
+    return rect[0] < box[2] and box[0] < rect[2] and rect[1] < box[3] and box[1] < rect[3]
+
+
+def unrotated(output, tmp_path):
+    """Writes output with the page rotation dropped, so the overlay and the text are read in one upright frame."""
+    reader, writer = PdfReader(BytesIO(output)), PdfWriter()
+    for page in reader.pages:
+        page[NameObject("/Rotate")] = NumberObject(0)
+        writer.add_page(page)
+    path = tmp_path / "unrotated.pdf"
+    with open(path, 'wb') as file:
+        writer.write(file)
+    return path
+
+
+def assert_covered(output, tmp_path):
+    path = unrotated(output, tmp_path)
+    with pdfplumber.open(path) as pdf:
+        black = [[(rect["x0"], rect["top"], rect["x1"], rect["bottom"]) for rect in page.rects if rect["fill"]] for page in pdf.pages]
+    for rects, secrets, kept in zip(black, page_words(path, SECRET), page_words(path, {"Maria", "Garcia"})):
+        assert len(rects) == len(secrets) == 2
+        assert all(any(covers(rect, box) for rect in rects) for box in secrets)
+        assert not any(intersects(rect, box) for rect in rects for box in kept)
+
+
+@pytest.mark.parametrize("cropbox", [None, (50, 50, 500, 760)])
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_boxes_land_on_the_words(tmp_path, cropbox, rotation):
+    path = tmp_path / "input.pdf"
+    write_pdf(path, cropbox, rotation)
+    words = secret_words(path)
+    assert len(words) == 4
+
+    assert_covered(BlackoutRedaction().apply_redaction(str(path), words, None), tmp_path)
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_boxes_follow_a_mediabox_away_from_the_origin(tmp_path, rotation):
+    path = tmp_path / "input.pdf"
+    write_pdf(path, rotation=rotation)
+    move_mediabox(path, 40, 60)
+    words = secret_words(path)
+    assert len(words) == 4
+
+    assert_covered(BlackoutRedaction().apply_redaction(str(path), words, None), tmp_path)
+
+
+def test_bytes_and_path_inputs_and_outputs_agree(tmp_path):
+    path, output_path = tmp_path / "input.pdf", tmp_path / "output.pdf"
+    write_pdf(path, rotation=90)
+    words = secret_words(path)
+
+    from_bytes = BlackoutRedaction().apply_redaction(path.read_bytes(), words, None)
+    assert BlackoutRedaction().apply_redaction(str(path), words, str(output_path)) is None
+    buffer = BytesIO()
+    with open(path, 'rb') as source:
+        BlackoutRedaction().apply_redaction(source, words, buffer)
+
+    assert from_bytes.startswith(b"%PDF")
+    for output in (from_bytes, output_path.read_bytes(), buffer.getvalue()):
+        assert_covered(output, tmp_path)
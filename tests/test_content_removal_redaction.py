@@ -0,0 +1,63 @@
+import pdfplumber
+import pymupdf
+import pytest
+from reportlab.pdfgen import canvas
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.content_removal_redaction import ContentRemovalRedaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+SECRET = {"John", "Smith"}
+
+def write_pdf(path, cropbox=None, rotation=0):
+    pdf = canvas.Canvas(str(path), pagesize=(612, 792))
+    for _ in range(2):
+        if cropbox:
+            pdf.setCropBox(cropbox)
+        if rotation:
+            pdf.setPageRotation(rotation)
+        pdf.setFont("Helvetica", 12)
+        pdf.drawString(100, 700, "Hello John Smith here")
+        pdf.drawString(300, 300, "Account of Maria Garcia")
+        pdf.showPage()
+    pdf.save()
+
+
+def secret_words(path):
+    words = []
+    with pdfplumber.open(path) as pdf:
+        for page_number, page in enumerate(pdf.pages, start=1):
+            for word in page.extract_words():
+                if word["text"] in SECRET:
+                    words.append({"text": word["text"], "start_x": word["x0"], "start_y": word["top"],
+                                  "end_x": word["x1"], "end_y": word["bottom"], "page_number": page_number})
+    return WordStore.from_words(words)
+
+
+@pytest.mark.parametrize("cropbox", [None, (50, 50, 500, 760)])
+@pytest.mark.parametrize("rotation", [0, 90])
+def test_removes_text_under_boxes(tmp_path, cropbox, rotation):
+    input_path, output_path = tmp_path / "input.pdf", tmp_path / "output.pdf"
+    write_pdf(input_path, cropbox, rotation)
+    words = secret_words(input_path)
+    assert len(words) == 4
+
+    ContentRemovalRedaction().apply_redaction(str(input_path), words, str(output_path))
+
+    with pymupdf.open(output_path) as document:
+        for page in document:
+            text = page.get_text()
+            assert "John" not in text and "Smith" not in text
+            assert "Maria Garcia" in text
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_boxes_map_to_pymupdf_words(tmp_path, rotation):
+    path = tmp_path / "input.pdf"
+    write_pdf(path, (50, 50, 500, 760), rotation)
+    with pdfplumber.open(path) as pdf:
+        char = next(char for char in pdf.pages[0].chars if char["text"] == "J")
+        box = (char["x0"], char["top"], char["x1"], char["bottom"])
+    with pymupdf.open(path) as document:
+        page = document[0]
+        mapped = pymupdf.Rect(ContentRemovalRedaction.to_pymupdf_boxes([box], page)[0].tolist())
+        assert page.get_textbox(mapped).strip() == "J"
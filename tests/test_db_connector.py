@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from dynamic_data_masking.ddm_connectors.ddm_db_connector import ConnectionPool, DatabaseMaskingConnector
+
+ROWS = [
+    (1, "no personal data here", "plain note"),
+    (2, "write to john.smith@example.com", "plain note"),
+    (3, "nothing to see", "call me at maria@example.org"),
+    (4, "", None),
+    (5, "still clean", "clean as well"),
+]
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "records.db"
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE records (id INTEGER PRIMARY KEY, body TEXT, note TEXT)")
+        connection.execute("CREATE TABLE updates (id INTEGER)")
+        connection.execute("CREATE TRIGGER audit AFTER UPDATE ON records BEGIN INSERT INTO updates VALUES (new.id); END")
+        connection.executemany("INSERT INTO records VALUES (?, ?, ?)", ROWS)
+    pool = ConnectionPool(lambda: sqlite3.connect(path, check_same_thread=False), size=2)
+    yield path, pool
+    pool.close()
+
+
+def query(path, sql):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(sql).fetchall()
+
+
+def test_updates_only_rows_with_hits(regex_analyzer, database):
+    path, pool = database
+    connector = DatabaseMaskingConnector(pool, 'records', 'id', ['body', 'note'], batch_size=2)
+    stats = connector.run()
+
+    assert stats['rows'] == 5 and stats['values_masked'] == 2
+    assert query(path, "SELECT id FROM updates ORDER BY id") == [(2,), (3,)]
+    records = dict((key, (body, note)) for key, body, note in query(path, "SELECT * FROM records"))
+    assert "john.smith@example.com" not in records[2][0]
+    assert "maria@example.org" not in records[3][1]
+    assert records[1] == ROWS[0][1:] and records[5] == ROWS[4][1:]
+
+
+def test_max_rows_zero_masks_nothing(regex_analyzer, database):
+    path, pool = database
+    stats = DatabaseMaskingConnector(pool, 'records', 'id', ['body', 'note']).run(max_rows=0)
+
+    assert stats['rows'] == 0
+    assert query(path, "SELECT count(*) FROM updates") == [(0,)]
+
+
+def test_max_rows_stops_mid_batch(regex_analyzer, database):
+    path, pool = database
+    stats = DatabaseMaskingConnector(pool, 'records', 'id', ['body', 'note'], batch_size=2).run(max_rows=3)
+
+    assert stats['rows'] == 3 and stats['last_key'] == 3
+    assert query(path, "SELECT id FROM updates ORDER BY id") == [(2,), (3,)]
@@ -0,0 +1,87 @@
+import pytest
+from presidio_analyzer import PatternRecognizer, RecognizerRegistry
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder import DenyListAutomaton, DenyListRecognizer
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_builder.deny_list_recognizer import (
+    normalize, replace_deny_list_recognizers)
+
+TITLES = ["Mr", "Mrs", "Dr.", "Straße", "Van der Berg"]
+
+def test_normalize_keeps_offsets_when_nothing_changes():
+    normalized, origins = normalize("Hello World")
+    assert normalized == "hello world"
+    assert list(origins) == list(range(12))
+
+
+def test_normalize_points_casefolded_characters_back():
+    normalized, origins = normalize("Große")
+    assert normalized == "grosse"
+    assert list(origins) == [0, 1, 2, 3, 3, 4, 5]
+
+
+def test_normalize_collapses_whitespace_runs():
+    text = "a \t\n b\nc"
+    normalized, origins = normalize(text)
+    assert normalized == "a b c"
+    assert list(origins) == [0, 1, 5, 6, 7, 8]
+
+
+def automaton(terms=TITLES, entity='TITLE', language=None):
+    return DenyListAutomaton().add_terms(terms, entity, language).build()
+
+
+def spans(text, matches):
+    return [text[start:end] for start, end, _, _ in matches]
+
+
+def test_find_is_case_insensitive_and_keeps_original_offsets():
+    text = "Letter to MRS Smith and dr. Jones"
+    assert spans(text, automaton().find(text)) == ["MRS", "dr."]
+
+
+def test_find_respects_word_boundaries():
+    text = "Mrsa and Drama, but Mr_x and xMr are not titles; Mr is"
+    assert spans(text, automaton().find(text)) == ["Mr"]
+
+
+def test_find_matches_across_whitespace_runs_and_folded_characters():
+    text = "Family VAN  DER\nBERG lives on the STRASSE and the Straße"
+    assert spans(text, automaton().find(text)) == ["VAN  DER\nBERG", "STRASSE", "Straße"]
+
+
+def test_find_filters_by_language_and_entity():
+    found = DenyListAutomaton().add_term("Herr", 'TITLE', 'de').add_term("Sir", 'TITLE').add_term("Sir", 'KNIGHT', 'en')
+    text = "Herr and Sir"
+    assert sorted(entity for _, _, entity, _ in found.find(text, language='en')) == ['KNIGHT', 'TITLE']
+    assert spans(text, found.find(text, language='de')) == ["Herr", "Sir"]
+    assert spans(text, found.find(text, language='en', entities={'KNIGHT'})) == ["Sir"]
+    assert found.entities('de') == ['TITLE']
+
+
+@pytest.mark.parametrize('text', [
+    "Mr Smith met Mrs Jones and Dr. Who",
+    "mr. mrs MR Mrs. dr.dr.",
+    "Dear Mr, dear Mrs; Dr.",
+    "no titles here",
+])
+def test_find_agrees_with_presidio_deny_list(text):
+    presidio = PatternRecognizer(supported_entity='TITLE', deny_list=TITLES)
+    expected = sorted((result.start, result.end) for result in presidio.analyze(text, ['TITLE']))
+    recognizer = DenyListRecognizer(automaton(), supported_language='en')
+    assert sorted((result.start, result.end) for result in recognizer.analyze(text, ['TITLE'])) == expected
+
+
+def test_replace_deny_list_recognizers_moves_terms_into_one_automaton(tmp_path):
+    term_file = tmp_path / "titles.txt"
+    term_file.write_text("# honorifics\nSir\n\nDame\n", encoding='utf-8')
+    registry = RecognizerRegistry(recognizers=[
+        PatternRecognizer(supported_entity='TITLE', deny_list=["Mr", "Mrs"]),
+        PatternRecognizer(supported_entity='TITLE', deny_list=["Herr"], supported_language='de'),
+    ])
+
+    found = replace_deny_list_recognizers(registry, ['en', 'de'], term_files=[{'path': term_file, 'supported_entity': 'TITLE'}])
+
+    assert len(found) == 5
+    assert [(type(recognizer), recognizer.supported_language) for recognizer in registry.recognizers] == [
+        (DenyListRecognizer, 'en'), (DenyListRecognizer, 'de')]
+    assert spans("Herr and Mr and Dame", found.find("Herr and Mr and Dame", language='de')) == ["Herr", "Dame"]
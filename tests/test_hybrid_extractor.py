@@ -0,0 +1,66 @@
+from PIL import Image, ImageDraw
+from reportlab.pdfgen import canvas
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.hybrid_extractor import HybridPDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+
+FORM_TEXT = "Application form for a new account, applicant details below."
+
+class RegionOCR:
+    """Reads "Maria Garcia" over the left half of every image, standing in for Tesseract."""
+
+    def __init__(self):
+        self.regions = []
+
+    def process(self, image, page, page_number, lang, ocr_config='', transform=None):
+        self.regions.append((page.bbox, image.size))
+        words = WordStoreBuilder()
+        words.add_word("Maria", 0.0, 0.0, page.width / 4, page.height / 2, page_number, 0, 5)
+        words.add_word("Garcia", page.width / 4, 0.0, page.width / 2, page.height / 2, page_number, 6, 12)
+        return "Maria Garcia\n\f", words.build()
+
+
+def write_form(path, image_size):
+    image = Image.new('RGB', (400, 200), 'white')
+    ImageDraw.Draw(image).text((20, 80), "ID: Maria Garcia", fill='black')
+    image_path = path.with_suffix('.png')
+    image.save(image_path)
+
+    pdf = canvas.Canvas(str(path), pagesize=(612, 792))
+    pdf.setFont('Helvetica', 12)
+    pdf.drawString(72, 720, FORM_TEXT)
+    pdf.drawImage(str(image_path), 100, 300, width=image_size[0], height=image_size[1])
+    pdf.showPage()
+    pdf.save()
+
+
+def extract(path):
+    processor = HybridPDFProcessor(str(path), 'eng', 144, '')
+    processor.ocr_processor = RegionOCR()
+    text, words = processor.process()
+    return processor, text, words
+
+
+def test_ocrs_images_on_text_layer_pages(tmp_path):
+    path = tmp_path / "form.pdf"
+    write_form(path, (200, 100))
+    processor, text, words = extract(path)
+
+    assert processor.ocr_processor.regions == [((100, 392, 300, 492), (400, 200))]
+    assert text.startswith(FORM_TEXT) and "Maria Garcia" in text
+    assert processor.page_stats[0]['method'] == 'text_layer' and processor.page_stats[0]['ocr_regions'] == 1
+
+    maria = next(index for index in range(len(words)) if words.text(index) == "Maria")
+    start, end = words.char_offsets[maria].tolist()
+    assert text[start:end] == "Maria"
+    # Region boxes are moved to page coordinates
+    assert words.boxes[maria].tolist() == [100.0, 392.0, 150.0, 442.0]
+
+
+def test_ignores_small_images(tmp_path):
+    path = tmp_path / "form.pdf"
+    write_form(path, (40, 20))
+    processor, text, _ = extract(path)
+
+    assert processor.ocr_processor.regions == []
+    assert "Maria" not in text
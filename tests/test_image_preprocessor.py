@@ -0,0 +1,81 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.image_processor.image_preprocessor import AdaptiveResolution, ImagePreprocessor, PageTransform
+
+
+def to_processed(points, angle, center, crop_left, crop_top):
+    """Where pixels of the rendered image land after PIL rotates it by angle degrees counterclockwise and it is cropped."""
+    theta = math.radians(angle)
+    dx, dy = points[:, 0] - center[0], points[:, 1] - center[1]
+    x = center[0] + dx * math.cos(theta) + dy * math.sin(theta)
+    y = center[1] - dx * math.sin(theta) + dy * math.cos(theta)
+    return np.stack([x - crop_left, y - crop_top], axis=1)
+
+
+@pytest.mark.parametrize("angle", [0.0, 2.4, -3.0])
+def test_map_boxes_inverts_rotation_crop_and_scale(angle):
+    points = np.array([[120.0, 80.0], [610.5, 44.0], [15.0, 390.25]])
+    transform = PageTransform(0.36, 0.5, angle=angle, center=(400.0, 300.0), crop_left=37, crop_top=12)
+    processed = to_processed(points, angle, transform.center, transform.crop_left, transform.crop_top)
+
+    # A box of zero size is a point, its corners map back exactly
+    mapped = transform.map_boxes(np.concatenate([processed, processed], axis=1))
+
+    np.testing.assert_allclose(mapped[:, :2], points * [0.36, 0.5], atol=1e-9)
+    np.testing.assert_allclose(mapped[:, 2:], points * [0.36, 0.5], atol=1e-9)
+
+
+def test_rotated_boxes_map_to_their_bounding_box():
+    transform = PageTransform(1.0, 1.0, angle=90.0, center=(50.0, 50.0))
+
+    # Rotated a quarter turn back, a wide box becomes a tall one
+    np.testing.assert_allclose(transform.map_boxes([[40, 45, 60, 55]]), [[45, 40, 55, 60]], atol=1e-9)
+
+
+def skewed_page(angle, size=(800, 600)):
+    """A page of dark text-like bars, rotated by angle degrees counterclockwise like a skewed scan."""
+    image = Image.new('L', size, 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(150, 450, 30):
+        draw.rectangle([200, top, 600, top + 12], fill=0)
+    return image.rotate(angle, resample=Image.BILINEAR, fillcolor=255)
+
+
+def ink_box(pixels):
+    rows, columns = np.flatnonzero((pixels < 128).any(axis=1)), np.flatnonzero((pixels < 128).any(axis=0))
+    return np.array([columns[0], rows[0], columns[-1] + 1, rows[-1] + 1], dtype=np.float64)
+
+
+@pytest.mark.parametrize("skew", [-2.0, 1.6])
+def test_deskewed_word_boxes_map_back_to_the_page(skew):
+    page = SimpleNamespace(width=400, height=300)
+    image = skewed_page(skew)
+
+    processed, transform = ImagePreprocessor(mode='binary').process(image, page)
+
+    assert transform.angle == pytest.approx(-skew, abs=0.2)
+    assert processed.size < image.size
+    # The text block, found on the processed image, lands where it is on the skewed page
+    mapped = transform.map_boxes(ink_box(np.asarray(processed)))[0]
+    np.testing.assert_allclose(mapped, ink_box(np.asarray(image)) * 0.5, atol=3)
+
+
+def test_adaptive_resolution_targets_the_line_height():
+    image = Image.new('L', (600, 400), 255)
+    draw = ImageDraw.Draw(image)
+    for top in range(40, 360, 40):
+        draw.rectangle([40, top, 560, top + 9], fill=0)
+    gray = np.asarray(image)
+
+    assert AdaptiveResolution.line_height(gray) == 10
+    assert AdaptiveResolution.line_height(np.full((50, 50), 255, dtype=np.uint8)) is None
+
+    page = SimpleNamespace(to_image=lambda resolution: SimpleNamespace(original=image))
+    # 10 pixel lines at 72 dpi are 10 points, 40 pixel lines need 288 dpi
+    assert AdaptiveResolution(probe_resolution=72, target_line_height=40).choose(page) == 288
+    assert AdaptiveResolution(target_line_height=40, max_resolution=200).choose(page) == 200
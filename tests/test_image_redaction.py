@@ -0,0 +1,98 @@
+from io import BytesIO
+
+import numpy as np
+import pdfplumber
+import pymupdf
+import pytest
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor import image_redaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.redactor.image_redaction import ImageRedaction
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+
+def reference_mask(boxes, shape, x_scale, y_scale):
+    mask = np.zeros(shape, dtype=bool)
+    for x0, y0, x1, y1 in boxes:
+        mask[max(0, int(np.floor(y0 * y_scale))):max(0, int(np.ceil(y1 * y_scale))),
+             max(0, int(np.floor(x0 * x_scale))):max(0, int(np.ceil(x1 * x_scale)))] = True
+    return mask
+
+
+@pytest.mark.parametrize("boxes", [
+    [(2, 2, 5, 5), (5, 2, 8, 5)],            # touching edges
+    [(2, 2, 6, 6), (4, 4, 9, 9), (3, 3, 5, 5)],  # overlapping, one nested
+    [(-3, -3, 2, 2), (8, 7, 15, 20)],        # clipped at the image edges
+    [(1.2, 1.7, 3.1, 4.01)],                  # fractional, grows outward
+    [(20, 20, 30, 30), (0, 0, 0, 0)],        # outside the image, empty
+])
+def test_box_mask_matches_slice_assignment(boxes):
+    boxes = np.array(boxes, dtype=float)
+    mask = ImageRedaction._box_mask(boxes, (10, 12), 1.0, 1.0)
+    assert mask.shape == (10, 12)
+    np.testing.assert_array_equal(mask, reference_mask(boxes, (10, 12), 1.0, 1.0))
+
+
+def test_box_mask_scales_points_to_pixels():
+    mask = ImageRedaction._box_mask(np.array([[1.0, 2.0, 3.0, 4.0]]), (20, 20), 2.0, 3.0)
+    np.testing.assert_array_equal(np.argwhere(mask).min(axis=0), [6, 2])
+    np.testing.assert_array_equal(np.argwhere(mask).max(axis=0), [11, 5])
+
+
+def page_image(width=100, height=80):
+    return Image.new('L', (width, height), 255), 72.0, 57.6
+
+
+def words_on(*pages):
+    return WordStore.from_words([
+        {"text": "secret", "start_x": x0, "start_y": y0, "end_x": x1, "end_y": y1, "page_number": page_number}
+        for page_number, (x0, y0, x1, y1) in pages
+    ])
+
+
+def output_pages(data):
+    """The image embedded in each page of an output PDF, as a grayscale array; JPEG blurs the box edges a little."""
+    with pymupdf.open(stream=data, filetype="pdf") as document:
+        return [np.array(Image.open(BytesIO(document.extract_image(page.get_images()[0][0])["image"])).convert('L'))
+                for page in document]
+
+
+def test_kept_page_images_are_not_rendered_again(monkeypatch):
+    def no_render(*args, **kwargs):
+        raise AssertionError("the input was parsed again")
+
+    monkeypatch.setattr(image_redaction.pdfplumber, "open", no_render)
+    pages = output_pages(ImageRedaction().apply_redaction(b"not a pdf", words_on((1, (9, 9, 18, 18))), None,
+                                                          page_images=[page_image(), page_image()]))
+
+    assert len(pages) == 2
+    assert pages[0][14:23, 14:23].max() < 64 and pages[0][40:, 40:].min() > 192
+    assert pages[1].min() > 192
+
+
+def write_pdf(path, pages=2):
+    pdf = canvas.Canvas(str(path), pagesize=(72, 57.6))
+    for _ in range(pages):
+        pdf.drawString(5, 30, "page")
+        pdf.showPage()
+    pdf.save()
+
+
+def test_only_missing_pages_are_rendered(tmp_path, monkeypatch):
+    path = tmp_path / "input.pdf"
+    write_pdf(path, pages=3)
+    rendered = []
+    to_image = pdfplumber.page.Page.to_image
+
+    def counting_to_image(page, *args, **kwargs):
+        rendered.append(page.page_number)
+        return to_image(page, *args, **kwargs)
+
+    monkeypatch.setattr(pdfplumber.page.Page, "to_image", counting_to_image)
+    pages = output_pages(ImageRedaction().apply_redaction(str(path), words_on((1, (9, 9, 18, 18))), None,
+                                                          page_images=[page_image(), None, page_image()]))
+
+    assert rendered == [2]
+    assert len(pages) == 3 and all(page.shape == (80, 100) for page in pages)
+    assert pages[0][14:23, 14:23].max() < 64
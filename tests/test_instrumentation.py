@@ -0,0 +1,135 @@
+import json
+import logging
+import re
+
+import pytest
+
+from dynamic_data_masking.dynamic_data_masking_pipeline import instrumentation
+from dynamic_data_masking.dynamic_data_masking_pipeline.instrumentation import (
+    Instrumentation, JsonLinesExporter, JsonLogFormatter, PrometheusTextExporter, configure_logging, enable_instrumentation,
+    get_instrumentation, span,
+)
+
+SAMPLE = re.compile(r'^(?P<metric>[a-z_]+)\{span="(?P<span>(?:[^"\\]|\\.)*)"\} (?P<value>\S+)$')
+
+
+@pytest.fixture(autouse=True)
+def restore_globals(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_instrumentation', instrumentation._instrumentation)
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def record_spans(target):
+    with target.span('pipeline', items=1, document='a.pdf'):
+        for page_number in (1, 2):
+            with target.span('pdf.page', page_number=page_number) as record:
+                record.set(method='ocr').add_items(3).add_items(2)
+    with pytest.raises(ValueError):
+        with target.span('redact.write'):
+            raise ValueError("disk full")
+
+
+def test_spans_nest_and_record_errors():
+    target = Instrumentation()
+    record_spans(target)
+
+    records = target.records
+    assert [(record['name'], record['parent']) for record in records] == [
+        ('pdf.page', 'pipeline'), ('pdf.page', 'pipeline'), ('pipeline', None), ('redact.write', None),
+    ]
+    assert records[0]['attributes'] == {'page_number': 1, 'method': 'ocr'} and records[0]['items'] == 5
+    assert records[-1]['error'] == 'ValueError'
+    assert all(record['wall_seconds'] >= 0 and record['cpu_seconds'] >= 0 for record in records)
+
+    summary = target.summary()
+    assert summary['pdf.page']['calls'] == 2 and summary['pdf.page']['items'] == 10
+    assert summary['redact.write']['errors'] == 1
+
+
+def test_disabled_instrumentation_keeps_nothing():
+    assert not get_instrumentation().enabled
+    with span('pdf.page', page_number=1) as record:
+        record.add_items(4)
+    assert record['items'] == 4
+    assert get_instrumentation().take_records() == []
+
+    assert enable_instrumentation() is get_instrumentation()
+    with span('pdf.page'):
+        pass
+    assert [record['name'] for record in get_instrumentation().take_records()] == ['pdf.page']
+
+
+def test_json_lines_round_trip(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    target = Instrumentation(exporters=[JsonLinesExporter(path)])
+    record_spans(target)
+    expected = json.loads(json.dumps(target.records))
+
+    target.export()
+    record_spans(target)
+    target.export()
+
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert len(lines) == 8
+    assert lines[:4] == expected
+    assert target.records == []
+
+
+def test_prometheus_text_format(tmp_path):
+    path = tmp_path / "metrics" / "ddm.prom"
+    target = Instrumentation(exporters=[PrometheusTextExporter(path)])
+    record_spans(target)
+    with target.span('quoted "name" \\ here'):
+        pass
+    summary = target.summary()
+    target.export()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert [entry.name for entry in path.parent.iterdir()] == ["ddm.prom"]
+
+    samples, described = {}, {}
+    for line in lines:
+        if line.startswith('# HELP '):
+            described[line.split()[2]] = None
+        elif line.startswith('# TYPE '):
+            _, _, metric, metric_type = line.split()
+            assert metric in described and metric_type in ('counter', 'gauge')
+            described[metric] = metric_type
+        else:
+            match = SAMPLE.match(line)
+            assert match, line
+            # Every sample follows the HELP and TYPE lines of its metric
+            assert described.get(match['metric'])
+            span_name = re.sub(r'\\(.)', r'\1', match['span'])
+            samples[match['metric'], span_name] = float(match['value'])
+
+    assert set(described) == {f"ddm_{name}" for name in (
+        'span_calls_total', 'span_wall_seconds_total', 'span_cpu_seconds_total', 'span_items_total', 'span_errors_total', 'span_peak_rss_bytes')}
+    assert samples['ddm_span_calls_total', 'pdf.page'] == 2
+    assert samples['ddm_span_items_total', 'pdf.page'] == 10
+    assert samples['ddm_span_errors_total', 'redact.write'] == 1
+    assert samples['ddm_span_calls_total', 'quoted "name" \\ here'] == 1
+    assert samples['ddm_span_wall_seconds_total', 'pipeline'] == pytest.approx(summary['pipeline']['wall_seconds'])
+
+
+def test_json_log_lines_carry_the_extra_fields(capsys):
+    configure_logging('INFO', json_format=True)
+    logger = logging.getLogger('dynamic_data_masking.test')
+
+    logger.info("image strategy", extra={'pages': 3, 'resolution': 200})
+    logger.debug("not shown")
+    try:
+        raise RuntimeError("broken page")
+    except RuntimeError:
+        logger.exception("page failed", extra={'page_number': 2})
+
+    entries = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert len(entries) == 2
+    assert {key: entries[0][key] for key in ('level', 'logger', 'message', 'pages', 'resolution')} == {
+        'level': 'INFO', 'logger': 'dynamic_data_masking.test', 'message': "image strategy", 'pages': 3, 'resolution': 200}
+    assert entries[1]['page_number'] == 2 and "RuntimeError: broken page" in entries[1]['exception']
+    assert not set(entries[0]) & (JsonLogFormatter.RESERVED - {'message'})
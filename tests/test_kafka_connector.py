@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from dynamic_data_masking.ddm_connectors.ddm_kafka_connector import KafkaMaskingConnector, InMemoryBroker, InMemoryConsumer, InMemoryProducer
+
+class EchoConnector(KafkaMaskingConnector):
+    """Masks by upper-casing, so the commit logic runs without the NLP models."""
+
+    def __init__(self, *args, failures=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Remaining failures of each message value, -1 fails forever
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def process_message(self, message):
+        value = message.value().decode('utf-8')
+        self.calls.append(value)
+        if self.failures.get(value):
+            self.failures[value] -= 1
+            raise ValueError(f"cannot mask {value}")
+        return {'masked_text': value.upper()}
+
+
+@pytest.fixture
+def broker():
+    return InMemoryBroker(partitions=1).create_topic('input').create_topic('output')
+
+
+def make_connector(broker, **kwargs):
+    consumer = InMemoryConsumer(broker, 'ddm', ['input'])
+    kwargs.setdefault('batch_size', 10)
+    return EchoConnector(consumer, InMemoryProducer(broker), 'output', poll_timeout=0, max_in_flight=2, **kwargs)
+
+
+def publish(broker, values):
+    for value in values:
+        broker.append('input', value.encode('utf-8'))
+
+
+def outputs(broker, topic='output'):
+    return [json.loads(message.value())['masked_text'] for message in broker.messages(topic)]
+
+
+def test_commits_after_success(broker):
+    publish(broker, ['a', 'b', 'c'])
+    connector = make_connector(broker)
+    assert connector.run_once() == 3
+    connector.close()
+
+    assert outputs(broker) == ['A', 'B', 'C']
+    assert broker.committed[('ddm', 'input', 0)] == 3
+    assert connector.metrics.snapshot()['lag'] == 0
+
+
+def test_rewinds_to_failure_and_retries_without_duplicates(broker):
+    publish(broker, ['a', 'b', 'c', 'd'])
+    connector = make_connector(broker, failures={'b': 1})
+
+    connector.run_once()
+    # Committed up to the failed message, the partition is rewound to it
+    assert broker.committed[('ddm', 'input', 0)] == 1
+    connector.run_once()
+    connector.close()
+
+    assert sorted(outputs(broker)) == ['A', 'B', 'C', 'D']
+    assert connector.calls.count('c') == 1 and connector.calls.count('b') == 2
+    assert broker.committed[('ddm', 'input', 0)] == 4
+
+
+def test_skips_message_failing_every_attempt(broker):
+    publish(broker, ['a', 'poison', 'c'])
+    connector = make_connector(broker, failures={'poison': -1}, max_attempts=3)
+
+    connector.run(max_batches=5, stop_when_idle=True)
+    connector.close()
+
+    assert connector.calls.count('poison') == 3
+    assert sorted(outputs(broker)) == ['A', 'C']
+    assert broker.committed[('ddm', 'input', 0)] == 3
+    assert connector.metrics.snapshot()['skipped'] == 1
+
+
+def test_dead_letters_failures(broker):
+    publish(broker, ['a', 'poison'])
+    connector = make_connector(broker, failures={'poison': -1}, dead_letter_topic='dead')
+
+    connector.run_once()
+    connector.close()
+
+    dead_letters = [json.loads(message.value()) for message in broker.messages('dead')]
+    assert [(entry['offset'], entry['value']) for entry in dead_letters] == [(1, 'poison')]
+    assert broker.committed[('ddm', 'input', 0)] == 2
+
+
+def test_lag_metrics():
+    broker = InMemoryBroker(partitions=2).create_topic('input').create_topic('output')
+    for index in range(10):
+        broker.append('input', str(index).encode('utf-8'), partition=index % 2)
+    connector = make_connector(broker, batch_size=4)
+
+    connector.run_once()
+    snapshot = connector.metrics.snapshot()
+    assert snapshot['lag'] == 6
+    assert sum(snapshot['lag_by_partition'].values()) == 6
+
+    connector.run(stop_when_idle=True)
+    connector.close()
+    assert connector.metrics.snapshot()['lag'] == 0
+    assert sorted(outputs(broker), key=int) == [str(index) for index in range(10)]
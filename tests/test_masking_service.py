@@ -0,0 +1,114 @@
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dynamic_data_masking.ddm_service import masking_service, MaskingHTTPServer, MaskingService
+
+class BlockingPipeline:
+
+    def __init__(self, release, started):
+        self.release = release
+        self.started = started
+
+    def execute_pipeline(self):
+        self.started.set()
+        self.release.wait()
+
+
+def wait_for(job, timeout=10):
+    deadline = time.time() + timeout
+    while job.status in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.02)
+    return job
+
+
+@pytest.mark.parametrize('options, message', [
+    ({'input_file_path': 'in.pdf'}, 'output_file_path'),
+    ({'input_file_path': 'in.pdf', 'output_file_path': 'out.pdf', 'lang': 'de'}, 'Unsupported language'),
+    ({'input_file_path': 'in.pdf', 'output_file_path': 'out.pdf', 'colour': 'red'}, 'Unknown options: colour'),
+])
+def test_submit_rejects_invalid_options(options, message):
+    with pytest.raises(ValueError, match=message):
+        MaskingService().submit(options)
+
+
+def test_submit_raises_when_the_queue_is_full():
+    service = MaskingService(max_queue_size=1)
+    service.submit({'input_file_path': 'a.pdf', 'output_file_path': 'a.out.pdf'})
+    with pytest.raises(queue.Full):
+        service.submit({'input_file_path': 'b.pdf', 'output_file_path': 'b.out.pdf'})
+
+
+def test_submit_and_stop_round_trip(regex_analyzer, letter_pdf, tmp_path):
+    service = MaskingService(concurrency=2).start()
+    try:
+        done = service.submit({'input_file_path': str(letter_pdf), 'output_file_path': str(tmp_path / "masked.pdf")})
+        failed = service.submit({'input_file_path': str(tmp_path / "missing.pdf"), 'output_file_path': str(tmp_path / "missing.out.pdf")})
+
+        assert wait_for(done).status == 'done' and (tmp_path / "masked.pdf").exists()
+        assert wait_for(failed).status == 'failed' and failed.error
+        assert service.get_job(done.job_id) is done
+    finally:
+        service.stop()
+    assert service.workers == [] and service.status()['running'] == 0
+
+
+def test_stop_does_not_hang_on_a_full_queue(regex_analyzer, monkeypatch):
+    release, started = threading.Event(), threading.Event()
+    monkeypatch.setattr(masking_service.DynamicDataMaskingPipelineDirector, 'construct',
+                        lambda input_file_path, output_file_path, **options: BlockingPipeline(release, started))
+    service = MaskingService(concurrency=1, max_queue_size=1).start()
+    running = service.submit({'input_file_path': 'a.pdf', 'output_file_path': 'a.out.pdf'})
+    assert started.wait(5)
+    queued = service.submit({'input_file_path': 'b.pdf', 'output_file_path': 'b.out.pdf'})
+
+    stopper = threading.Thread(target=service.stop)
+    stopper.start()
+    release.set()
+    stopper.join(timeout=5)
+
+    assert not stopper.is_alive()
+    assert running.status == 'done' and queued.status == 'queued'
+
+
+@pytest.fixture
+def server():
+    service = MaskingService(max_queue_size=1)
+    http_server = MaskingHTTPServer(('127.0.0.1', 0), service)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+    yield http_server
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def request(server, path, body=None):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    data = body.encode('utf-8') if isinstance(body, str) else body
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method='POST' if body is not None else 'GET')) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+@pytest.mark.parametrize('body', ['[]', '"x"', '1', 'null', '{not json', '{"input_file_path": "in.pdf"}'])
+def test_invalid_job_requests_get_400(server, body):
+    status, payload = request(server, '/jobs', body)
+    assert status == 400 and payload['error']
+
+
+def test_job_requests_are_queued_and_reported(server):
+    status, job = request(server, '/jobs', json.dumps({'input_file_path': 'in.pdf', 'output_file_path': 'out.pdf'}))
+    assert status == 202 and job['status'] == 'queued'
+
+    assert request(server, f"/jobs/{job['job_id']}") == (200, job)
+    assert request(server, '/jobs/unknown')[0] == 404
+    assert request(server, '/health') == (200, {'status': 'ok', 'queued': 1, 'running': 0, 'concurrency': 2})
+    # The queue holds a single job
+    assert request(server, '/jobs', json.dumps({'input_file_path': 'in.pdf', 'output_file_path': 'out.pdf'}))[0] == 503
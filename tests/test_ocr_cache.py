@@ -0,0 +1,65 @@
+import os
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor import OCRResultCache
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+WORDS = WordStore.from_words([
+    {'text': 'John', 'start_x': 1.0, 'start_y': 2.0, 'end_x': 3.0, 'end_y': 4.0, 'page_number': 1, 'char_start': 0, 'char_end': 4},
+    {'text': 'Smith', 'start_x': 5.0, 'start_y': 2.0, 'end_x': 9.0, 'end_y': 4.0, 'page_number': 1, 'char_start': 5, 'char_end': 10},
+])
+
+def disk_size(cache):
+    return sum(path.stat().st_size for path in cache.cache_dir.glob('*/*.npz'))
+
+
+def put_pages(cache, pages, file_hash='file'):
+    keys = [OCRResultCache.make_key(file_hash, page, ('ocr', 300)) for page in range(pages)]
+    for page, key in enumerate(keys):
+        cache.put(key, f"John Smith {page}", WORDS, {'page': page})
+    return keys
+
+
+def test_round_trip(tmp_path):
+    cache = OCRResultCache(tmp_path)
+    key = put_pages(cache, 1)[0]
+    page_text, word_data, page_stat = cache.get(key)
+    assert page_text == "John Smith 0"
+    assert list(word_data) == list(WORDS)
+    assert page_stat == {'page': 0}
+    assert cache.get(OCRResultCache.make_key('other', 0, ())) is None
+
+
+def test_running_total_matches_disk(tmp_path):
+    cache = OCRResultCache(tmp_path)
+    keys = put_pages(cache, 20)
+    # Overwriting an entry replaces its size
+    cache.put(keys[0], "John Smith " * 100, WORDS, {'page': 0})
+    assert cache.total_bytes == disk_size(cache)
+
+
+def test_evicts_least_recently_used_to_low_water(tmp_path):
+    cache = OCRResultCache(tmp_path, max_bytes=10 ** 9)
+    keys = put_pages(cache, 10)
+    entry_size = disk_size(cache) / 10
+    for index, key in enumerate(keys):
+        path = cache._entry_path(key)
+        os.utime(path, (index, index))
+    # Reading refreshes the first entry
+    assert cache.get(keys[0]) is not None
+
+    cache.max_bytes = int(entry_size * 8.5)
+    put_pages(cache, 1, file_hash='new')
+
+    assert disk_size(cache) <= cache.max_bytes * cache.low_water
+    assert cache.total_bytes == disk_size(cache)
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+
+def test_rescan_picks_up_other_writers(tmp_path):
+    cache = OCRResultCache(tmp_path, rescan_interval=5)
+    other = OCRResultCache(tmp_path)
+    put_pages(cache, 1)
+    put_pages(other, 10, file_hash='other')
+    put_pages(cache, 5, file_hash='again')
+    assert cache.total_bytes == disk_size(cache)
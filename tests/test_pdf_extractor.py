@@ -0,0 +1,99 @@
+import pytest
+from reportlab.pdfgen import canvas
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.hybrid_extractor import HybridPDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.pdf_extractor import PDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+
+SCANNED_PAGES = {3, 7}
+
+class PageOCR:
+    """Reads "Scanned page N" off any rendered page, standing in for Tesseract; picklable for the worker processes."""
+
+    def process(self, image, page, page_number, lang, ocr_config='', transform=None):
+        words = WordStoreBuilder()
+        words.add_word("Scanned", 10.0, 10.0, 60.0, 20.0, page_number, 0, 7)
+        words.add_word("page", 65.0, 10.0, 90.0, 20.0, page_number, 8, 12)
+        words.add_word(str(page_number), 95.0, 10.0, 105.0, 20.0, page_number, 13, 13 + len(str(page_number)))
+        return f"Scanned page {page_number}\n\f", words.build()
+
+
+@pytest.fixture
+def document(tmp_path):
+    """Nine pages with a text layer naming their page number, but for two blank ones that fall back to OCR."""
+    path = tmp_path / "document.pdf"
+    pdf = canvas.Canvas(str(path), pagesize=(300, 200))
+    for page_number in range(1, 10):
+        if page_number not in SCANNED_PAGES:
+            pdf.setFont('Helvetica', 10)
+            pdf.drawString(20, 150, f"Statement page {page_number} for account holder")
+            pdf.drawString(20, 130, f"Reference REF-{page_number:04d} closing balance")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def extract(path, **options):
+    processor = HybridPDFProcessor(str(path), 'eng', 72, '', **options)
+    processor.ocr_processor = PageOCR()
+    text, words = processor.process()
+    return processor, text, words
+
+
+def test_pages_come_back_in_order_with_document_offsets(document):
+    processor, text, words = extract(document)
+
+    assert [stat['page_number'] for stat in processor.page_stats] == list(range(1, 10))
+    assert [stat['method'] for stat in processor.page_stats] == ['ocr' if number in SCANNED_PAGES else 'text_layer' for number in range(1, 10)]
+    assert text.count("\f") == 9
+    for index in range(len(words)):
+        start, end = words.char_offsets[index].tolist()
+        assert text[start:end] == words.text(index)
+    assert list(words.pages()) == list(range(1, 10))
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_extraction_matches_serial_page_for_page(document, monkeypatch, workers):
+    # Small chunks, so each worker handles several and they can finish out of page order
+    monkeypatch.setattr(PDFProcessor, 'max_chunk_pages', 2)
+    serial, serial_text, serial_words = extract(document)
+    parallel, parallel_text, parallel_words = extract(document, workers=workers)
+
+    assert parallel_text == serial_text
+    assert parallel.page_stats == serial.page_stats
+    assert list(parallel_words) == list(serial_words)
+    for page_number in range(1, 10):
+        assert parallel_words.page_boxes(page_number).tolist() == serial_words.page_boxes(page_number).tolist()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_streaming_turns_off_the_object_cache_and_matches(document, monkeypatch, workers):
+    opened = []
+    open_pdf = PDFProcessor.open_pdf
+
+    def recording_open_pdf(processor, pages=None):
+        pdf = open_pdf(processor, pages)
+        opened.append(pdf.doc.caching)
+        return pdf
+
+    monkeypatch.setattr(PDFProcessor, 'open_pdf', recording_open_pdf)
+    _, cached_text, cached_words = extract(document, workers=workers)
+    assert opened and all(opened)
+
+    opened.clear()
+    _, text, words = extract(document, workers=workers, streaming=True)
+    # With workers only the parent's page count open is seen here, the workers open their own copies
+    assert opened and not any(opened)
+    assert text == cached_text
+    assert list(words) == list(cached_words)
+
+
+def test_iter_pages_yields_one_page_at_a_time(document):
+    processor = HybridPDFProcessor(str(document), 'eng', 72, '', streaming=True)
+    processor.ocr_processor = PageOCR()
+    pages = processor.iter_pages()
+
+    page_text, word_data, page_stat, page_image = next(pages)
+    assert page_text.startswith("Statement page 1 ") and page_stat['page_number'] == 1 and page_image is None
+    assert word_data.char_offsets[0].tolist() == [0, len("Statement")]
+    pages.close()
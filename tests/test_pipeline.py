@@ -0,0 +1,39 @@
+import sys
+
+import pytest
+
+from dynamic_data_masking import main as cli
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import AnalyzerStep, DynamicDataMaskingPipelineDirector
+
+@pytest.mark.parametrize('chunk_size, chunk_overlap', [(30, None), (40, 10), (0, None)])
+def test_pipeline_masks_with_small_analysis_chunks(regex_analyzer, letter_pdf, tmp_path, chunk_size, chunk_overlap):
+    input_path, output_path = letter_pdf, tmp_path / "masked.pdf"
+
+    pipeline = DynamicDataMaskingPipelineDirector.construct(str(input_path), str(output_path), analysis_chunk_size=chunk_size,
+                                                            analysis_chunk_overlap=chunk_overlap)
+    data = pipeline.execute_pipeline()
+
+    emails = [data["text"][result.start:result.end] for result in data["analysis_results"] if result.entity_type == 'EMAIL_ADDRESS']
+    assert emails == ["billing.team@example.com"]
+    assert "billing.team@example.com" not in data["masked_text"]
+    assert output_path.exists()
+
+
+def test_default_overlap_follows_small_chunk_sizes():
+    step = lambda chunk_size, chunk_overlap=None: AnalyzerStep(None, 'en', True, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    assert step(30).get_chunk_overlap() == 7
+    assert step(100000).get_chunk_overlap() == 500
+    assert step(300, 100).get_chunk_overlap() == 100
+
+
+@pytest.mark.parametrize('arguments', [
+    ['--analysis-chunk-size', '-1'],
+    ['--analysis-chunk-overlap', '-5'],
+    ['--analysis-chunk-size', '300', '--analysis-chunk-overlap', '300'],
+])
+def test_cli_rejects_invalid_chunk_options(monkeypatch, arguments):
+    monkeypatch.setattr(sys, 'argv', ['ddm', 'input.pdf', *arguments])
+    monkeypatch.setattr(cli, 'run', lambda parser, args: pytest.fail("the pipeline must not run"))
+    with pytest.raises(SystemExit) as error:
+        cli.main()
+    assert error.value.code == 2
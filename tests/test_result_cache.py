@@ -0,0 +1,147 @@
+from presidio_analyzer import RecognizerResult
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.anonymizer.anonymizer import DynamicDataMaskingAnonimyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.result_cache import MaskingResultCache
+
+def test_normalize_splits_leading_whitespace():
+    assert MaskingResultCache.normalize(" \n value \t") == (" \n ", "value")
+    assert MaskingResultCache.normalize("value") == ("", "value")
+    assert MaskingResultCache.normalize("   ") == ("   ", "")
+
+
+def test_keys_separate_namespace_language_text_and_extra():
+    key = MaskingResultCache.make_key('analyzer', 'abc', 'en', "value")
+    assert key == MaskingResultCache.make_key('analyzer', 'abc', 'en', "value")
+    assert len({key,
+                MaskingResultCache.make_key('anonymizer', 'abc', 'en', "value"),
+                MaskingResultCache.make_key('analyzer', 'abd', 'en', "value"),
+                MaskingResultCache.make_key('analyzer', 'abc', 'fr', "value"),
+                MaskingResultCache.make_key('analyzer', 'abc', 'en', "value "),
+                MaskingResultCache.make_key('analyzer', 'abc', 'en', "value", [['PERSON', 0, 5, 0.85]])}) == 6
+
+
+def test_memory_tier_is_a_bounded_lru():
+    cache = MaskingResultCache(max_entries=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+
+    assert cache.get('b') is None and cache.get('a') == [1] and cache.get('c') == [3]
+    assert cache.stats()['entries'] == 2 and cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+
+    small = MaskingResultCache(max_bytes=40)
+    small.put('a', "x" * 20)
+    small.put('b', "y" * 20)
+    assert small.get('a') is None and small.get('b') == "y" * 20 and small.stats()['bytes'] <= 40
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    first = MaskingResultCache(disk_path=tmp_path / "results.db")
+    first.put('key', [["EMAIL_ADDRESS", 0, 5, 1.0, None]])
+    first.close()
+
+    second = MaskingResultCache(disk_path=tmp_path / "results.db")
+    assert second.get('key') == [["EMAIL_ADDRESS", 0, 5, 1.0, None]]
+    assert second.get('key') is not None
+    assert (second.stats()['disk_hits'], second.stats()['hits']) == (1, 1)
+    second.clear()
+    assert second.get('key') is None
+    second.close()
+
+
+class CountingEngine:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.nlp_engine = engine.nlp_engine
+        self.texts = []
+
+    def analyze(self, text, **kwargs):
+        self.texts.append(text)
+        return self.engine.analyze(text=text, **kwargs)
+
+
+def cached_analyzer(result_cache):
+    analyzer = DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=True, result_cache=result_cache)
+    analyzer.analyzer = CountingEngine(analyzer.analyzer)
+    return analyzer
+
+
+def emails(text, results):
+    return [text[result.start:result.end] for result in results if result.entity_type == 'EMAIL_ADDRESS']
+
+
+def test_analyzer_hits_are_rebased_onto_the_surrounding_whitespace(regex_analyzer):
+    cache = MaskingResultCache()
+    analyzer = cached_analyzer(cache)
+    texts = ["mail ann@example.com", "   mail ann@example.com\n", "\t\tmail ann@example.com  "]
+
+    for text in texts:
+        assert emails(text, analyzer.analyze_text(text)) == ["ann@example.com"]
+
+    assert analyzer.analyzer.texts == ["mail ann@example.com"]
+    assert cache.stats()['hits'] == 2
+
+
+def test_analyzer_cache_hits_are_fresh_objects(regex_analyzer):
+    analyzer = cached_analyzer(MaskingResultCache())
+    first = analyzer.analyze_text("ann@example.com")
+    first[0].start += 100
+    assert analyzer.analyze_text("ann@example.com")[0].start == 0
+
+
+def test_batch_analysis_computes_each_value_once(regex_analyzer):
+    cache = MaskingResultCache(max_text_length=30)
+    analyzer = cached_analyzer(cache)
+    long_text = "long value of bob@example.com " * 2
+    texts = [" ann@example.com", "ann@example.com  ", "no email", long_text, "  ann@example.com"]
+
+    results = list(analyzer.analyze_batch(texts, batch_size=8))
+
+    assert [emails(text, found) for text, found in zip(texts, results)] == [
+        ["ann@example.com"], ["ann@example.com"], [], ["bob@example.com", "bob@example.com"], ["ann@example.com"]]
+    assert sorted(analyzer.analyzer.texts) == sorted(["ann@example.com", "no email", long_text])
+
+
+def test_analyzer_fingerprint_separates_configurations(regex_analyzer):
+    cache = MaskingResultCache()
+    fingerprints = {DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=True, result_cache=cache).fingerprint,
+                    DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=False, result_cache=cache).fingerprint,
+                    DynamicDataMaskingAnalyzer(from_config_file=False, language='en', use_predefined=True, result_cache=cache).fingerprint,
+                    DynamicDataMaskingAnalyzer(from_config_file=True, language='en', use_predefined=True, result_cache=cache, tiered=True).fingerprint}
+    assert len(fingerprints) == 4
+
+
+def person(start, end):
+    return RecognizerResult('PERSON', start, end, 0.85)
+
+
+def test_anonymizer_hits_keep_the_surrounding_whitespace():
+    cache = MaskingResultCache()
+    anonymizer = DynamicDataMaskingAnonimyzer(result_cache=cache)
+
+    assert anonymizer.anonimyze("Anna Smith", [person(0, 10)], True) == "<REDACTED>"
+    assert anonymizer.anonimyze("  Anna Smith\n", [person(2, 12)], True) == "  <REDACTED>\n"
+    assert anonymizer.anonimyze("\tAnna Smith", [person(1, 11)], True) == "\t<REDACTED>"
+    assert cache.stats()['hits'] == 2
+
+
+def test_anonymizer_keys_separate_entities_and_operators():
+    cache = MaskingResultCache()
+    anonymizer = DynamicDataMaskingAnonimyzer(result_cache=cache)
+
+    assert anonymizer.anonimyze("Anna Smith", [person(0, 10)], True) == "<REDACTED>"
+    assert anonymizer.anonimyze("Anna Smith", [person(0, 4)], True) == "<REDACTED> Smith"
+    assert anonymizer.anonimyze("Anna Smith", [RecognizerResult('LOCATION', 0, 10, 0.85)], True) == "<LOCATION>"
+    assert anonymizer.anonimyze("Anna Smith", [person(0, 10)], False) == "<PERSON>"
+    assert cache.stats()['hits'] == 0
+
+
+def test_anonymizer_masks_entities_touching_the_whitespace_without_the_cache():
+    cache = MaskingResultCache()
+    anonymizer = DynamicDataMaskingAnonimyzer(result_cache=cache)
+
+    assert anonymizer.anonimyze(" Anna ", [person(0, 5)], True) == "<REDACTED> "
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,202 @@
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.dynamic_data_masking_pipeline import PipelineStep
+from dynamic_data_masking.dynamic_data_masking_pipeline.staged_executor import (
+    DocumentAssemblyStage, DocumentEnd, PageExtractionStage, PipelineStage, StagedPipelineExecutor, StageError, StepStage)
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStoreBuilder
+
+class AppendStep(PipelineStep):
+    """Appends its name to the item's trace, failing on the documents listed in fail_on."""
+
+    def __init__(self, name, fail_on=(), delay=0.0):
+        self.name = name
+        self.fail_on = set(fail_on)
+        self.delay = delay
+        self.seen = []
+
+    def execute(self, data):
+        if self.delay:
+            time.sleep(random.uniform(0, self.delay))
+        self.seen.append(data["document_id"])
+        if data["document_id"] in self.fail_on:
+            raise ValueError(f"{self.name} failed on {data['document_id']}")
+        return {**data, "trace": data.get("trace", []) + [self.name]}
+
+
+class CountingStage(PipelineStage):
+
+    def __init__(self, name='counting'):
+        super().__init__(name)
+        self.processed = 0
+
+    def process(self, item):
+        self.processed += 1
+        yield item
+
+
+class BlockingStage(PipelineStage):
+
+    def __init__(self, release, name='blocking'):
+        super().__init__(name)
+        self.release = release
+
+    def process(self, item):
+        self.release.wait()
+        yield item
+
+
+class PagesStep(PipelineStep):
+    """Stands in for the FileProcessorStep: every document has the pages listed in its "pages"."""
+
+    def execute(self, data):
+        raise AssertionError("pages are extracted one by one")
+
+    def iter_pages(self, document):
+        for number, text in enumerate(document["pages"], start=1):
+            if text is None:
+                raise OSError(f"page {number} is unreadable")
+            words = WordStoreBuilder()
+            words.add_word(text.split()[0], 0.0, 0.0, 10.0, 10.0, number, 0, len(text.split()[0]))
+            yield {"text": text, "word_coordinates": words.build(), "page_stat": {"page": number}, "page_image": None}
+
+
+class FirstWordStep(PipelineStep):
+    """Stands in for the AnalyzerStep: reports the first word of every page, slowly and in random order."""
+
+    def execute(self, data):
+        time.sleep(random.uniform(0, 0.01))
+        if data["text"].startswith("broken"):
+            raise ValueError("analysis failed")
+
+        class Result:
+            def __init__(self, start, end):
+                self.start, self.end = start, end
+
+        data["analysis_results"] = [Result(0, len(data["text"].split()[0]))]
+        return data
+
+
+def stage_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("ddm-stage-")]
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_threads():
+    yield
+    assert stage_threads() == []
+
+
+def test_pipeline_stage_is_abstract():
+    with pytest.raises(TypeError):
+        PipelineStage("incomplete")
+
+
+def test_items_go_through_every_stage_in_order():
+    first, second = AppendStep("first"), AppendStep("second")
+    executor = StagedPipelineExecutor([StepStage(first, name="first"), StepStage(second, name="second")], queue_size=2)
+
+    results = list(executor.run({"name": index} for index in range(20)))
+
+    assert [result["document_id"] for result in results] == list(range(20))
+    assert all(result["trace"] == ["first", "second"] for result in results)
+    assert executor.stats["first"]["items"] == 20 and executor.stats["second"]["errors"] == 0
+
+
+def test_full_queues_block_the_producers():
+    release = threading.Event()
+    counting = CountingStage()
+    executor = StagedPipelineExecutor([counting, BlockingStage(release)], queue_size=1)
+    results = executor.run({} for _ in itertools.count())
+    consumer = threading.Thread(target=next, args=(results,))
+    consumer.start()
+
+    time.sleep(0.3)
+    # One item in the blocked stage, one in the queue before it, one waiting to be put there
+    assert counting.processed <= 3
+
+    release.set()
+    consumer.join(timeout=5)
+    results.close()
+
+
+def test_failures_become_stage_errors_and_skip_later_stages():
+    first, second = AppendStep("first", fail_on={3}), AppendStep("second")
+    executor = StagedPipelineExecutor([StepStage(first, name="first"), StepStage(second, name="second")])
+
+    results = list(executor.run({} for _ in range(6)))
+
+    errors = [result for result in results if isinstance(result, StageError)]
+    assert len(results) == 6 and len(errors) == 1
+    assert errors[0].stage == "first" and errors[0].document_id == 3 and isinstance(errors[0].error, ValueError)
+    assert 3 not in second.seen
+    assert executor.stats["first"]["errors"] == 1
+
+
+def test_broken_input_iterator_ends_the_run():
+    def work_items():
+        yield {}
+        raise OSError("manifest is unreadable")
+
+    results = list(StagedPipelineExecutor([StepStage(AppendStep("only"), name="only")]).run(work_items()))
+
+    assert results[0]["trace"] == ["only"]
+    assert isinstance(results[1], StageError) and results[1].stage == "input"
+
+
+def test_closing_the_run_stops_the_threads_when_a_stage_raises():
+    executor = StagedPipelineExecutor([StepStage(AppendStep("flaky", fail_on=range(0, 10 ** 6, 2)), workers=3), StepStage(AppendStep("next"))],
+                                      queue_size=2)
+    results = executor.run({} for _ in itertools.count())
+
+    started = time.perf_counter()
+    assert any(isinstance(result, StageError) for result in itertools.islice(results, 10))
+    results.close()
+
+    assert time.perf_counter() - started < 5
+
+
+def documents(*pages):
+    return [{"pages": list(page_texts)} for page_texts in pages]
+
+
+def test_pages_are_reassembled_into_their_documents():
+    executor = StagedPipelineExecutor([PageExtractionStage(PagesStep()), StepStage(FirstWordStep(), workers=4), DocumentAssemblyStage()],
+                                      queue_size=2)
+
+    inputs = documents(["alpha one\n", "beta two\n", "gamma three\n"], ["delta\n"], [], ["epsilon five\n", "zeta six\n"])
+    results = sorted(executor.run(inputs), key=lambda result: result["document_id"])
+
+    assert [result["text"] for result in results] == ["alpha one\nbeta two\ngamma three\n", "delta\n", "", "epsilon five\nzeta six\n"]
+    first = results[0]
+    assert [first["text"][result.start:result.end] for result in first["analysis_results"]] == ["alpha", "beta", "gamma"]
+    assert first["word_coordinates"].char_offsets.tolist() == [[0, 5], [10, 14], [19, 24]]
+    assert first["page_stats"] == [{"page": 1}, {"page": 2}, {"page": 3}]
+
+
+def test_failed_pages_fail_only_their_document():
+    executor = StagedPipelineExecutor([PageExtractionStage(PagesStep()), StepStage(FirstWordStep(), workers=2), DocumentAssemblyStage()])
+
+    inputs = documents(["fine page\n"], ["fine page\n", "broken page\n"], ["fine page\n", None, "never read\n"])
+    results = {result.document_id if isinstance(result, StageError) else result["document_id"]: result for result in executor.run(inputs)}
+
+    assert results[0]["text"] == "fine page\n"
+    assert isinstance(results[1], StageError) and results[1].stage == "FirstWordStep" and results[1].page_number == 2
+    assert isinstance(results[2], StageError) and results[2].stage == "FileProcessorStep" and isinstance(results[2].error, OSError)
+
+
+def test_assembly_waits_for_pages_that_overtake_the_end_marker():
+    assembly = DocumentAssemblyStage()
+    words = WordStoreBuilder().build()
+    page = lambda number, text: {"document_id": 7, "page_number": number, "text": text, "word_coordinates": words, "page_stat": {},
+                                 "page_image": None}
+
+    assert list(assembly.process(page(2, "second "))) == []
+    assert list(assembly.process(DocumentEnd({"document_id": 7}, page_count=2))) == []
+    (document,) = assembly.process(page(1, "first "))
+
+    assert document["text"] == "first second " and assembly.documents == {}
@@ -0,0 +1,82 @@
+import re
+
+import pytest
+from presidio_analyzer import RecognizerResult
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer import DynamicDataMaskingAnalyzer
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.text_chunker import TextChunker
+
+def test_overlap_must_be_smaller_than_chunk():
+    with pytest.raises(ValueError):
+        TextChunker(max_chunk_size=10, overlap=10)
+
+
+@pytest.mark.parametrize('text', [
+    "",
+    "short text",
+    "word " * 200,
+    "line one\nline two\n\nparagraph\fnext page " * 20,
+    "x" * 537,
+])
+def test_chunks_cover_text_and_overlap(text):
+    chunker = TextChunker(max_chunk_size=64, overlap=16)
+    chunks = list(chunker.iter_chunks(text))
+
+    assert all(chunk == text[offset:offset + len(chunk)] and len(chunk) <= 64 for offset, chunk in chunks)
+    assert ''.join(chunk[:next_offset - offset] for (offset, chunk), (next_offset, _) in zip(chunks, chunks[1:] + [(len(text), '')])) == text
+    for (offset, chunk), (next_offset, _) in zip(chunks, chunks[1:]):
+        assert offset < next_offset <= offset + len(chunk) and offset + len(chunk) - next_offset <= 16
+
+
+def test_chunks_cut_on_boundaries():
+    text = "alpha beta\n\ngamma delta\n\nepsilon zeta\n\neta theta"
+    chunks = list(TextChunker(max_chunk_size=26, overlap=6).iter_chunks(text))
+    assert [chunk for _, chunk in chunks][0] == "alpha beta\n\ngamma delta\n\n"
+
+
+def test_chunked_analysis_reports_boundary_entities_once(regex_analyzer):
+    analyzer = DynamicDataMaskingAnalyzer(from_config_file=None, language='en', use_predefined=True)
+    text = " ".join(f"contact{index}@example.com filler words here" for index in range(40))
+
+    chunked = analyzer.analyze_text_chunked(text, max_chunk_size=120, overlap=40)
+    whole = analyzer.analyze_text(text)
+
+    emails = lambda results: sorted((result.start, result.end) for result in results if result.entity_type == 'EMAIL_ADDRESS')
+    assert len(emails(whole)) == 40
+    assert emails(chunked) == emails(whole)
+
+
+class NameAnalyzer:
+    """Stands in for the engine, reporting every capitalized word run as a PERSON."""
+
+    def analyze(self, text, language, **kwargs):
+        return [RecognizerResult('PERSON', match.start(), match.end(), 0.85) for match in re.finditer(r'[A-Z]\w*(?: [A-Z]\w*)*', text)]
+
+
+def name_analyzer():
+    analyzer = DynamicDataMaskingAnalyzer(from_config_file=None, language='en', use_predefined=True)
+    analyzer.analyzer = NameAnalyzer()
+    return analyzer
+
+
+def test_iter_analyze_chunks_drops_overlapping_duplicates(regex_analyzer):
+    # The second chunk starts at "Doe", so it only sees the end of the name the first one found whole
+    text = "x" * 27 + " Jane Doe " + "y" * 60
+
+    per_chunk = list(name_analyzer().iter_analyze_chunks(text, max_chunk_size=70, overlap=40))
+
+    assert [offset for offset, _ in TextChunker(max_chunk_size=70, overlap=40).iter_chunks(text)][1] == text.index("Doe")
+    start = text.index("Jane")
+    assert [[(result.start, result.end) for result in results] for results in per_chunk] == [[], [(start, start + len("Jane Doe"))]]
+
+
+def test_entity_cut_by_chunk_end_is_reported_whole(regex_analyzer):
+    # The first chunk ends after "Mary Jane", the second one starts at "Jane" and sees "Jane Doe"
+    text = "x" * 26 + " Mary Jane Doe " + "y" * 60
+    chunks = list(TextChunker(max_chunk_size=40, overlap=8).iter_chunks(text))
+    assert chunks[0][1].endswith("Mary Jane ") and chunks[1][0] == text.index("Jane")
+
+    results = name_analyzer().analyze_text_chunked(text, max_chunk_size=40, overlap=8)
+
+    start = text.index("Mary")
+    assert [(result.start, result.end) for result in results] == [(start, start + len("Mary Jane Doe"))]
@@ -0,0 +1,146 @@
+from types import SimpleNamespace
+
+import pytest
+from presidio_analyzer import RecognizerResult
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer import analyzer_engine_director
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.analyzer_engine_director import PresidioAnalyzerDirector
+from dynamic_data_masking.dynamic_data_masking_pipeline.analyzer.tiered_analysis import TieredAnalyzerEngine, TierPolicy, TierStatistics
+
+def result(score, recognizer='PatternRecognizer', start=0, end=4, entity_type='PERSON'):
+    return RecognizerResult(entity_type, start, end, score, recognition_metadata={RecognizerResult.RECOGNIZER_NAME_KEY: recognizer})
+
+
+class Token(str):
+    """The parts of a spaCy token the policy reads: its text, idx and pos_."""
+
+    def __new__(cls, text, idx, pos_):
+        token = super().__new__(cls, text)
+        token.idx, token.pos_ = idx, pos_
+        return token
+
+
+def artifacts(text, proper_nouns):
+    tokens, position = [], 0
+    for word in text.split(" "):
+        tokens.append(Token(word, position, 'PROPN' if word in proper_nouns else 'NOUN'))
+        position += len(word) + 1
+    return SimpleNamespace(tokens=tokens)
+
+
+@pytest.mark.parametrize('text, results, expected', [
+    ("   \n ", [result(0.9)], None),
+    ("1234 5678", [result(0.9)], None),
+    ("Call Anna", [result(0.85)], 'candidate'),
+    ("Call Anna", [result(0.4, recognizer='SpacyRecognizer')], 'uncertain'),
+    ("Call Anna", [result(0.4)], None),
+    ("Call Anna", [result(0.2, recognizer='SpacyRecognizer')], None),
+])
+def test_policy_escalation_reasons(text, results, expected):
+    assert TierPolicy().escalation_reason(text, results) == expected
+
+
+def test_policy_counts_proper_nouns_no_result_covers():
+    text = "Anna met Bert and Carl in Delft"
+    nlp_artifacts = artifacts(text, {"Anna", "Bert", "Carl", "Delft"})
+    covered = [result(0.2, start=0, end=4)]
+
+    policy = TierPolicy(max_uncovered_proper_nouns=2)
+    assert TierPolicy.uncovered_proper_nouns(nlp_artifacts, covered) == 3
+    assert policy.escalation_reason(text, covered, nlp_artifacts) == 'proper_nouns'
+    assert TierPolicy(max_uncovered_proper_nouns=3).escalation_reason(text, covered, nlp_artifacts) is None
+    assert policy.settings() == ('tiered', 0.5, (0.3, 0.5), 2, 1)
+
+
+def test_statistics_totals():
+    statistics = TierStatistics()
+    statistics.record(skipped=1, screened=3, screened_characters=300, escalations=[('candidate', 100), ('proper_nouns', 50)])
+    statistics.record(screened=1, screened_characters=20, escalations=[('candidate', 20)])
+
+    assert statistics.as_dict() == {
+        'segments': 5, 'skipped': 1, 'screened': 4, 'escalated': 3, 'escalated_by_reason': {'candidate': 2, 'proper_nouns': 1},
+        'screened_characters': 320, 'escalated_characters': 170, 'escalation_rate': 0.75,
+    }
+    statistics.reset()
+    assert statistics.as_dict()['segments'] == 0 and statistics.as_dict()['escalation_rate'] == 0.0
+
+
+@pytest.mark.parametrize('text, segment_chars', [
+    ("", 50),
+    ("first page\fsecond page\f", 50),
+    ("para one\n\npara two\n  \npara three\fpage two\n\nend", 12),
+    ("one long paragraph without breaks " * 10, 20),
+])
+def test_segments_cover_the_text_and_end_at_pages(text, segment_chars):
+    engine = TieredAnalyzerEngine(None, None, segment_chars=segment_chars, statistics=TierStatistics())
+    segments = list(engine.segments(text))
+
+    assert "".join(segment for _, segment in segments) == text
+    assert all(text[offset:offset + len(segment)] == segment for offset, segment in segments)
+    assert all("\f" not in segment[:-1] for _, segment in segments)
+
+
+def test_paragraphs_are_merged_up_to_segment_chars():
+    engine = TieredAnalyzerEngine(None, None, segment_chars=25, statistics=TierStatistics())
+    assert [segment for _, segment in engine.segments("aaaa\n\nbbbb\n\ncccc dddd eeee\n\nffff")] == [
+        "aaaa\n\nbbbb\n\n", "cccc dddd eeee\n\nffff"]
+
+
+class RecordingEngine:
+    """Full tier engine that records the segments it is asked to analyze."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.nlp_engine = engine.nlp_engine
+        self.texts = []
+
+    def analyze(self, text, **kwargs):
+        self.texts.append(text)
+        return self.engine.analyze(text=text, **kwargs)
+
+
+PAGES = ["Dear customer, your order shipped today.\n", "Write to anna.smith@example.com for help.\n", "   \n"]
+
+def test_only_flagged_segments_reach_the_full_engine(blank_analyzer_engine):
+    full = RecordingEngine(blank_analyzer_engine)
+    statistics = TierStatistics()
+    engine = TieredAnalyzerEngine(blank_analyzer_engine, full, statistics=statistics)
+    text = "\f".join(PAGES)
+
+    results = engine.analyze(text, language='en')
+
+    assert full.texts == [PAGES[1] + "\f"]
+    assert [text[found.start:found.end] for found in results if found.entity_type == 'EMAIL_ADDRESS'] == ["anna.smith@example.com"]
+    tiers = statistics.as_dict()
+    assert (tiers['skipped'], tiers['screened'], tiers['escalated'], tiers['escalated_by_reason']) == (1, 2, 1, {'candidate': 1})
+
+
+def test_screen_results_are_rebased_when_nothing_escalates(blank_analyzer_engine):
+    full = RecordingEngine(blank_analyzer_engine)
+    engine = TieredAnalyzerEngine(blank_analyzer_engine, full, policy=TierPolicy(candidate_threshold=1.01), statistics=TierStatistics())
+    text = "\f".join(PAGES)
+
+    results = engine.analyze(text, language='en')
+
+    assert full.texts == []
+    assert [text[found.start:found.end] for found in results if found.entity_type == 'EMAIL_ADDRESS'] == ["anna.smith@example.com"]
+    assert results == sorted(results, key=lambda found: (found.start, found.end))
+
+
+def test_screening_falls_back_to_the_full_model_when_the_small_one_is_missing(monkeypatch):
+    monkeypatch.setattr(analyzer_engine_director.spacy.util, 'is_package', lambda name: name != 'fr_core_news_sm')
+    assert PresidioAnalyzerDirector.get_screening_models('fr') == {}
+    assert PresidioAnalyzerDirector.get_screening_models('en') == {'en': 'en_core_web_sm'}
+
+    class ConfigBuilder:
+        def set_config_file(self, path):
+            self.path = path
+
+        def set_model_overrides(self, models):
+            self.models = models
+
+        def build_analyzer(self):
+            return self
+
+    builder = PresidioAnalyzerDirector(ConfigBuilder()).construct(from_config_file=True, language='fr', use_predefined=True, tier='screen')
+    assert builder.models == {}
@@ -0,0 +1,54 @@
+import numpy as np
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_processor.content_extractor.pdf_extractor import PDFProcessor
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.word_offset_mapper import WordOffsetMapper
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+def word_store(texts):
+    return WordStore.from_words([
+        {'text': text, 'start_x': float(index), 'start_y': 0.0, 'end_x': index + 0.5, 'end_y': 1.0, 'page_number': 1}
+        for index, text in enumerate(texts)
+    ])
+
+
+def aligned(page_text, texts):
+    words = word_store(texts)
+    PDFProcessor._align_word_offsets(page_text, words)
+    return words, [page_text[start:end] for start, end in words.char_offsets.tolist()]
+
+
+def test_exact_words_get_their_token():
+    _, spans = aligned("Dear John Smith,\nthanks", ["Dear", "John", "Smith,", "thanks"])
+    assert spans == ["Dear", "John", "Smith,", "thanks"]
+
+
+def test_short_word_does_not_match_inside_longer_one():
+    # The text pass dropped "in", which also occurs inside "meeting"
+    _, spans = aligned("the meeting with Ann Smith", ["in", "the", "meeting", "with", "Ann", "Smith"])
+    assert spans[1:] == ["the", "meeting", "with", "Ann", "Smith"]
+
+
+def test_misread_word_takes_the_token_read_in_its_place():
+    _, spans = aligned("call Jahn Smith today", ["call", "John", "Smith", "today"])
+    assert spans == ["call", "Jahn", "Smith", "today"]
+
+
+def test_misread_run_shares_the_tokens_read_in_its_place():
+    _, spans = aligned("from J0hnSmith today", ["from", "John", "Smith", "today"])
+    assert spans == ["from", "J0hnSmith", "J0hnSmith", "today"]
+
+
+def test_dropped_word_is_redacted_by_a_span_around_it():
+    page_text = "name: John Smith end"
+    words, spans = aligned(page_text, ["name:", "John", "J.", "Smith", "end"])
+    assert spans[2] == " "
+
+    person = page_text.index("John"), page_text.index("Smith") + len("Smith")
+    indices = WordOffsetMapper(words).get_word_indices([person])
+    assert [words.text(index) for index in indices] == ["John", "J.", "Smith"]
+
+
+def test_offsets_stay_sorted_for_the_mapper():
+    words, _ = aligned("a b c d e", ["a", "x", "y", "b", "z", "e", "f"])
+    assert np.all(np.diff(words.char_starts) >= 0)
+    assert np.all(np.diff(words.char_ends) >= 0)
@@ -0,0 +1,73 @@
+import numpy as np
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.file_redactor.token_filter.word_offset_mapper import WordOffsetMapper
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore
+
+TEXT = "Dear John Smith, call 555 0100 today"
+
+def mapper(offsets):
+    words = WordStore.from_words([
+        {'text': str(index), 'start_x': float(index), 'start_y': 0.0, 'end_x': index + 0.5, 'end_y': 1.0, 'page_number': 1}
+        for index in range(len(offsets))
+    ])
+    words.char_offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+    return WordOffsetMapper(words)
+
+
+def token_offsets(text):
+    offsets, position = [], 0
+    for token in text.split(" "):
+        offsets.append((position, position + len(token)))
+        position += len(token) + 1
+    return offsets
+
+
+def span_of(text, fragment):
+    start = text.index(fragment)
+    return start, start + len(fragment)
+
+
+def test_span_maps_to_the_words_it_covers():
+    words = mapper(token_offsets(TEXT))
+    assert words.get_word_indices([span_of(TEXT, "John Smith")]).tolist() == [1, 2]
+    assert words.get_word_indices([span_of(TEXT, "555 0100")]).tolist() == [4, 5]
+
+
+def test_partial_words_are_included():
+    words = mapper(token_offsets(TEXT))
+    assert words.get_word_indices([span_of(TEXT, "hn Smi")]).tolist() == [1, 2]
+    assert words.get_word_indices([span_of(TEXT, "r J")]).tolist() == [0, 1]
+
+
+def test_spans_touching_words_or_falling_between_them_select_nothing():
+    words = mapper(token_offsets(TEXT))
+    # The space between "Dear" and "John", and an empty span at the start of "John"
+    assert words.get_word_indices([(4, 5), (5, 5)]).tolist() == []
+    assert words.get_word_indices([]).tolist() == []
+
+
+def test_several_spans_at_once():
+    words = mapper(token_offsets(TEXT))
+    spans = [span_of(TEXT, "Dear"), span_of(TEXT, "today")]
+    assert words.get_word_indices(spans).tolist() == [0, 6]
+
+
+def test_unsorted_offsets_return_original_indices():
+    offsets = token_offsets(TEXT)
+    shuffled = [offsets[index] for index in (3, 0, 6, 1, 5, 2, 4)]
+    words = mapper(shuffled)
+    assert words.order is not None
+    assert sorted(words.get_word_indices([span_of(TEXT, "John Smith, call")]).tolist()) == [0, 3, 5]
+
+
+def test_words_without_position_are_never_selected():
+    offsets = token_offsets("Dear John Smith")
+    offsets.insert(2, (10, 10))
+    words = mapper(offsets)
+    assert words.get_word_indices([(0, 15)]).tolist() == [0, 1, 3]
+
+
+def test_get_word_coordinates_selects_the_store_rows():
+    words = mapper(token_offsets(TEXT))
+    selected = words.get_word_coordinates([span_of(TEXT, "John")])
+    assert len(selected) == 1 and selected.char_offsets.tolist() == [[5, 9]]
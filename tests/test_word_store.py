@@ -0,0 +1,73 @@
+import pickle
+
+import numpy as np
+
+from dynamic_data_masking.dynamic_data_masking_pipeline.word_store import WordStore, WordStoreBuilder
+
+
+def word(text, page_number, x, char_start=-1, char_end=-1):
+    return {'text': text, 'start_x': x, 'start_y': 10.0, 'end_x': x + 20.0, 'end_y': 22.5,
+            'page_number': page_number, 'char_start': char_start, 'char_end': char_end}
+
+# Pages out of order on purpose, words of a page keep their relative order
+WORDS = [
+    word("John", 2, 10.0, 0, 4),
+    word("Smith", 1, 40.0, 5, 10),
+    word("john", 3, 70.0),
+    word("Doe", 1, 100.25, 11, 14),
+    word("John", 2, 130.5, 15, 19),
+]
+
+
+def test_words_round_trip_grouped_by_page():
+    store = WordStore.from_words(WORDS)
+
+    assert len(store) == 5
+    assert list(store) == [WORDS[1], WORDS[3], WORDS[0], WORDS[4], WORDS[2]]
+    # Repeated texts share one table entry
+    assert store.texts == ["John", "Smith", "john", "Doe"]
+    assert store.boxes.dtype == np.float32 and store.char_offsets.dtype == np.int64
+
+
+def test_pages_map_to_contiguous_slices():
+    store = WordStore.from_words(WORDS)
+
+    assert store.pages() == [1, 2, 3]
+    assert [store.text(index) for index in range(len(store))[store.page_slice(2)]] == ["John", "John"]
+    np.testing.assert_array_equal(store.page_boxes(1), [[40.0, 10.0, 60.0, 22.5], [100.25, 10.0, 120.25, 22.5]])
+    assert store.page_boxes(4).shape == (0, 4)
+    np.testing.assert_array_equal(store.char_starts, [5, 11, 0, 15, -1])
+    np.testing.assert_array_equal(store.char_ends, [10, 14, 4, 19, -1])
+
+
+def test_find_text_and_select():
+    store = WordStore.from_words(WORDS)
+
+    matches = store.find_text("john")
+    assert matches.tolist() == [2, 3, 4]
+    assert store.find_text("jane").tolist() == []
+
+    selected = store.select([4, 2, 4])
+    assert list(selected) == [store[2], store[4]]
+    assert selected.texts is store.texts
+    assert selected.pages() == [2, 3]
+
+
+def test_add_store_shifts_only_known_offsets():
+    first, second = WordStore.from_words(WORDS[:2]), WordStore.from_words(WORDS[2:])
+    merged = WordStoreBuilder().add_store(first).add_store(second, char_offset=100).build()
+
+    assert [(entry['text'], entry['char_start'], entry['char_end']) for entry in merged] == [
+        ("Smith", 5, 10), ("Doe", 111, 114), ("John", 0, 4), ("John", 115, 119), ("john", -1, -1),
+    ]
+    assert merged.texts == ["John", "Smith", "john", "Doe"]
+
+
+def test_empty_and_pickled_stores():
+    empty = WordStore.empty()
+    assert len(empty) == 0 and empty.pages() == [] and empty.page_boxes(1).shape == (0, 4) and empty.nbytes == 0
+
+    store = WordStore.from_words(WORDS)
+    copy = pickle.loads(pickle.dumps(store))
+    assert list(copy) == list(store)
+    assert copy.pages() == store.pages()